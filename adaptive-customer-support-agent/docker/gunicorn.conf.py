@@ -0,0 +1,51 @@
+"""
+Gunicorn settings for multi-worker deployments.
+
+    gunicorn -c docker/gunicorn.conf.py main:app
+
+• WEB_CONCURRENCY uvicorn workers (default 1)
+• PRELOAD_ARTIFACTS=true – the master imports the app and loads the
+  intent encoder + example embeddings once; workers fork from it and
+  share those pages instead of each loading a copy
+• The FAISS index is shared through the page cache (FAISS_MMAP=true)
+• PROMETHEUS_MULTIPROC_DIR (needed with >1 worker) is emptied on start;
+  exited workers are marked dead for the multiprocess collector
+• Measure with `python scripts/bench_worker_rss.py`
+"""
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.core.config import settings  # noqa: E402
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.preload_artifacts
+timeout = 120
+graceful_timeout = 30
+
+# Before the app (and its metrics) is imported – with PRELOAD_ARTIFACTS that
+# happens in the master, ahead of on_starting. Stale files from an earlier
+# run would otherwise be summed into /metrics. This file is re-read on HUP;
+# live workers' files must survive that.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR") and not os.environ.get("_METRICS_DIR_RESET"):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    os.environ["_METRICS_DIR_RESET"] = "1"
+
+
+def on_starting(server) -> None:
+    if settings.preload_artifacts:
+        from src.core.lifecycle import preload
+
+        preload()
+
+
+def child_exit(server, worker) -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -3,7 +3,8 @@ Application entry-point.
 
 Bootstraps:
     • global configuration
-    • background resources (Mongo, Vector store, Redis)
+    • background resources (Mongo, Vector store, Redis), initialised concurrently
+    • background warm-up and health / readiness probes
     • FastAPI routes
     • optional Streamlit UI (dev mode)
 
@@ -12,12 +13,17 @@ The file is intentionally small – core logic lives inside `src/`.
 import asyncio
 import logging
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from src.core.config import settings
 from src.channels.fastapi_channel import router as chat_router
-from src.core.database import init_mongo
-from src.core.vector_store import init_vector_store
+from src.routing.intent_router import router as intent_router
+from src.core.database import get_bulk_writer, init_mongo
+from src.core.vector_store import init_vector_store, start_index_watcher, stop_index_watcher
 from src.core.memory import init_memory_cache
+from src.core.lifecycle import get_lifecycle
+from src.agents.history_manager import get_history_manager
+from src.core.metrics import TimingMiddleware, render
 
 logger = logging.getLogger(__name__)
 app = FastAPI(title="Adaptive Customer Support Agent")
@@ -28,16 +34,54 @@ app = FastAPI(title="Adaptive Customer Support Agent")
 @app.on_event("startup")
 async def startup_event() -> None:
     logger.info("Starting application...")
-    await init_mongo()
-    await init_vector_store()
-    await init_memory_cache()
+    await get_lifecycle().start({
+        "mongo": init_mongo,
+        "vector_store": init_vector_store,
+        "redis": init_memory_cache,
+    })                          # warm-up continues in the background → /readyz
+    start_index_watcher()       # hot-swap new knowledge-base generations
     logger.info("Resources initialised!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await get_lifecycle().stop()
+    await stop_index_watcher()
+    await get_history_manager().drain()     # let pending summaries land
+    await get_bulk_writer().close()         # flush buffered tickets / turn logs
+
+
+# --------------------------------------------------------------------------- #
+# Probes – liveness vs readiness (warm-up finished)
+# --------------------------------------------------------------------------- #
+@app.get("/healthz", include_in_schema=False)
+async def healthz() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz() -> JSONResponse:
+    status = get_lifecycle().status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+# --------------------------------------------------------------------------- #
+# Metrics – latency histograms per route, optional Server-Timing header
+# --------------------------------------------------------------------------- #
+app.add_middleware(TimingMiddleware, header=settings.timing_header)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    payload, content_type = render()
+    return Response(payload, media_type=content_type)
+
+
 # --------------------------------------------------------------------------- #
 # Register modular API routes
 # --------------------------------------------------------------------------- #
 app.include_router(chat_router, prefix="/api/v1")
+app.include_router(intent_router, prefix="/api/v1")
 
 # --------------------------------------------------------------------------- #
 # Optional Streamlit UI in dev / hackathon demos
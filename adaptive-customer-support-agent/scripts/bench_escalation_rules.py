@@ -0,0 +1,86 @@
+"""
+Escalation rule matching: per-rule `re.search` loop (the old approach)
+vs. the compiled RuleSet, for growing rule counts. Synthetic keyword
+rules plus a few regex rules; texts are reply-sized.
+
+    python scripts/bench_escalation_rules.py --rules 100 1000 5000
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.agents.escalation_rules import RuleSet  # noqa: E402
+
+REGEX_RULES = 5
+WORDS_PER_TEXT = 60
+VOCAB = 50_000            # most replies match no rule, like production
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+
+def synthetic(n_rules: int, n_texts: int, rng: random.Random):
+    vocab = [_word(rng) for _ in range(VOCAB)]
+    rules = [{"id": f"kw{i}", "keywords": [" ".join(rng.sample(vocab, rng.randint(1, 2)))]}
+             for i in range(n_rules - REGEX_RULES)]
+    rules += [{"id": f"re{i}", "regex": rf"\b{_word(rng)}\d+\b"} for i in range(REGEX_RULES)]
+    texts = [" ".join(rng.choices(vocab, k=WORDS_PER_TEXT)) for _ in range(n_texts)]
+    return rules, texts
+
+
+def naive_matcher(rules: list[dict]):
+    patterns = [rf"\b{re.escape(k)}\b" for r in rules for k in r.get("keywords", [])]
+    patterns += [r["regex"] for r in rules if "regex" in r]
+    return lambda text: any(re.search(p, text, re.IGNORECASE) for p in patterns)
+
+
+def bench(n_rules: int, n_texts: int, rng: random.Random) -> dict:
+    rules, texts = synthetic(n_rules, n_texts, rng)
+    t0 = time.perf_counter()
+    ruleset = RuleSet(1, rules)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    naive = naive_matcher(rules)
+    t0 = time.perf_counter()
+    naive_hits = sum(naive(t) for t in texts)
+    naive_us = (time.perf_counter() - t0) * 1e6 / n_texts
+
+    t0 = time.perf_counter()
+    hits = sum(bool(ruleset.evaluate(t)) for t in texts)
+    compiled_us = (time.perf_counter() - t0) * 1e6 / n_texts
+
+    t0 = time.perf_counter()
+    ruleset.evaluate_many({"reply": t} for t in texts)
+    batch_us = (time.perf_counter() - t0) * 1e6 / n_texts
+    assert hits == naive_hits, (hits, naive_hits)
+    return {
+        "rules": n_rules, "compile_ms": compile_ms, "naive_us": naive_us,
+        "compiled_us": compiled_us, "batch_us": batch_us, "hit_rate": hits / n_texts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'rules':>6} {'compile ms':>11} {'naive µs':>10} {'compiled µs':>12} "
+          f"{'batch µs':>9} {'speed-up':>9} {'hits':>6}")
+    for n in args.rules:
+        r = bench(n, args.texts, rng)
+        print(f"{r['rules']:>6} {r['compile_ms']:>11.1f} {r['naive_us']:>10.1f} "
+              f"{r['compiled_us']:>12.1f} {r['batch_us']:>9.1f} "
+              f"{r['naive_us'] / r['compiled_us']:>8.1f}x {r['hit_rate']:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
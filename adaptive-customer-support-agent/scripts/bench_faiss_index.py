@@ -0,0 +1,91 @@
+"""
+Recall vs latency of the FAISS index types against the flat baseline.
+Uses clustered synthetic vectors (real embeddings are far from uniform)
+and sweeps the search-time knob of each ANN index:
+
+    hnsw  – efSearch
+    ivfpq – nprobe (exact re-ranking factor from FAISS_IVFPQ_REFINE)
+
+    python scripts/bench_faiss_index.py --docs 200000 --dim 384 --k 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.core.config import settings  # noqa: E402
+from src.core.faiss_index import build_index  # noqa: E402
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng) -> np.ndarray:
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centres[labels] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    # One query at a time – matches the per-chat serving pattern
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    started = time.perf_counter()
+    for i, q in enumerate(queries):
+        _, ids[i] = index.search(q[None, :], k)
+    return ids, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def index_bytes(index: faiss.Index) -> int:
+    return faiss.serialize_index(index).nbytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered_vectors(args.docs + args.queries, args.dim, clusters=args.docs // 200 or 1, rng=rng)
+    corpus, queries = data[: args.docs], data[args.docs:]
+
+    rows = []
+    for kind in ("flat", "hnsw", "ivfpq"):
+        t0 = time.perf_counter()
+        index = build_index(kind, corpus)
+        build_s = time.perf_counter() - t0
+        if kind == "flat":
+            truth, ms = timed_search(index, queries, args.k)
+            rows.append((kind, "-", 1.0, ms, build_s, index_bytes(index)))
+            continue
+        sweep = args.ef_search if kind == "hnsw" else args.nprobe
+        for value in sweep:
+            if kind == "hnsw":
+                index.hnsw.efSearch = value
+            else:
+                faiss.extract_index_ivf(index).nprobe = value
+            found, ms = timed_search(index, queries, args.k)
+            param = f"efSearch={value}" if kind == "hnsw" else f"nprobe={value}"
+            rows.append((kind, param, recall(found, truth), ms, build_s, index_bytes(index)))
+
+    print(f"{args.docs} docs × {args.dim}d, k={args.k}, "
+          f"hnsw M={settings.faiss_hnsw_m}, ivf nlist={settings.faiss_ivf_nlist} "
+          f"pq m={settings.faiss_pq_m} refine={settings.faiss_ivfpq_refine}")
+    print(f"{'index':<7}{'param':<15}{'recall@k':>10}{'ms/query':>10}{'build s':>9}{'size MB':>9}")
+    for kind, param, rec, ms, build_s, size in rows:
+        print(f"{kind:<7}{param:<15}{rec:>10.3f}{ms:>10.3f}{build_s:>9.1f}{size / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
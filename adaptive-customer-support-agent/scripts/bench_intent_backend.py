@@ -0,0 +1,121 @@
+"""
+Torch vs. int8 ONNX intent encoder: accuracy parity, latency and memory.
+Each backend runs in its own subprocess so peak RSS is measured in
+isolation (the ONNX worker never imports torch).
+
+    python -m src.agents.onnx_encoder            # one-off export
+    python scripts/bench_intent_backend.py
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+MODEL_NAME = "sentence-transformers/paraphrase-MiniLM-L6-v2"
+INTENTS_PATH = ROOT / "src" / "data" / "banking_intents.json"
+
+
+def load_examples() -> tuple[list[str], list[str]]:
+    data = json.loads(INTENTS_PATH.read_text(encoding="utf-8"))
+    intents = [intent for intent, samples in data.items() for _ in samples]
+    examples = [sentence for samples in data.values() for sentence in samples]
+    return intents, examples
+
+
+# --------------------------------------------------------------------------- #
+# Worker – loads one backend, embeds the catalog, times single queries
+# --------------------------------------------------------------------------- #
+def run_worker(backend: str, model: str, onnx_dir: str, out: str, repeats: int) -> None:
+    t0 = time.perf_counter()
+    if backend == "onnx":
+        from src.agents.onnx_encoder import OnnxSentenceEncoder
+        encoder = OnnxSentenceEncoder(onnx_dir, quantized=True)
+    else:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(model)
+    load_s = time.perf_counter() - t0
+
+    _, examples = load_examples()
+    embeddings = encoder.encode(examples, normalize_embeddings=True)
+    np.save(out, np.asarray(embeddings, dtype=np.float32))
+
+    latencies = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        encoder.encode([examples[i % len(examples)]], normalize_embeddings=True)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    batch = (examples * (32 // len(examples) + 1))[:32]
+    t0 = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        encoder.encode(batch, batch_size=32, normalize_embeddings=True)
+    batch_ms = (time.perf_counter() - t0) * 1000 / max(1, repeats // 10)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "batch32_ms": batch_ms,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+# --------------------------------------------------------------------------- #
+# Parent – runs both workers and compares
+# --------------------------------------------------------------------------- #
+def leave_one_out_accuracy(intents: list[str], embeddings: np.ndarray) -> tuple[float, list[str]]:
+    sims = embeddings @ embeddings.T
+    np.fill_diagonal(sims, -np.inf)
+    predicted = [intents[j] for j in sims.argmax(axis=1)]
+    return float(np.mean([p == t for p, t in zip(predicted, intents)])), predicted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--onnx-dir", default=str(ROOT / "src" / "data" / "onnx_model"))
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model, args.onnx_dir, args.out, args.repeats)
+        return
+
+    intents, _ = load_examples()
+    results, embeddings = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("torch", "onnx"):
+            out = str(Path(tmp) / f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, __file__, "--worker", backend, "--out", out,
+                 "--model", args.model, "--onnx-dir", args.onnx_dir, "--repeats", str(args.repeats)],
+                check=True, capture_output=True, text=True,
+            )
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            embeddings[backend] = np.load(out)
+
+    cosine = np.sum(embeddings["torch"] * embeddings["onnx"], axis=1)
+    acc_torch, pred_torch = leave_one_out_accuracy(intents, embeddings["torch"])
+    acc_onnx, pred_onnx = leave_one_out_accuracy(intents, embeddings["onnx"])
+    agreement = float(np.mean([a == b for a, b in zip(pred_torch, pred_onnx)]))
+
+    print(f"{'backend':<8}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'b32 ms':>9}{'RSS MB':>9}{'LOO acc':>9}")
+    for backend, acc in (("torch", acc_torch), ("onnx", acc_onnx)):
+        r = results[backend]
+        print(f"{backend:<8}{r['load_s']:>8.2f}{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+              f"{r['batch32_ms']:>9.2f}{r['max_rss_mb']:>9.0f}{acc:>9.2f}")
+    print(f"\nembedding cosine torch↔onnx: mean={cosine.mean():.4f} min={cosine.min():.4f}")
+    print(f"prediction agreement: {agreement:.2%}")
+
+
+if __name__ == "__main__":
+    main()
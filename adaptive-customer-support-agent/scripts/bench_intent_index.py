@@ -0,0 +1,80 @@
+"""
+Latency vs. catalog size for every intent index mode.
+Uses synthetic clustered embeddings (no model download needed), so the
+numbers isolate search cost from encoding cost.
+
+    python scripts/bench_intent_index.py --sizes 1000 10000 50000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from src.agents.intent_index import INDEX_TYPES, build_intent_index  # noqa: E402
+
+DIM = 384                 # paraphrase-MiniLM-L6-v2 output size
+EXAMPLES_PER_INTENT = 50
+NOISE = 0.12              # per-dimension jitter around each intent centre
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_catalog(n_examples: int, rng: np.random.Generator):
+    n_intents = max(2, n_examples // EXAMPLES_PER_INTENT)
+    centres = _normalise(rng.standard_normal((n_intents, DIM)))
+    labels = rng.integers(0, n_intents, n_examples)
+    examples = _normalise(centres[labels] + NOISE * rng.standard_normal((n_examples, DIM)))
+    return [f"intent_{i}" for i in labels], examples, centres
+
+
+def bench(kind: str, n_examples: int, queries: int, batch: int, k: int, rng) -> dict:
+    intents, examples, centres = synthetic_catalog(n_examples, rng)
+    t0 = time.perf_counter()
+    index = build_intent_index(kind, intents, examples, k=k)
+    build_s = time.perf_counter() - t0
+
+    truth = rng.integers(0, len(centres), queries)
+    q = _normalise(centres[truth] + NOISE * rng.standard_normal((queries, DIM)))
+
+    latencies = []
+    hits = 0
+    for start in range(0, queries, batch):
+        chunk = q[start:start + batch]
+        t0 = time.perf_counter()
+        results = index.search(chunk, top_n=1)
+        latencies.append((time.perf_counter() - t0) * 1000 / len(chunk))
+        hits += sum(r[0][0] == f"intent_{t}" for r, t in zip(results, truth[start:start + batch]))
+    lat = np.array(latencies)
+    return {
+        "mode": kind,
+        "examples": n_examples,
+        "build_s": build_s,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "accuracy": hits / queries,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--modes", nargs="+", default=list(INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=1, help="queries per search call")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<11}{'examples':>10}{'build s':>10}{'p50 ms/q':>11}{'p99 ms/q':>11}{'acc':>7}")
+    for size in args.sizes:
+        for kind in args.modes:
+            r = bench(kind, size, args.queries, args.batch, args.k, np.random.default_rng(0))
+            print(f"{r['mode']:<11}{r['examples']:>10}{r['build_s']:>10.2f}"
+                  f"{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['accuracy']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+RAG retrieval throughput under concurrent chats.
+Builds an in-memory FAISS index with a deterministic fake embedding
+model that simulates the HTTP round-trip, then compares:
+
+    blocking  – old path: new retriever per call + synchronous retrieval
+    async     – RagAgent.retrieve (async embed + threaded search)
+    batched   – RagAgent.retrieve_many over each wave of concurrent chats
+
+    python scripts/bench_rag.py --concurrency 1 8 32 --embed-ms 100
+"""
+import argparse
+import asyncio
+import hashlib
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from langchain.vectorstores.faiss import FAISS  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from src.core import vector_store  # noqa: E402
+from src.agents.rag_agent import RagAgent  # noqa: E402
+
+DIM = 256
+
+
+class SlowFakeEmbeddings(Embeddings):
+    """Hash-seeded random vectors + a fixed per-request latency."""
+
+    def __init__(self, latency_ms: float) -> None:
+        self.latency = latency_ms / 1000
+
+    @staticmethod
+    def _vector(text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        await asyncio.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+def build_store(n_docs: int, embeddings: Embeddings) -> FAISS:
+    texts = [f"Knowledge base chunk {i} about cards, loans and fees." for i in range(n_docs)]
+    vectors = [SlowFakeEmbeddings._vector(t) for t in texts]
+    return FAISS.from_embeddings(list(zip(texts, vectors)), embeddings)
+
+
+async def run_mode(mode: str, concurrency: int, waves: int, store: FAISS) -> dict:
+    agent = RagAgent()
+    latencies: list[float] = []
+
+    async def blocking_chat(query: str) -> None:
+        t0 = time.perf_counter()
+        store.as_retriever(search_kwargs={"k": 4}).invoke(query)   # sync, blocks the loop
+        latencies.append(time.perf_counter() - t0)
+
+    async def async_chat(query: str) -> None:
+        t0 = time.perf_counter()
+        await agent.retrieve(query)
+        latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    for wave in range(waves):
+        queries = [f"question {wave}-{i}" for i in range(concurrency)]
+        if mode == "batched":
+            t0 = time.perf_counter()
+            await agent.retrieve_many(queries)
+            latencies.extend([time.perf_counter() - t0] * len(queries))
+        else:
+            chat = blocking_chat if mode == "blocking" else async_chat
+            await asyncio.gather(*(chat(q) for q in queries))
+    elapsed = time.perf_counter() - started
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "qps": concurrency * waves / elapsed,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--waves", type=int, default=10)
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--embed-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    embeddings = SlowFakeEmbeddings(args.embed_ms)
+    store = build_store(args.docs, embeddings)
+    vector_store._retriever, vector_store._embeddings = store, embeddings
+
+    print(f"{'mode':<10}{'chats':>7}{'qps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for concurrency in args.concurrency:
+        for mode in ("blocking", "async", "batched"):
+            r = await run_mode(mode, concurrency, args.waves, store)
+            print(f"{r['mode']:<10}{r['concurrency']:>7}{r['qps']:>10.1f}"
+                  f"{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""
+Pod memory for N serving workers – per-worker copies vs shared artifacts.
+Mimics gunicorn's pre-fork model: the parent (master) optionally runs
+`lifecycle.preload()`, then forks N workers. Each worker loads what a
+uvicorn worker loads at startup – intent classifier, FAISS knowledge-base
+store – and runs a few classifications + searches so lazily mapped pages
+are resident. Web framework / client libraries are the same in every
+mode and not included.
+
+Modes:
+    copy     – FAISS_MMAP=false, every worker loads its own model + index
+    mmap     – index and intent embeddings memory-mapped, model per worker
+    preload  – mmap + model loaded once in the master (PRELOAD_ARTIFACTS)
+
+Reported per mode and worker count (master + workers, /proc/<pid>/smaps_rollup):
+    RSS sum     – what per-process monitoring adds up; counts shared pages N times
+    PSS sum     – shared pages split between the processes using them,
+                  i.e. what the pod really costs
+    USS/worker  – private memory of one worker = cost of adding a worker
+
+Linux only. A synthetic knowledge base (--vectors × --dim) is written to a
+temporary directory; the intent cache is built once before measuring.
+
+    python scripts/bench_worker_rss.py --workers 1 4 16
+    python scripts/bench_worker_rss.py --model /models/paraphrase-MiniLM-L6-v2   # offline copy
+"""
+import argparse
+import os
+import pickle
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+import faiss
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+MODES = ("copy", "mmap", "preload")
+QUERIES = [
+    "How do I freeze my card?",
+    "I want to report a fraudulent transaction",
+    "What is my account balance?",
+    "Can I get a loan?",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--model", default=None, help="encoder name or local path")
+    return parser.parse_args()
+
+
+def memory(pid: int) -> dict[str, int]:
+    """kB values from smaps_rollup (Rss, Pss, Private_*, Shared_*, ...)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def write_knowledge_base(index_dir: Path, n: int, dim: int) -> None:
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+    from src.core.faiss_index import INDEX_NAME
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(index_dir / f"{INDEX_NAME}.faiss"))
+    ids = {i: f"doc-{i}" for i in range(n)}
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=f"Knowledge-base chunk {i} " + "lorem ipsum " * 30,
+                         metadata={"source": f"doc_{i // 20}.md"})
+        for i, doc_id in ids.items()
+    })
+    with open(index_dir / f"{INDEX_NAME}.pkl", "wb") as f:
+        pickle.dump((docstore, ids), f)
+
+
+def serve(index_dir: Path, mmap: bool, dim: int, ready_fd: int) -> None:
+    """Worker body: load like a uvicorn worker, touch the pages, then idle."""
+    from src.agents.intent_classifier import get_intent_classifier
+    from src.core.faiss_index import load_store
+
+    classifier = get_intent_classifier()
+    store = load_store(index_dir, embeddings=None, kind="flat", mmap=mmap)
+    classifier.classify_many(QUERIES)
+    queries = np.random.default_rng(os.getpid()).standard_normal((4, dim)).astype(np.float32)
+    store.index.search(queries, 4)
+    os.write(ready_fd, b"1")
+    signal.pause()
+
+
+def run(workers: int, mode: str, index_dir: Path, dim: int) -> dict:
+    from src.core.lifecycle import preload
+
+    if mode == "preload":
+        preload()
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                serve(index_dir, mode != "copy", dim, write_fd)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    os.close(write_fd)
+    started = time.perf_counter()
+    for _ in range(workers):
+        if not os.read(read_fd, 1):
+            raise RuntimeError("a worker exited before it was ready")
+    ready_s = time.perf_counter() - started
+    os.close(read_fd)
+    master, children = memory(os.getpid()), [memory(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+    everyone = [master, *children]
+    uss = [c["Private_Clean"] + c["Private_Dirty"] for c in children]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "rss_mb": sum(m["Rss"] for m in everyone) / 1024,
+        "pss_mb": sum(m["Pss"] for m in everyone) / 1024,
+        "uss_worker_mb": float(np.mean(uss)) / 1024,
+        "ready_s": ready_s,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="worker-rss-"))
+    from src.core.config import settings
+    from src.agents import intent_classifier
+
+    settings.intent_cache_dir = str(workdir / "intent_cache")
+    if args.model:
+        intent_classifier.MODEL_NAME = args.model
+    index_dir = workdir / "index"
+    write_knowledge_base(index_dir, args.vectors, args.dim)
+
+    # Build the intent cache in a throwaway child – preload never encodes
+    pid = os.fork()
+    if pid == 0:
+        intent_classifier.get_intent_classifier()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    print(f"{args.vectors} × {args.dim} flat index "
+          f"({args.vectors * args.dim * 4 / 2**20:.0f} MB), encoder {intent_classifier.MODEL_NAME}")
+    print(f"{'mode':>8} {'workers':>8} {'RSS sum MB':>11} {'PSS sum MB':>11} "
+          f"{'USS/worker MB':>14} {'ready s':>8}")
+    # Each measurement runs in its own child so preloading never leaks
+    # into the next mode's master
+    for mode in args.modes:
+        for workers in args.workers:
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                os.write(write_fd, pickle.dumps(run(workers, mode, index_dir, args.dim)))
+                os._exit(0)
+            os.close(write_fd)
+            with os.fdopen(read_fd, "rb") as pipe:
+                payload = pipe.read()
+            os.waitpid(pid, 0)
+            row = pickle.loads(payload)
+            print(f"{row['mode']:>8} {row['workers']:>8} {row['rss_mb']:>11.0f} "
+                  f"{row['pss_mb']:>11.0f} {row['uss_worker_mb']:>14.0f} {row['ready_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
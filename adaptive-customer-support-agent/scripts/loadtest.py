@@ -0,0 +1,275 @@
+"""
+Offline load test for POST /api/v1/chat.
+Drives the FastAPI `app` from main.py in-process (httpx ASGI transport)
+with OpenAI, Mongo and Redis replaced by the deterministic stand-ins in
+scripts/loadtest_fakes.py. A synthetic knowledge base is ingested into
+a temporary vector directory first.
+
+For every concurrency level a closed loop of N workers (one session
+each) sends `--requests` chats; reported per level:
+    latency p50 / p95 / p99, throughput, errors,
+    per-stage (graph node) p50 / p95, LLM / DB / Redis call counts.
+
+Results are written as JSON (default bench_results/loadtest-<commit>.json);
+`--compare` prints the change against an earlier result file.
+
+    python scripts/loadtest.py --concurrency 1 8 32 --requests 200
+    python scripts/loadtest.py --compare bench_results/loadtest-abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+QUESTIONS = [
+    "Hello there!",
+    "How do I freeze my debit card in the app?",
+    "What fees apply to international transfers?",
+    "How long does a SEPA transfer take?",
+    "Can I increase my daily card limit?",
+    "What is the interest rate on a personal loan?",
+    "I was charged twice for the same payment, what now?",
+    "How do I order a new statement?",
+    "Thanks, that helps!",
+    "I think this is fraud, I want to speak to a human.",
+]
+TOPICS = ["cards", "transfers", "loans", "fees", "statements", "security", "online banking", "limits"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="chats per concurrency level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--llm-ttft-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=80.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--embed-ms", type=float, default=40.0)
+    parser.add_argument("--mongo-ms", type=float, default=2.0)
+    parser.add_argument("--redis-ms", type=float, default=0.5)
+    parser.add_argument("--kb-docs", type=int, default=40)
+    parser.add_argument("--fake-intent", action="store_true",
+                        help="keyword intents instead of the sentence encoder (no model download)")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="earlier result JSON")
+    return parser.parse_args()
+
+
+def configure_env(workdir: Path, args: argparse.Namespace) -> None:
+    # Must run before anything imports src.core.config; explicit env wins
+    defaults = {
+        "OPENAI_API_KEY": "sk-loadtest",
+        "MONGODB_URI": "mongodb://loadtest",
+        "REDIS_URL": "redis://loadtest",
+        "VECTOR_STORE": "faiss",
+        "VECTOR_DIRECTORY": str(workdir / "index"),
+        "EMBEDDING_BACKEND": "openai",
+        "EMBEDDING_CACHE_ENABLED": "false",
+        "FAISS_MMAP": "false",
+        "LLM_RATE_LIMIT_RPM": "1000000",    # measure our service, not the account quota
+        "INDEX_POLL_INTERVAL_S": "3600",
+    }
+    if args.fake_intent:
+        defaults["RESPONSE_CACHE_ENABLED"] = "false"   # its embeddings use the encoder too
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def write_knowledge_base(docs_dir: Path, n_docs: int) -> None:
+    docs_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(n_docs):
+        topic = TOPICS[i % len(TOPICS)]
+        paragraphs = [
+            f"# {topic.title()} guide {i}",
+            f"This article explains {topic} for retail customers (revision {i}). "
+            f"Customers can manage {topic} in the mobile app or online banking.",
+            f"Fees for {topic}: domestic requests are free, international requests cost "
+            f"{i % 5 + 1} EUR. Processing takes {i % 3 + 1} business days.",
+            f"If something looks wrong with your {topic}, contact support or freeze the card "
+            "immediately in the app. Never share your PIN or one-time codes.",
+        ]
+        (docs_dir / f"{topic.replace(' ', '_')}_{i}.md").write_text("\n\n".join(paragraphs))
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+            "mean": round(float(np.mean(samples)), 2)}
+
+
+class StageRecorder:
+    """Collects the graph's per-node timings (wraps conversation_agent._log_timings)."""
+
+    def __init__(self, conv) -> None:
+        self.samples: dict[str, list[float]] = {}
+        original = conv._log_timings
+
+        def record(timings: dict, total_ms):
+            for stage, ms in timings.items():
+                self.samples.setdefault(stage, []).append(ms)
+            original(timings, total_ms)
+
+        conv._log_timings = record
+
+    def take(self) -> dict:
+        stages = {stage: {**percentiles(ms), "count": len(ms)} for stage, ms in sorted(self.samples.items())}
+        self.samples = {}
+        return stages
+
+
+async def run_level(client, concurrency: int, total: int, prefix: str) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal issued, errors
+        session = f"{prefix}-c{concurrency}-w{worker_id}"
+        turn = 0
+        while issued < total:
+            issued += 1
+            question = QUESTIONS[(worker_id + turn) % len(QUESTIONS)]
+            turn += 1
+            started = time.perf_counter()
+            response = await client.post("/api/v1/chat", json={"session_id": session, "message": question})
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    before = {level["concurrency"]: level for level in baseline["levels"]}
+    print(f"\nvs {baseline_path.name} ({baseline['meta']['commit']}):")
+    print(f"{'conc':>5} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16}")
+
+    def delta(new, old):
+        if new is None or old is None:
+            return f"{'n/a':>16}"
+        change = (new - old) / old * 100 if old else 0.0
+        return f"{new:>8.1f} ({change:+5.1f}%)"
+
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        print(f"{level['concurrency']:>5} "
+              f"{delta(level['latency_ms']['p50'], old['latency_ms']['p50'])} "
+              f"{delta(level['latency_ms']['p95'], old['latency_ms']['p95'])} "
+              f"{delta(level['throughput_rps'], old['throughput_rps'])}")
+
+
+async def main() -> None:
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    configure_env(workdir, args)
+
+    import httpx
+    import loadtest_fakes as fakes
+    from src.core import database, embeddings, lifecycle, llm_client, memory, vector_store
+    from src.tools import knowledge_base
+    from src.agents import conversation_agent as conv
+
+    llm = fakes.FakeChatModel(args.llm_ttft_ms, args.llm_tokens_per_s, args.reply_tokens)
+    embedder = fakes.FakeEmbeddings(args.embed_ms)
+    mongo = fakes.InMemoryMongo(args.mongo_ms)
+    redis = fakes.InMemoryRedis(args.redis_ms)
+    llm_client._llm = llm
+    embeddings.build_embeddings = vector_store.build_embeddings = \
+        knowledge_base.build_embeddings = lambda: embedder
+    database.AsyncIOMotorClient = mongo
+    memory.from_url = lambda *a, **kw: redis
+    if args.fake_intent:
+        conv.get_intent_batcher = lambda: fakes.FakeIntentBatcher()
+        lifecycle.get_lifecycle().warmups.pop("classifier")
+
+    import main as app_module      # noqa: E402 – after env + stand-ins
+
+    write_knowledge_base(workdir / "docs", args.kb_docs)
+    ingest_stats = await knowledge_base.ingest(workdir / "docs")
+    await app_module.startup_event()
+    await lifecycle.get_lifecycle().wait_ready()
+    stages = StageRecorder(conv)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            "ingest": ingest_stats,
+            "startup": lifecycle.get_lifecycle().status(),
+        },
+        "levels": [],
+    }
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+        await run_level(client, 1, args.warmup, "warmup")
+        stages.take()
+        print(f"{'conc':>5} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            llm_calls, embed_requests = llm.calls, embedder.requests
+            redis_trips = redis.round_trips
+            level = await run_level(client, concurrency, args.requests, "load")
+            await database.get_bulk_writer().flush()
+            level["stages_ms"] = stages.take()
+            level["upstream"] = {
+                "llm_calls": llm.calls - llm_calls,
+                "llm_peak_in_flight": llm.peak_in_flight,
+                "embedding_requests": embedder.requests - embed_requests,
+                "redis_round_trips": redis.round_trips - redis_trips,
+            }
+            level["llm_guard"] = llm_client.llm_stats()
+            results["levels"].append(level)
+            lat = level["latency_ms"]
+            print(f"{concurrency:>5} {level['requests']:>6} {level['errors']:>4} "
+                  f"{level['throughput_rps']:>8.1f} {lat['p50']:>9} {lat['p95']:>9} {lat['p99']:>9}")
+    await app_module.shutdown_event()
+    results["meta"]["mongo"] = mongo.stats()
+
+    output = args.output or ROOT / "bench_results" / f"loadtest-{results['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str))
+    print(f"\nResults → {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
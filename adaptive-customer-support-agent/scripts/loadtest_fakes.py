@@ -0,0 +1,282 @@
+"""
+Deterministic local stand-ins for the external services, used by
+scripts/loadtest.py. They replace the client objects at the process
+boundary, so everything above them (LLM guard, graph, retrieval, session
+memory, bulk writer) runs unmodified.
+
+• FakeChatModel   – ChatOpenAI surface (agenerate / astream) with a
+                    time-to-first-token and a token rate
+• FakeEmbeddings  – hash-seeded vectors + per-request latency
+• InMemoryMongo   – Motor client / database / collection surface used
+                    by src.core.database
+• InMemoryRedis   – redis.asyncio surface used by src.core.memory
+Each stand-in counts its calls; latencies are per round-trip.
+"""
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessageChunk
+
+WORDS = ("your card account balance transfer fee payment loan app branch statement limit "
+         "interest online banking support team secure verify request process days").split()
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+
+
+class FakeChatModel:
+    def __init__(self, ttft_ms: float, tokens_per_s: float, reply_tokens: int) -> None:
+        self.ttft = ttft_ms / 1000
+        self.token_s = 1 / tokens_per_s if tokens_per_s > 0 else 0.0
+        self.reply_tokens = reply_tokens
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _reply(self, messages) -> list[str]:
+        rng = np.random.default_rng(_seed("".join(str(m.content) for m in messages)))
+        words = rng.choice(WORDS, self.reply_tokens)
+        return [f"{w} " for w in words[:-1]] + [f"{words[-1]}."]
+
+    async def agenerate(self, batches):
+        generations = []
+        for messages in batches:
+            tokens = await self._run(messages)
+            message = SimpleNamespace(response_metadata={"headers": {
+                "x-ratelimit-remaining-requests": "10000", "x-ratelimit-reset-requests": "1s",
+            }})
+            generations.append([SimpleNamespace(text="".join(tokens), message=message)])
+        return SimpleNamespace(generations=generations)
+
+    async def astream(self, messages):
+        self._enter()
+        try:
+            await asyncio.sleep(self.ttft)
+            for token in self._reply(messages):
+                await asyncio.sleep(self.token_s)
+                yield AIMessageChunk(content=token)
+        finally:
+            self.in_flight -= 1
+
+    async def _run(self, messages) -> list[str]:
+        self._enter()
+        try:
+            tokens = self._reply(messages)
+            await asyncio.sleep(self.ttft + self.token_s * len(tokens))
+            return tokens
+        finally:
+            self.in_flight -= 1
+
+    def _enter(self) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+
+class FakeEmbeddings(Embeddings):
+    model_key = "fake:hash-256"
+
+    def __init__(self, latency_ms: float, dim: int = 256) -> None:
+        self.latency = latency_ms / 1000
+        self.dim = dim
+        self.requests = 0
+        self.texts = 0
+
+    def _vector(self, text: str) -> list[float]:
+        v = np.random.default_rng(_seed(text)).standard_normal(self.dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts):
+        self.requests += 1
+        self.texts += len(texts)
+        time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        self.requests += 1
+        self.texts += len(texts)
+        await asyncio.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+# --------------------------------------------------------------------------- #
+# MongoDB (Motor) stand-in
+# --------------------------------------------------------------------------- #
+class InMemoryCollection:
+    def __init__(self, latency_s: float) -> None:
+        self.latency = latency_s
+        self.docs: list[dict] = []
+        self.round_trips = 0
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+
+    async def create_index(self, *args, **kwargs) -> str:
+        await self._round_trip()
+        return "index"
+
+    async def insert_one(self, doc: dict):
+        await self._round_trip()
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc.get("_id"))
+
+    async def insert_many(self, docs: list[dict], ordered: bool = True):
+        await self._round_trip()
+        self.docs.extend(docs)
+        return SimpleNamespace(inserted_ids=[d.get("_id") for d in docs])
+
+    async def count_documents(self, query: dict) -> int:
+        await self._round_trip()
+        return sum(all(d.get(k) == v for k, v in query.items()) for d in self.docs)
+
+
+class InMemoryDatabase:
+    def __init__(self, latency_s: float) -> None:
+        self.latency = latency_s
+        self.collections: dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(self.latency)
+        return self.collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def stats(self) -> dict:
+        return {name: {"docs": len(c.docs), "round_trips": c.round_trips}
+                for name, c in self.collections.items()}
+
+
+class InMemoryMongo:
+    """Replaces AsyncIOMotorClient: `InMemoryMongo(ms)(uri, ...)[db_name]`."""
+
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        self.latency = latency_ms / 1000
+        self.databases: dict[str, InMemoryDatabase] = {}
+
+    def __call__(self, *args, **kwargs) -> "InMemoryMongo":
+        return self
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self.databases:
+            self.databases[name] = InMemoryDatabase(self.latency)
+        return self.databases[name]
+
+    def stats(self) -> dict:
+        return {name: db.stats() for name, db in self.databases.items()}
+
+
+# --------------------------------------------------------------------------- #
+# Redis stand-in
+# --------------------------------------------------------------------------- #
+class _Pipeline:
+    def __init__(self, redis: "InMemoryRedis") -> None:
+        self._redis = redis
+        self._ops: list = []
+
+    async def __aenter__(self) -> "_Pipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._ops.clear()
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self._ops.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> list:
+        await self._redis._round_trip()
+        return [getattr(self._redis, f"_{name}")(*args, **kwargs) for name, args, kwargs in self._ops]
+
+
+class InMemoryRedis:
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        self.latency = latency_ms / 1000
+        self.streams: dict[str, list[tuple[str, dict]]] = defaultdict(list)
+        self.values: dict[str, str] = {}
+        self.round_trips = 0
+        self._seq = 0
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+
+    def pipeline(self, transaction: bool = True) -> _Pipeline:
+        return _Pipeline(self)
+
+    async def ping(self) -> bool:
+        await self._round_trip()
+        return True
+
+    async def xadd(self, key, fields, maxlen=None, approximate=True):
+        await self._round_trip()
+        return self._xadd(key, fields, maxlen, approximate)
+
+    async def xrevrange(self, key, count=None):
+        await self._round_trip()
+        entries = self.streams.get(key, [])[::-1]
+        return entries[:count] if count else entries
+
+    async def get(self, key):
+        await self._round_trip()
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        await self._round_trip()
+        self.values[key] = value
+        return True
+
+    async def expire(self, key, seconds):
+        await self._round_trip()
+        return True
+
+    # Synchronous bodies, shared with the pipeline
+    def _xadd(self, key, fields, maxlen=None, approximate=True) -> str:
+        self._seq += 1
+        entry_id = f"{int(time.time() * 1000)}-{self._seq}"
+        stream = self.streams[key]
+        stream.append((entry_id, dict(fields)))
+        if maxlen is not None and len(stream) > maxlen:
+            del stream[: len(stream) - maxlen]
+        return entry_id
+
+    def _expire(self, key, seconds) -> bool:
+        return True
+
+    def stats(self) -> dict:
+        return {"streams": len(self.streams), "round_trips": self.round_trips}
+
+
+class FakeIntentBatcher:
+    """Keyword intents – for machines without the sentence-transformer weights."""
+
+    KEYWORDS = {
+        "greeting": ("hello", "hi "), "thanks": ("thank",), "card_block": ("block", "freeze", "stolen"),
+        "account_balance": ("balance",), "loan_info": ("loan", "mortgage"),
+        "fraud_report": ("fraud", "scam"), "recent_transactions": ("transaction", "charged"),
+    }
+
+    async def classify(self, text: str, top_n: int | None = None):
+        await asyncio.sleep(0)
+        low = f"{text.lower()} "
+        intent = next((i for i, words in self.KEYWORDS.items() if any(w in low for w in words)),
+                      "loan_info")
+        result = (intent, 0.9)
+        return [result] if top_n else result
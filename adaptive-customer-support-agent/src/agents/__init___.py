@@ -3,6 +3,7 @@ Expose factory helpers so that routing layer can import
 `get_intent_classifier()` etc. without deep paths.
 """
 from .intent_classifier import IntentClassifierAgent, get_intent_classifier
+from .intent_batcher import IntentBatcher, get_intent_batcher
 from .conversation_agent import ConversationAgent
 from .escalation_agent import EscalationAgent
 from .rag_agent import RagAgent
@@ -10,6 +11,8 @@ from .rag_agent import RagAgent
 __all__ = [
     "get_intent_classifier",
     "IntentClassifierAgent",
+    "get_intent_batcher",
+    "IntentBatcher",
     "ConversationAgent",
     "EscalationAgent",
     "RagAgent",
@@ -0,0 +1,206 @@
+"""
+Context assembly between retrieval and drafting.
+• Drops near-duplicate chunks (word-shingle Jaccard)
+• Re-orders the rest with MMR – retrieval rank as relevance, lexical
+  cosine as redundancy – so the budget is not spent on one topic
+• Trims to a token budget counted with tiktoken (gpt-4o encoding)
+• Strips the chunk-splitter overlap between emitted neighbours – only
+  from the lower-ranked chunk, so no text is lost
+• Reports tokens saved per request
+"""
+import logging
+from functools import lru_cache
+import numpy as np
+from langchain.schema import SystemMessage
+from src.core.config import settings
+from src.core.lexical_index import tokenize
+from src.core.tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+CONTEXT_PREFIX = "Context:\n"
+SHINGLE = 3
+MAX_OVERLAP_CHARS = 200         # splitter OVERLAP is 50 – leave headroom
+MIN_OVERLAP_CHARS = 20
+MIN_PARTIAL_TOKENS = 32         # a truncated chunk shorter than this is dropped
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.chunks_dropped = 0
+
+    def record(self, report: dict) -> None:
+        self.requests += 1
+        self.tokens_in += report["tokens_in"]
+        self.tokens_out += report["tokens_out"]
+        self.chunks_dropped += report["chunks_in"] - report["chunks_out"]
+
+    def snapshot(self) -> dict:
+        saved = self.tokens_in - self.tokens_out
+        return {
+            "requests": self.requests,
+            "tokens_saved": saved,
+            "tokens_saved_per_request": saved / self.requests if self.requests else 0.0,
+            "saved_ratio": saved / self.tokens_in if self.tokens_in else 0.0,
+            "chunks_dropped": self.chunks_dropped,
+        }
+
+
+_stats = CompressionStats()
+
+
+def compression_stats() -> dict:
+    return _stats.snapshot()
+
+
+class ContextCompressor:
+    def __init__(
+        self,
+        token_budget: int | None = None,
+        dedup_threshold: float | None = None,
+        mmr_lambda: float | None = None,
+    ) -> None:
+        self.token_budget = token_budget or settings.context_token_budget
+        self.dedup_threshold = (
+            dedup_threshold if dedup_threshold is not None else settings.context_dedup_threshold
+        )
+        self.mmr_lambda = mmr_lambda if mmr_lambda is not None else settings.context_mmr_lambda
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def compress(self, docs: list[SystemMessage]) -> tuple[list[SystemMessage], dict]:
+        """
+        `docs` in retrieval order (best first). Returns the messages to
+        inject and a report {chunks_in, chunks_out, tokens_in, tokens_out, tokens_saved}.
+        """
+        texts = [_body(doc) for doc in docs]
+        tokens_in = sum(count_tokens(doc.content) for doc in docs)
+        keep = self._dedup(texts)
+        order = self._mmr(texts, keep)
+        chosen = _strip_overlaps(self._fit_budget(texts, order))
+        out = [
+            SystemMessage(content=CONTEXT_PREFIX + body, metadata=getattr(docs[i], "metadata", {}))
+            for i, body in chosen.items()
+            if body.strip()             # nothing left after overlap stripping
+        ]
+        tokens_out = sum(count_tokens(m.content) for m in out)
+        report = {
+            "chunks_in": len(docs),
+            "chunks_out": len(out),
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "tokens_saved": tokens_in - tokens_out,
+        }
+        _stats.record(report)
+        logger.debug("Context compressed: %s", report)
+        return out, report
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    def _dedup(self, texts: list[str]) -> list[int]:
+        """Indices to keep – a chunk is dropped if a better-ranked one is near-identical."""
+        shingles = [_shingles(t) for t in texts]
+        keep: list[int] = []
+        for i, current in enumerate(shingles):
+            if any(_jaccard(current, shingles[j]) >= self.dedup_threshold for j in keep):
+                continue
+            keep.append(i)
+        return keep
+
+    def _fit_budget(self, texts: list[str], order: list[int]) -> dict[int, str]:
+        """Bodies emitted in `order` within the token budget (the last may be truncated)."""
+        chosen: dict[int, str] = {}
+        remaining = self.token_budget
+        for i in order:
+            content = CONTEXT_PREFIX + texts[i]
+            cost = count_tokens(content)
+            if cost > remaining:
+                if remaining < MIN_PARTIAL_TOKENS:
+                    break
+                content = truncate_tokens(content, remaining)
+                cost = count_tokens(content)
+            chosen[i] = content.removeprefix(CONTEXT_PREFIX)
+            remaining -= cost
+        return chosen
+
+    def _mmr(self, texts: list[str], keep: list[int]) -> list[int]:
+        if len(keep) <= 1:
+            return keep
+        vectors = _tf_vectors([texts[i] for i in keep])
+        sims = vectors @ vectors.T
+        relevance = 1.0 - np.arange(len(keep)) / len(keep)   # retrieval rank prior
+        selected: list[int] = []
+        candidates = list(range(len(keep)))
+        while candidates:
+            redundancy = [max((sims[c, s] for s in selected), default=0.0) for c in candidates]
+            scores = [self.mmr_lambda * relevance[c] - (1 - self.mmr_lambda) * r
+                      for c, r in zip(candidates, redundancy)]
+            best = candidates.pop(int(np.argmax(scores)))
+            selected.append(best)
+        return [keep[i] for i in selected]
+
+
+@lru_cache
+def get_context_compressor() -> ContextCompressor:
+    return ContextCompressor()
+
+
+def _body(doc: SystemMessage) -> str:
+    return doc.content.removeprefix(CONTEXT_PREFIX)
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) < SHINGLE:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _strip_overlaps(chosen: dict[int, str]) -> dict[int, str]:
+    """
+    Splitter overlap: the end of one emitted chunk repeats the start of
+    another. The repeat is cut from whichever of the pair ranks lower
+    (higher retrieval index); the better-ranked copy stays intact.
+    """
+    head_cut = dict.fromkeys(chosen, 0)
+    tail_cut = dict.fromkeys(chosen, 0)
+    for h, head in chosen.items():
+        for t, tail in chosen.items():
+            size = _overlap(head, tail) if h != t else 0
+            if not size:
+                continue
+            if t > h:
+                head_cut[t] = max(head_cut[t], size)
+            else:
+                tail_cut[h] = max(tail_cut[h], size)
+    stripped = {}
+    for i, text in chosen.items():
+        start, end = head_cut[i], len(text) - tail_cut[i]
+        stripped[i] = text if (start, end) == (0, len(text)) else text[start:max(start, end)].strip()
+    return stripped
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of `head` that is a prefix of `tail`."""
+    for size in range(min(MAX_OVERLAP_CHARS, len(head), len(tail)), MIN_OVERLAP_CHARS - 1, -1):
+        if head.endswith(tail[:size]):
+            return size
+    return 0
+
+
+def _tf_vectors(texts: list[str]) -> np.ndarray:
+    vocab: dict[str, int] = {}
+    rows = [[vocab.setdefault(t, len(vocab)) for t in tokenize(text)] for text in texts]
+    matrix = np.zeros((len(texts), max(1, len(vocab))), dtype=np.float32)
+    for i, row in enumerate(rows):
+        np.add.at(matrix[i], row, 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
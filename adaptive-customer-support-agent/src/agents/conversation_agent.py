@@ -4,33 +4,63 @@ Maintains context, queries RAG agent when needed,
 and triggers escalation if confidence low.
 Built with LangGraph for stateful workflows.
 """
+import asyncio
+import functools
+import hashlib
+import json
 import logging
-from typing import TypedDict, Annotated, List
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, TypedDict, Annotated, List
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
-from src.core.llm_client import chat
+from langchain_core.runnables import RunnableConfig
+from src.core.llm_client import LLMUnavailableError, chat, chat_stream
 from src.core.config import settings
+from src.core.database import get_bulk_writer
+from src.core.metrics import NODE_SECONDS, add_span
+from src.core.response_cache import get_response_cache
 from .rag_agent import RagAgent
+from .context_compressor import get_context_compressor
 from .escalation_agent import EscalationAgent
-from .intent_classifier import get_intent_classifier
+from .intent_batcher import get_intent_batcher
+from .history_manager import get_history_manager
 
 logger = logging.getLogger(__name__)
+CANNED_PATH = Path(__file__).parent.parent / "data" / "canned_responses.json"
+CANNED_RESPONSES: dict[str, str] = json.loads(CANNED_PATH.read_text(encoding="utf-8"))
+# Pure small talk – not worth an embedding call even speculatively
+SMALL_TALK = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|bye|goodbye|good (morning|afternoon|evening))"
+    r"[\s!.,]*(there|so much)?[\s!.]*$",
+    re.IGNORECASE,
+)
+
+
+def _merge_timings(left: dict | None, right: dict | None) -> dict:
+    return {**(left or {}), **(right or {})}
 
 
 class ConvState(TypedDict):
     messages: Annotated[list, add_messages]            # conversation history
     session_id: str
+    intent: str | None
+    confidence: float | None
+    context: list                                      # retrieved SystemMessages
+    context_report: dict | None                        # tokens in / out / saved
+    timings: Annotated[dict, _merge_timings]           # node → milliseconds
     requires_escalation: bool | None
 
 
 class ConversationAgent:
     """
     Composable LangGraph that:
-        1. Classifies user intent
-        2. Retrieves contextual docs via RagAgent
-        3. Generates response
-        4. Decides whether to escalate
+        1. Classifies user intent and retrieves contextual docs (in parallel)
+        2. Answers canned intents directly, otherwise generates a response
+        3. Decides whether to escalate
     """
 
     def __init__(self) -> None:
@@ -46,38 +76,162 @@ class ConversationAgent:
         Entry point for FastAPI / Streamlit channel.
         Returns the AI's reply (string). All state is persisted via memory.
         """
-        state = {
-            "messages": [HumanMessage(content=user_text)],
+        result = await self.run(session_id, user_text)
+        reply: AIMessage = result["messages"][-1]
+        return reply.content
+
+    async def run(self, session_id: str, user_text: str) -> ConvState:
+        """
+        Like `__call__` but returns the final graph state, including
+        `intent`, `requires_escalation` and per-node `timings`.
+        """
+        started = time.perf_counter()
+        result = await self.graph.ainvoke(await self._initial_state(session_id, user_text))
+        _log_timings(result["timings"], (time.perf_counter() - started) * 1000)
+        await _record_turn(session_id, user_text, result)
+        return result
+
+    async def stream(self, session_id: str, user_text: str) -> AsyncIterator[dict]:
+        """
+        Streaming entry point. Yields events while the graph runs:
+            {"event": "token", "data": "<text delta>"}     – from the draft node
+            {"event": "escalation", "data": "<handover message>"}
+            {"event": "done", "data": "<final reply>"}
+        The escalation check still runs on the full drafted text, after
+        the last token has been sent.
+        """
+        sink: asyncio.Queue = asyncio.Queue()
+        initial = await self._initial_state(session_id, user_text)
+        run = asyncio.create_task(self.graph.ainvoke(
+            initial,
+            config={"configurable": {"token_sink": sink}},
+        ))
+        run.add_done_callback(lambda _: sink.put_nowait(None))
+        try:
+            while (token := await sink.get()) is not None:
+                yield {"event": "token", "data": token}
+            result = await run
+        finally:
+            run.cancel()        # no-op when finished; stops work if client left
+        _log_timings(result["timings"], None)
+        await _record_turn(session_id, user_text, result)
+        reply: AIMessage = result["messages"][-1]
+        if result["requires_escalation"]:
+            yield {"event": "escalation", "data": reply.content}
+        yield {"event": "done", "data": reply.content}
+
+    @staticmethod
+    async def _initial_state(session_id: str, user_text: str) -> ConvState:
+        # Rolling summary + recent turns; the summary itself is refreshed
+        # in the background after the reply (see HistoryManager)
+        history = await get_history_manager().load(session_id)
+        return {
+            "messages": [*history, HumanMessage(content=user_text)],
             "session_id": session_id,
+            "intent": None,
+            "confidence": None,
+            "context": [],
+            "context_report": None,
+            "timings": {},
             "requires_escalation": None,
         }
-        result = await self.graph.invoke(state)
-        reply: AIMessage = result["messages"][-1]
-        return reply.content
 
     # ------------------------------------------------------------------ #
     # Internal LangGraph definition
     # ------------------------------------------------------------------ #
     def _build_graph(self):
+        """
+        START ─┬─► intent ───┐
+               └─► retrieve ─┴─► route ─┬─► canned ────────────────────────► END
+                                        └─► assemble ─► draft ─► check ─┬──► END
+                                                                        └─► escalate ─► END
+        Classification and retrieval are independent, so they run in the
+        same super-step; `route` joins them before generation. `assemble`
+        compresses the retrieved context to the prompt token budget.
+        """
         graph_builder = StateGraph(ConvState)
 
-        # Node 1 – Intent classification
+        # Node 1a – Intent classification
+        @_timed("intent")
         async def node_intent(state: ConvState):
-            user_msg: HumanMessage = state["messages"][-1]
-            intent, confidence = get_intent_classifier().classify(user_msg.content)
+            user_msg = _last_human(state["messages"])
+            intent, confidence = await get_intent_batcher().classify(user_msg.content)
             # Append system comment for transparency (not returned to user)
             system_hint = SystemMessage(
                 content=f"[debug] intent={intent} prob={confidence:.2f}"
             )
-            return {"messages": [system_hint]}
+            return {"messages": [system_hint], "intent": intent, "confidence": confidence}
 
         graph_builder.add_node("intent", node_intent)
 
-        # Node 2 – RAG retrieve + draft answer
-        async def node_draft(state: ConvState):
-            user_msg: HumanMessage = state["messages"][-1]
+        # Node 1b – RAG retrieval (speculative, in parallel with intent)
+        @_timed("retrieve")
+        async def node_retrieve(state: ConvState):
+            user_msg = _last_human(state["messages"])
+            if SMALL_TALK.match(user_msg.content):
+                return {"context": []}
             context_docs = await self.rag.retrieve(user_msg.content)
             logger.debug("RAG returned %d docs", len(context_docs))
+            return {"context": context_docs}
+
+        graph_builder.add_node("retrieve", node_retrieve)
+
+        # Join – waits for both branches, routing happens on its out-edge
+        async def node_route(state: ConvState):
+            return {}
+
+        graph_builder.add_node("route", node_route)
+
+        def choose_path(state: ConvState):
+            if (state["intent"] in CANNED_RESPONSES
+                    and (state["confidence"] or 0) >= settings.canned_min_confidence):
+                return "canned"
+            return "draft"
+
+        graph_builder.add_conditional_edges("route", choose_path, {"canned": "canned", "draft": "assemble"})
+
+        # Node 2a – Canned answer, no LLM call
+        @_timed("canned")
+        async def node_canned(state: ConvState, config: RunnableConfig):
+            reply = CANNED_RESPONSES[state["intent"]]
+            sink: asyncio.Queue | None = config.get("configurable", {}).get("token_sink")
+            if sink is not None:
+                sink.put_nowait(reply)
+            return {"messages": [AIMessage(content=reply)]}
+
+        graph_builder.add_node("canned", node_canned)
+
+        # Node 2b – Context assembly: dedup, MMR, token budget
+        @_timed("assemble")
+        async def node_assemble(state: ConvState):
+            context_docs = state.get("context") or []
+            if not settings.context_compression or not context_docs:
+                return {}
+            compressed, report = get_context_compressor().compress(context_docs)
+            return {"context": compressed, "context_report": report}
+
+        graph_builder.add_node("assemble", node_assemble)
+
+        # Node 2c – Draft answer from retrieved context
+        @_timed("draft")
+        async def node_draft(state: ConvState, config: RunnableConfig):
+            sink: asyncio.Queue | None = config.get("configurable", {}).get("token_sink")
+            user_msg = _last_human(state["messages"])
+            context_docs = state.get("context") or []
+
+            # Semantic cache – same intent + same context + similar question,
+            # first turns only (the bucket knows nothing about the session)
+            cache = get_response_cache()
+            intent = state.get("intent")
+            history = _has_history(state["messages"])
+            use_cache = cache is not None and cache.cacheable(intent, history=history)
+            if use_cache:
+                doc_ids = [_doc_id(doc) for doc in context_docs]
+                cached, query_emb = await cache.lookup(user_msg.content, intent, doc_ids)
+                if cached is not None:
+                    if sink is not None:
+                        sink.put_nowait(cached)
+                    return {"messages": [AIMessage(content=cached)]}
 
             # Build prompt with retrieved context
             messages = [
@@ -88,15 +242,39 @@ class ConversationAgent:
                 *context_docs,             # inject as system messages
                 *state["messages"],        # conversation so far
             ]
-            draft_reply = await chat([m.to_dict() for m in messages])
+            started = time.perf_counter()
+            try:
+                if sink is None:
+                    draft_reply = await chat(_to_openai(messages))
+                else:
+                    tokens: list[str] = []
+                    async for token in chat_stream(_to_openai(messages)):
+                        tokens.append(token)
+                        sink.put_nowait(token)
+                    draft_reply = "".join(tokens).strip()
+            except LLMUnavailableError:
+                # Circuit open – hand over to a human instead of waiting on the provider
+                logger.warning("LLM unavailable – escalating session %s", state["session_id"])
+                return {"requires_escalation": True}
+            if use_cache:
+                latency_ms = (time.perf_counter() - started) * 1000
+                await cache.store(query_emb, intent, doc_ids, draft_reply, latency_ms)
             return {"messages": [AIMessage(content=draft_reply)]}
 
         graph_builder.add_node("draft", node_draft)
 
         # Node 3 – Check if escalation needed
+        @_timed("check")
         async def node_escalate(state: ConvState):
+            if state["requires_escalation"]:
+                return {}               # already decided upstream (LLM unavailable)
             last_ai: AIMessage = state["messages"][-1]
-            requires = await self.escalator.requires_escalation(last_ai.content)
+            requires = await self.escalator.requires_escalation(
+                last_ai.content,
+                user_message=_last_human(state["messages"]).content,
+                intent=state["intent"],
+                confidence=state["confidence"],
+            )
             return {"requires_escalation": requires}
 
         graph_builder.add_node("check", node_escalate)
@@ -105,11 +283,12 @@ class ConversationAgent:
         def decide(state: ConvState):                  # sync fn allowed
             return "escalate" if state["requires_escalation"] else END
 
-        graph_builder.add_conditional_edge("check", decide, {"escalate": "escalate"})
+        graph_builder.add_conditional_edges("check", decide, {"escalate": "escalate", END: END})
 
         # Node 4 – Escalation
+        @_timed("escalate")
         async def node_escalate_flow(state: ConvState):
-            user_msg: HumanMessage = state["messages"][-2]   # last human
+            user_msg = _last_human(state["messages"])
             ticket_id = await self.escalator.create_ticket(
                 session_id=state["session_id"], user_message=user_msg.content
             )
@@ -122,10 +301,77 @@ class ConversationAgent:
 
         graph_builder.add_node("escalate", node_escalate_flow)
 
-        # Wire edges
+        # Wire edges – fan out, join, then generate
         graph_builder.add_edge(START, "intent")
-        graph_builder.add_edge("intent", "draft")
+        graph_builder.add_edge(START, "retrieve")
+        graph_builder.add_edge(["intent", "retrieve"], "route")
+        graph_builder.add_edge("canned", END)
+        graph_builder.add_edge("assemble", "draft")
         graph_builder.add_edge("draft", "check")
-        graph_builder.set_entry_point(START)
+        graph_builder.add_edge("escalate", END)
 
         return graph_builder.compile()
+
+
+def _timed(name: str):
+    """
+    Record the wrapped node's wall time (ms) under `timings[name]`, in the
+    node latency histogram and as a request span.
+    """
+    histogram = NODE_SECONDS.labels(name)
+
+    def decorator(node):
+        @functools.wraps(node)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            update = await node(*args, **kwargs)
+            elapsed = (time.perf_counter() - started) * 1000
+            histogram.observe(elapsed / 1000)
+            add_span(name, elapsed)
+            return {**update, "timings": {name: round(elapsed, 2)}}
+        return wrapper
+    return decorator
+
+
+def _log_timings(timings: dict, total_ms: float | None) -> None:
+    # intent ∥ retrieve → the critical path pays only the slower branch
+    parallel = [timings.get("intent", 0.0), timings.get("retrieve", 0.0)]
+    rest = sum(v for k, v in timings.items() if k not in ("intent", "retrieve"))
+    logger.info(
+        "Graph timings %s | critical_path=%.1fms serial=%.1fms saved=%.1fms%s",
+        timings, max(parallel) + rest, sum(parallel) + rest, min(parallel),
+        f" total={total_ms:.1f}ms" if total_ms is not None else "",
+    )
+
+
+async def _record_turn(session_id: str, user_text: str, result: ConvState) -> None:
+    # One document per turn in `conversations`, written behind the reply
+    await get_bulk_writer().put("conversations", {
+        "session_id": session_id,
+        "user_message": user_text,
+        "reply": result["messages"][-1].content,
+        "intent": result["intent"],
+        "confidence": result["confidence"],
+        "escalated": bool(result["requires_escalation"]),
+        "timings": result["timings"],
+        "created_at": datetime.utcnow(),
+    })
+
+
+def _last_human(messages: list) -> HumanMessage:
+    # Debug / context SystemMessages may follow the user's turn
+    return next(m for m in reversed(messages) if isinstance(m, HumanMessage))
+
+
+def _has_history(messages: list) -> bool:
+    # Earlier turns or the rolling summary precede the user's current turn
+    return messages[0] is not _last_human(messages)
+
+
+def _to_openai(messages: list) -> list[dict]:
+    roles = {"human": "user", "ai": "assistant", "system": "system"}
+    return [{"role": roles.get(m.type, m.type), "content": m.content} for m in messages]
+
+
+def _doc_id(doc: SystemMessage) -> str:
+    return hashlib.sha1(doc.content.encode("utf-8")).hexdigest()[:16]
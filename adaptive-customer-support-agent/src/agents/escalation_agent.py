@@ -1,60 +1,64 @@
 """
 Lightweight rule-based escalation logic.
+Triggers are data, not code – see `escalation_rules` and
+data/escalation_rules.json.
 
 You can replace this with:
     • GPT classifier
     • LangChain RouterChain
     • ML model fine-tuned on escalation labels
 """
+import asyncio
 import logging
 import uuid
 from datetime import datetime
-from src.core.database import db
-import re
+from src.core.database import get_bulk_writer
+from .escalation_rules import get_escalation_rules
 
 logger = logging.getLogger(__name__)
 
-# Example triggers – extend as needed
-REGEX_PATTERNS: list[str] = [
-    r"\bcomplain\b",
-    r"\bfraud\b",
-    r"\bscam\b",
-    r"\bunauthori[sz]ed\b",
-]
-
 
 class EscalationAgent:
-    async def requires_escalation(self, reply: str) -> bool:
+    async def requires_escalation(
+        self,
+        reply: str,
+        user_message: str | None = None,
+        intent: str | None = None,
+        confidence: float | None = None,
+    ) -> bool:
         """
-        Very simple heuristic:
-            • look for apology + lack of confident resolution
-            • regex patterns indicating serious issues
+        True when any escalation rule matches, e.g.:
+            • the reply lacks a confident resolution
+            • keywords / patterns indicating serious issues
+            • a high-confidence fraud intent
         """
-        low_confidence = "I’m not sure" in reply or "I am not able" in reply
-        pattern_flag = any(re.search(r, reply, re.IGNORECASE) for r in REGEX_PATTERNS)
-        return low_confidence or pattern_flag
+        matched = get_escalation_rules().evaluate(reply, user_message, intent, confidence)
+        if matched:
+            logger.info("Escalation rules matched: %s", matched)
+        return bool(matched)
+
+    async def evaluate_many(self, records: list[dict]) -> list[list[str]]:
+        """Matching rule ids per stored turn (`conversations` documents)."""
+        return await asyncio.to_thread(get_escalation_rules().evaluate_many, records)
 
     async def create_ticket(self, session_id: str, user_message: str) -> str:
         """
-        Stores escalation ticket into MongoDB and returns a ticket ID.
+        Queues an escalation ticket for MongoDB and returns its ticket ID
+        right away – the write-behind buffer batches the insert.
         """
-        import uuid
-        from datetime import datetime
-
         ticket_id = f"TCK-{uuid.uuid4().hex[:8].upper()}"
+        now = datetime.utcnow()
 
         ticket_doc = {
             "ticket_id": ticket_id,
             "session_id": session_id,
             "user_message": user_message,
             "status": "open",
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
+            "created_at": now,
+            "updated_at": now,
             # Add more fields as needed (e.g., 'intent', 'escalation_reason', etc.)
         }
 
-        # Save the ticket to the MongoDB collection 'tickets'
-        result = await db.tickets.insert_one(ticket_doc)
-        # Optionally, check result.inserted_id for success
-
+        # Buffered for the 'tickets' collection; waits only if the buffer is full
+        await get_bulk_writer().put("tickets", ticket_doc)
         return ticket_id
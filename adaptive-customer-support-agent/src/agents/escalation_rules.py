@@ -0,0 +1,281 @@
+"""
+Compiled escalation rules.
+• Rules live in a versioned JSON file (data/escalation_rules.json) and are
+  hot-reloaded when the file changes – no restart
+• All keywords of a field compile into ONE trie-shaped regex (shared
+  prefixes are matched once, so cost grows with text length, not rule
+  count). It reports the longest keyword at each word start; keywords
+  nested inside it ("fraud" in "fraud alert") are credited from a table
+  built at compile time. Regex rules are precompiled and searched one by one – Python's
+  `re` gains nothing from joining arbitrary patterns into an alternation
+• Rules may also test the classifier's intent / confidence
+• `evaluate_many` re-scores stored transcripts in bulk
+
+Rule format – every condition present must hold:
+    {"id": "...", "on": "reply" | "user",          # text the rule reads
+     "keywords": [...] | "regex": "...",           # optional text condition
+     "intents": [...], "min_confidence": 0.6, "max_confidence": 0.2,
+     "enabled": true}
+"""
+import json
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+FIELDS = ("reply", "user")
+RULE_KEYS = {"id", "on", "keywords", "regex", "intents", "min_confidence", "max_confidence",
+             "enabled", "description"}
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'"})
+_SPACE = re.compile(r"\s+")
+
+
+def normalise(text: str) -> str:
+    """Keyword matching is case-, apostrophe- and whitespace-insensitive."""
+    return _SPACE.sub(" ", text.translate(_APOSTROPHES).lower()).strip()
+
+
+class _Rule:
+    __slots__ = ("id", "on", "intents", "min_confidence", "max_confidence", "has_text")
+
+    def __init__(self, spec: dict) -> None:
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"Rule {spec.get('id')!r}: unknown keys {sorted(unknown)}")
+        self.id = spec["id"]
+        self.on = spec.get("on", "reply")
+        if self.on not in FIELDS:
+            raise ValueError(f"Rule {self.id!r}: 'on' must be one of {FIELDS}")
+        intents = spec.get("intents")
+        self.intents = frozenset(intents) if intents else None
+        self.min_confidence = spec.get("min_confidence")
+        self.max_confidence = spec.get("max_confidence")
+        self.has_text = bool(spec.get("keywords") or spec.get("regex"))
+        if not self.has_text and self.intents is None and self.min_confidence is None \
+                and self.max_confidence is None:
+            raise ValueError(f"Rule {self.id!r} has no condition")
+
+    def accepts(self, intent: str | None, confidence: float | None) -> bool:
+        if self.intents is not None and intent not in self.intents:
+            return False
+        if self.min_confidence is not None and (confidence is None or confidence < self.min_confidence):
+            return False
+        if self.max_confidence is not None and (confidence is None or confidence > self.max_confidence):
+            return False
+        return True
+
+
+class _FieldMatcher:
+    """Text conditions of all rules reading one field."""
+
+    def __init__(self) -> None:
+        self.keyword_rules: dict[str, list[int]] = {}
+        self.regex_rules: list[tuple[re.Pattern, int]] = []
+        self.keyword_re: re.Pattern | None = None
+        self._nested: dict[str, set[int]] = {}     # keyword → rules of it + keywords inside it
+
+    def add(self, index: int, spec: dict) -> None:
+        for keyword in spec.get("keywords") or ():
+            if not keyword.strip():
+                continue
+            self.keyword_rules.setdefault(normalise(keyword), []).append(index)
+        if spec.get("regex"):
+            self.regex_rules.append((re.compile(spec["regex"], re.IGNORECASE), index))
+
+    def compile(self) -> None:
+        if not self.keyword_rules:
+            return
+        # Keywords are whole words / phrases; the trie backtracks to a
+        # shorter keyword when a longer one fails the boundary check. The
+        # lookahead consumes nothing, so matches may overlap ("fraud alert"
+        # and "alert now" in "fraud alert now").
+        trie = _build_trie(self.keyword_rules)
+        self.keyword_re = re.compile(rf"(?<!\w)(?=({_node_pattern(trie)})(?!\w))")
+        for keyword in self.keyword_rules:
+            self._nested[keyword] = {
+                index for inner in _keywords_in(trie, keyword) for index in self.keyword_rules[inner]
+            }
+
+    def hits(self, text: str) -> set[int]:
+        found: set[int] = set()
+        if self.keyword_re is not None:
+            for match in self.keyword_re.finditer(normalise(text)):
+                found.update(self._nested[match.group(1)])
+        found.update(index for pattern, index in self.regex_rules if pattern.search(text))
+        return found
+
+
+class RuleSet:
+    """Immutable, compiled set of rules – swapped as a whole on reload."""
+
+    def __init__(self, version: int | str, rules: list[dict]) -> None:
+        self.version = version
+        self.rules: list[_Rule] = []
+        self._fields = {field: _FieldMatcher() for field in FIELDS}
+        self._metadata_only: list[int] = []         # intent / confidence conditions only
+        for spec in rules:
+            if not spec.get("enabled", True):
+                continue
+            rule = _Rule(spec)
+            index = len(self.rules)
+            self.rules.append(rule)
+            if rule.has_text:
+                self._fields[rule.on].add(index, spec)
+            else:
+                self._metadata_only.append(index)
+        for matcher in self._fields.values():
+            matcher.compile()
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RuleSet":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data.get("version", 0), data["rules"])
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def evaluate(
+        self,
+        reply: str,
+        user_message: str | None = None,
+        intent: str | None = None,
+        confidence: float | None = None,
+    ) -> list[str]:
+        """Ids of the matching rules, in file order (empty → no escalation)."""
+        candidates = self._fields["reply"].hits(reply)
+        if user_message:
+            candidates |= self._fields["user"].hits(user_message)
+        candidates.update(self._metadata_only)
+        return [self.rules[i].id for i in sorted(candidates)
+                if self.rules[i].accepts(intent, confidence)]
+
+    def evaluate_many(self, records: Iterable[dict]) -> list[list[str]]:
+        """
+        Bulk re-scoring. `records` use the `conversations` document keys:
+        reply, user_message, intent, confidence. Repeated texts (canned
+        replies, common questions) are matched once per batch.
+        """
+        memo: dict[tuple[str, str], frozenset[int]] = {}
+
+        def hits(field: str, text: str | None) -> frozenset[int]:
+            if not text:
+                return frozenset()
+            key = (field, text)
+            if key not in memo:
+                memo[key] = frozenset(self._fields[field].hits(text))
+            return memo[key]
+
+        results = []
+        for record in records:
+            candidates = hits("reply", record.get("reply") or "") | hits("user", record.get("user_message"))
+            candidates = candidates.union(self._metadata_only)
+            intent, confidence = record.get("intent"), record.get("confidence")
+            results.append([self.rules[i].id for i in sorted(candidates)
+                            if self.rules[i].accepts(intent, confidence)])
+        return results
+
+
+class EscalationRules:
+    """File-backed RuleSet; re-reads the file at most every `reload_s` when it changed."""
+
+    def __init__(self, path: str | Path, reload_s: float) -> None:
+        self.path = Path(path)
+        self.reload_s = reload_s
+        self._signature = self._stat()
+        self._ruleset = RuleSet.from_file(self.path)
+        self._checked = time.monotonic()
+        self.reloads = 0
+        logger.info("Loaded %d escalation rules (version %s)", len(self._ruleset), self._ruleset.version)
+
+    @property
+    def ruleset(self) -> RuleSet:
+        now = time.monotonic()
+        if now - self._checked >= self.reload_s:
+            self._checked = now
+            self._maybe_reload()
+        return self._ruleset
+
+    def evaluate(self, reply: str, user_message: str | None = None,
+                 intent: str | None = None, confidence: float | None = None) -> list[str]:
+        return self.ruleset.evaluate(reply, user_message, intent, confidence)
+
+    def evaluate_many(self, records: Iterable[dict]) -> list[list[str]]:
+        return self.ruleset.evaluate_many(records)
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _maybe_reload(self) -> None:
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return
+        self._signature = signature             # a broken file is not re-parsed until it changes
+        try:
+            ruleset = RuleSet.from_file(self.path)
+        except Exception:  # noqa: BLE001 – keep serving the previous rules
+            logger.exception("Invalid escalation rules in %s – keeping version %s",
+                             self.path, self._ruleset.version)
+            return
+        self._ruleset = ruleset
+        self.reloads += 1
+        logger.info("Reloaded %d escalation rules (version %s)", len(ruleset), ruleset.version)
+
+
+@lru_cache
+def get_escalation_rules() -> EscalationRules:
+    return EscalationRules(settings.escalation_rules_path, settings.escalation_rules_reload_s)
+
+
+def _build_trie(words: Iterable[str]) -> dict:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return trie
+
+
+def _keywords_in(trie: dict, text: str) -> set[str]:
+    """Every keyword occurring in `text` as whole words (the text's ends count as boundaries)."""
+    found = set()
+    for start in range(len(text)):
+        if start and _is_word(text[start - 1]):
+            continue
+        node = trie
+        for end in range(start, len(text)):
+            node = node.get(text[end])
+            if node is None:
+                break
+            if "" in node and (end + 1 == len(text) or not _is_word(text[end + 1])):
+                found.add(text[start:end + 1])
+    return found
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"      # same as regex \w
+
+
+def _node_pattern(node: dict) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:                  # a keyword ends here – longer ones are optional
+        return f"(?:{body})?"
+    return body
@@ -0,0 +1,112 @@
+"""
+Conversation history for the prompt, with a rolling summary.
+• Loads recent turns via `get_history_entries`
+• Keeps the newest HISTORY_KEEP_MESSAGES verbatim; older turns are folded
+  into a per-session summary that is updated incrementally
+• Summarisation runs as a background task after the reply was sent –
+  never on the request path. Until it lands, unfolded messages are sent
+  verbatim (bounded by `max_history_messages`)
+"""
+import asyncio
+import logging
+from functools import lru_cache
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from src.core.config import settings
+from src.core.llm_client import chat
+from src.core.memory import entry_order, get_history_entries, get_summary, set_summary
+from src.core.tokens import truncate_tokens
+
+logger = logging.getLogger(__name__)
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a banking support conversation. "
+    "Merge the new messages into the existing summary. Keep facts the agent "
+    "may need later (customer goals, products, amounts, dates, decisions, open "
+    "issues); drop greetings and small talk. Write at most {words} words in "
+    "plain prose."
+)
+
+
+class HistoryManager:
+    def __init__(self) -> None:
+        self._running: dict[str, asyncio.Task] = {}
+        self.summaries_written = 0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def load(self, session_id: str) -> list:
+        """Summary (if any) + the messages it does not cover, oldest first."""
+        entries, summary = await asyncio.gather(
+            get_history_entries(session_id, limit=settings.max_history_messages),
+            get_summary(session_id),
+        )
+        if summary:
+            folded = entry_order(summary["last_id"])
+            entries = [(i, m) for i, m in entries if entry_order(i) > folded]
+        messages = [_to_message(m) for _, m in entries]
+        if summary:
+            messages.insert(0, SystemMessage(
+                content=f"Summary of the earlier conversation:\n{summary['text']}"
+            ))
+        return messages
+
+    def schedule_update(self, session_id: str) -> None:
+        """Fire-and-forget: fold old turns once the reply is out."""
+        if session_id in self._running:
+            return          # the running task will see the new turn next time
+        task = asyncio.create_task(self._update(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    async def drain(self) -> None:
+        """Wait for in-flight summaries (shutdown, tests)."""
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    async def _update(self, session_id: str) -> None:
+        try:
+            entries, summary = await asyncio.gather(
+                get_history_entries(session_id, limit=settings.session_max_messages),
+                get_summary(session_id),
+            )
+            if summary:
+                folded = entry_order(summary["last_id"])
+                entries = [(i, m) for i, m in entries if entry_order(i) > folded]
+            to_fold = entries[: max(0, len(entries) - settings.history_keep_messages)]
+            if len(to_fold) < settings.summary_batch_messages:
+                return      # fold in batches – one LLM call per few turns
+            text = await self._summarise(summary["text"] if summary else "", [m for _, m in to_fold])
+            await set_summary(session_id, text, last_id=to_fold[-1][0])
+            self.summaries_written += 1
+            logger.debug("Folded %d messages into summary for %s", len(to_fold), session_id)
+        except Exception:  # noqa: BLE001 – history stays verbatim, retried next turn
+            logger.exception("Summarising session %s failed", session_id)
+
+    @staticmethod
+    async def _summarise(previous: str, messages: list[dict]) -> str:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        words = settings.summary_max_tokens * 3 // 4
+        reply = await chat([
+            {"role": "system", "content": SUMMARY_PROMPT.format(words=words)},
+            {"role": "user", "content": (
+                f"Existing summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+            )},
+        ])
+        # Hard cap – the summary is re-sent with every prompt
+        return truncate_tokens(reply.strip(), settings.summary_max_tokens)
+
+
+@lru_cache
+def get_history_manager() -> HistoryManager:
+    return HistoryManager()
+
+
+def _to_message(message: dict):
+    if message["role"] == "assistant":
+        return AIMessage(content=message["content"])
+    if message["role"] == "system":
+        return SystemMessage(content=message["content"])
+    return HumanMessage(content=message["content"])
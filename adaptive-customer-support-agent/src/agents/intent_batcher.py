@@ -0,0 +1,104 @@
+"""
+Async micro-batcher in front of IntentClassifierAgent.
+Concurrent `classify()` calls are collected for a short window (or until
+the batch is full) and encoded with a single forward pass, so N chats
+arriving together cost one `encode()` instead of N batch-size-1 calls.
+Batches run on the bounded classifier executor, never on the event loop.
+"""
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from src.core.config import settings
+from src.core.executor import get_classifier_executor
+from .intent_classifier import classify_batch
+
+logger = logging.getLogger(__name__)
+
+
+class IntentBatcher:
+    def __init__(self, max_batch_size: int, window_ms: float) -> None:
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def classify(self, text: str, top_n: int | None = None):
+        """
+        Queue a single sentence and wait for its (intent, confidence),
+        or its top-N candidates when `top_n` is given.
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, top_n, future))
+        return await future
+
+    async def classify_many(self, texts: list[str], top_n: int | None = None) -> list:
+        """
+        Classify an explicit batch. Already batched, so it skips the queue.
+        """
+        return await get_classifier_executor().run(classify_batch, list(texts), top_n)
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    # ------------------------------------------------------------------ #
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        # Queues are bound to a loop – recreate if called from a new one
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain(self._queue))
+        return self._queue  # type: ignore[return-value]
+
+    async def _drain(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers may have been cancelled while waiting in the queue
+            batch = [item for item in batch if not item[-1].done()]
+            if batch:
+                # Dispatch without waiting so the next batch can form while
+                # this one runs; the executor bounds actual concurrency.
+                task = asyncio.create_task(self._dispatch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, int | None, asyncio.Future]]) -> None:
+        # One search at the widest top-N requested; each caller gets a slice
+        widest = max(top_n or 1 for _, top_n, _ in batch)
+        logger.debug("Classifying batch of %d sentences", len(batch))
+        try:
+            results = await get_classifier_executor().run(
+                classify_batch, [text for text, _, _ in batch], widest
+            )
+        except Exception as exc:  # noqa: BLE001
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, top_n, fut), candidates in zip(batch, results):
+            if not fut.done():
+                fut.set_result(candidates[:top_n] if top_n else candidates[0])
+
+
+@lru_cache
+def get_intent_batcher() -> IntentBatcher:
+    return IntentBatcher(
+        max_batch_size=settings.intent_batch_max_size,
+        window_ms=settings.intent_batch_window_ms,
+    )
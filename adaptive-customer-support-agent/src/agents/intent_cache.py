@@ -0,0 +1,141 @@
+"""
+Persistent cache for the intent example embedding matrix.
+• Artifact keyed by hash(cache version + model + intents file)
+• Loaded with `np.load(mmap_mode="r")` → near-zero cold start
+• On a miss, rows for unchanged sentences are reused from older
+  artifacts of the same model; only new / edited examples are encoded
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Callable
+import numpy as np
+
+logger = logging.getLogger(__name__)
+CACHE_VERSION = 1      # bump when the embedding recipe changes (pooling, normalisation, ...)
+KEEP_ARTIFACTS = 3     # per model – older generations are pruned
+
+
+class IntentEmbeddingCache:
+    def __init__(self, cache_dir: str | Path, model_key: str) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.model_key = model_key
+        self.slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_key)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def has(self, source: Path, rows: int) -> bool:
+        """True when `load_or_build` would load from disk without encoding."""
+        matrix_path, manifest_path = self._paths(self._artifact_key(source))
+        if not (manifest_path.exists() and matrix_path.exists()):
+            return False
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        return manifest.get("rows") == rows
+
+    def load_or_build(
+        self,
+        source: Path,
+        examples: list[str],
+        encode: Callable[[list[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Return the (n_examples, dim) embedding matrix for `examples`,
+        encoding only sentences not present in any cached artifact.
+        """
+        key = self._artifact_key(source)
+        matrix_path, manifest_path = self._paths(key)
+        if manifest_path.exists() and matrix_path.exists():
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("rows") == len(examples):
+                logger.info("Intent embeddings loaded from cache (%s)", matrix_path.name)
+                return np.load(matrix_path, mmap_mode="r")
+
+        hashes = [_sentence_hash(s) for s in examples]
+        known = self._known_rows()
+        missing = [i for i, h in enumerate(hashes) if h not in known]
+        logger.info("Intent embedding cache miss → encoding %d of %d examples",
+                    len(missing), len(examples))
+
+        fresh = encode([examples[i] for i in missing]) if missing else None
+        dim = fresh.shape[1] if fresh is not None else next(iter(known.values())).shape[0]
+        matrix = np.empty((len(examples), dim), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if h in known:
+                matrix[i] = known[h]
+        if fresh is not None:
+            matrix[missing] = fresh
+
+        self._write(key, matrix, hashes)
+        self._prune(keep=key)
+        return np.load(matrix_path, mmap_mode="r")
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    # ------------------------------------------------------------------ #
+    def _artifact_key(self, source: Path) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_VERSION}:{self.model_key}:".encode())
+        digest.update(source.read_bytes())
+        return digest.hexdigest()[:16]
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        stem = self.cache_dir / f"{self.slug}-{key}"
+        return Path(f"{stem}.npy"), Path(f"{stem}.json")
+
+    def _manifests(self) -> list[Path]:
+        if not self.cache_dir.exists():
+            return []
+        manifests = self.cache_dir.glob(f"{self.slug}-*.json")
+        return sorted(manifests, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def _known_rows(self) -> dict[str, np.ndarray]:
+        """sentence hash → embedding row, gathered from older artifacts."""
+        known: dict[str, np.ndarray] = {}
+        for manifest_path in self._manifests():
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+                if (manifest.get("version") != CACHE_VERSION
+                        or manifest.get("model") != self.model_key):
+                    continue
+                matrix = np.load(manifest_path.with_suffix(".npy"), mmap_mode="r")
+            except (OSError, ValueError) as exc:
+                logger.warning("Skipping unreadable cache artifact %s (%s)",
+                               manifest_path.name, exc)
+                continue
+            for row, h in enumerate(manifest["hashes"]):
+                known.setdefault(h, matrix[row])
+        return known
+
+    def _write(self, key: str, matrix: np.ndarray, hashes: list[str]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        matrix_path, manifest_path = self._paths(key)
+        # Write to temp files and rename so concurrent workers never see
+        # a half-written artifact; the manifest is written last.
+        tmp_matrix = Path(f"{matrix_path}.{os.getpid()}.tmp.npy")
+        np.save(tmp_matrix, matrix)
+        os.replace(tmp_matrix, matrix_path)
+        manifest = {
+            "version": CACHE_VERSION,
+            "model": self.model_key,
+            "rows": len(hashes),
+            "dim": int(matrix.shape[1]),
+            "hashes": hashes,
+        }
+        tmp_manifest = Path(f"{manifest_path}.{os.getpid()}.tmp")
+        tmp_manifest.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_manifest, manifest_path)
+
+    def _prune(self, keep: str) -> None:
+        for manifest_path in self._manifests()[KEEP_ARTIFACTS:]:
+            if manifest_path.stem.endswith(keep):
+                continue
+            for path in (manifest_path, manifest_path.with_suffix(".npy")):
+                path.unlink(missing_ok=True)
+
+
+def _sentence_hash(sentence: str) -> str:
+    return hashlib.sha1(sentence.encode("utf-8")).hexdigest()
@@ -1,13 +1,16 @@
 """
 BERT-style semantic intent classifier using sentence-transformers.
 Loaded once and cached. If embeddings not suitable, swap to openai.
+Encoder backend is pluggable: PyTorch (default) or int8 ONNX Runtime.
 """
 import json
 import logging
 from pathlib import Path
 from functools import lru_cache
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from src.core.config import settings
+from .intent_cache import IntentEmbeddingCache
+from .intent_index import build_intent_index
 
 logger = logging.getLogger(__name__)
 MODEL_NAME = "sentence-transformers/paraphrase-MiniLM-L6-v2"
@@ -16,20 +19,45 @@ INTENTS_PATH = Path(__file__).parent.parent / "data" / "banking_intents.json"
 
 class IntentClassifierAgent:
     def __init__(self) -> None:
-        self.model = SentenceTransformer(MODEL_NAME)
+        self.backend = settings.intent_backend.lower()
+        self.model = load_encoder(self.backend)
         self.intents, self.examples, self.embeddings = self._load_intents()
+        self.index = build_intent_index(
+            settings.intent_index, self.intents, self.embeddings, k=settings.intent_knn_k
+        )
 
     # --------------------------------------------------------------------- #
     # Public API
     # --------------------------------------------------------------------- #
-    def classify(self, text: str) -> tuple[str, float]:
+    def classify(self, text: str, top_n: int | None = None):
         """
         Returns (intent: str, confidence: 0-1).
+        With `top_n`, returns the N best [(intent, score), ...] instead.
         """
-        query_emb = self.model.encode(text, normalize_embeddings=True)
-        sims = util.cos_sim(query_emb, self.embeddings)[0]
-        best_idx = int(np.argmax(sims))
-        return self.intents[best_idx], float(sims[best_idx])
+        return self.classify_many([text], top_n=top_n)[0]
+
+    def classify_many(self, texts: list[str], top_n: int | None = None) -> list:
+        """
+        Batched variant of `classify` – encodes all texts in one forward
+        pass and returns one result (same shape as `classify`) per input.
+        """
+        if not texts:
+            return []
+        query_embs = self.model.encode(
+            texts, batch_size=len(texts), normalize_embeddings=True
+        )
+        ranked = self.index.search(np.asarray(query_embs, dtype=np.float32), top_n or 1)
+        return ranked if top_n else [candidates[0] for candidates in ranked]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        L2-normalised sentence embeddings from the classifier's encoder,
+        for callers that need semantic similarity (e.g. response cache).
+        """
+        return np.asarray(
+            self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True),
+            dtype=np.float32,
+        )
 
     # --------------------------------------------------------------------- #
     # Private helpers
@@ -43,12 +71,72 @@ class IntentClassifierAgent:
             for sentence in samples:
                 intents.append(intent)
                 examples.append(sentence)
-        embeddings = self.model.encode(examples, normalize_embeddings=True)
+        cache = IntentEmbeddingCache(settings.intent_cache_dir, model_key=encoder_key(self.backend))
+        embeddings = cache.load_or_build(
+            INTENTS_PATH,
+            examples,
+            encode=lambda texts: self.model.encode(texts, normalize_embeddings=True),
+        )
         logger.info("Loaded %d labelled sentences (%d unique intents)",
                     len(examples), len(set(intents)))
         return intents, examples, embeddings
 
 
+def encoder_key(backend: str) -> str:
+    # Backends produce slightly different vectors → separate cache keys
+    return MODEL_NAME if backend == "torch" else f"{MODEL_NAME}@{backend}"
+
+
+def intent_cache_ready() -> bool:
+    """True when the classifier can start without running the encoder."""
+    with open(INTENTS_PATH, encoding="utf-8") as f:
+        rows = sum(len(samples) for samples in json.load(f).values())
+    cache = IntentEmbeddingCache(
+        settings.intent_cache_dir, model_key=encoder_key(settings.intent_backend.lower())
+    )
+    return cache.has(INTENTS_PATH, rows)
+
+
+def load_encoder(backend: str, num_threads: int | None = None):
+    """
+    Returns an object exposing `encode(texts, batch_size, normalize_embeddings)`.
+    Imports are local so the ONNX path never pulls in torch.
+    `num_threads` sizes the ONNX session (default ONNX_NUM_THREADS).
+    """
+    if backend == "onnx":
+        from .onnx_encoder import INT8_FILE, OnnxSentenceEncoder
+
+        model_dir = Path(settings.onnx_model_dir)
+        if not (model_dir / INT8_FILE).exists():
+            # Exporting needs torch and must not race between workers –
+            # it is a build step, never done while serving
+            raise FileNotFoundError(
+                f"No int8 ONNX model in {model_dir} – run "
+                f"`python -m src.agents.onnx_encoder --out {model_dir}` first"
+            )
+        if num_threads is None:
+            num_threads = settings.onnx_num_threads
+        return OnnxSentenceEncoder(model_dir, quantized=True, num_threads=num_threads)
+    if backend != "torch":
+        raise ValueError(f"Unknown intent backend '{backend}' – choose torch or onnx")
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MODEL_NAME)
+
+
 @lru_cache
 def get_intent_classifier() -> IntentClassifierAgent:
     return IntentClassifierAgent()
+
+
+def classify_batch(texts: list[str], top_n: int | None = None) -> list:
+    """
+    Module-level entry point so the classifier can run in a process pool
+    (each worker process loads its own cached model on first use).
+    """
+    return get_intent_classifier().classify_many(texts, top_n=top_n)
+
+
+def embed_batch(texts: list[str]) -> np.ndarray:
+    # Picklable counterpart of `classify_batch` for the process pool
+    return get_intent_classifier().embed(texts)
@@ -0,0 +1,139 @@
+"""
+Pluggable nearest-intent search over the labelled example embeddings.
+All indexes expect L2-normalised vectors (dot product == cosine) and
+return, per query, the top-N (intent, score) pairs sorted by score.
+
+    exhaustive – best example per intent, brute force (original behaviour)
+    centroid   – one normalised prototype per intent; cost ∝ #intents
+    knn        – top-k example neighbours vote, score summed per intent
+    faiss      – knn voting on a FAISS HNSW graph for very large catalogs
+"""
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IntentIndex(ABC):
+    def __init__(self, intents: list[str], embeddings: np.ndarray) -> None:
+        self.labels = sorted(set(intents))
+        label_ids = {label: i for i, label in enumerate(self.labels)}
+        self.example_labels = np.array([label_ids[i] for i in intents], dtype=np.int64)
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, top_n: int = 1) -> list[list[tuple[str, float]]]:
+        """Top-N (intent, score) pairs per query row, best first."""
+
+    def _top_intents(self, scores: np.ndarray, top_n: int) -> list[list[tuple[str, float]]]:
+        """scores: (n_queries, n_labels) → top-N (label, score) per row."""
+        top_n = min(top_n, scores.shape[1])
+        order = np.argsort(-scores, axis=1)[:, :top_n]
+        return [
+            [(self.labels[j], float(scores[row, j])) for j in cols]
+            for row, cols in enumerate(order.tolist())
+        ]
+
+
+class ExhaustiveIndex(IntentIndex):
+    def __init__(self, intents: list[str], embeddings: np.ndarray) -> None:
+        super().__init__(intents, embeddings)
+        # A per-intent max is one reduceat call over runs of equal labels.
+        # Examples are usually grouped by intent already – then the (mmap'd)
+        # matrix is used as is and stays shared between workers.
+        labels = self.example_labels
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        if len(starts) == len(self.labels):
+            self._embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        else:
+            order = np.argsort(labels, kind="stable")
+            self._embeddings = np.ascontiguousarray(embeddings[order], dtype=np.float32)
+            labels = labels[order]
+            starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        self._starts = starts
+        self._run_labels = labels[starts]        # reduceat column → label id
+
+    def search(self, queries, top_n=1):
+        sims = queries @ self._embeddings.T
+        per_intent = np.empty((sims.shape[0], len(self.labels)), dtype=sims.dtype)
+        per_intent[:, self._run_labels] = np.maximum.reduceat(sims, self._starts, axis=1)
+        return self._top_intents(per_intent, top_n)
+
+
+class CentroidIndex(IntentIndex):
+    def __init__(self, intents: list[str], embeddings: np.ndarray) -> None:
+        super().__init__(intents, embeddings)
+        dim = embeddings.shape[1]
+        sums = np.zeros((len(self.labels), dim), dtype=np.float32)
+        np.add.at(sums, self.example_labels, np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        self._centroids = sums / np.clip(norms, 1e-12, None)
+
+    def search(self, queries, top_n=1):
+        return self._top_intents(queries @ self._centroids.T, top_n)
+
+
+class KnnVoteIndex(IntentIndex):
+    def __init__(self, intents: list[str], embeddings: np.ndarray, k: int = 5) -> None:
+        super().__init__(intents, embeddings)
+        self.k = max(1, min(k, len(intents)))
+        self._embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def search(self, queries, top_n=1):
+        sims = queries @ self._embeddings.T
+        if self.k < sims.shape[1]:
+            neighbours = np.argpartition(-sims, self.k - 1, axis=1)[:, : self.k]
+        else:
+            neighbours = np.tile(np.arange(sims.shape[1]), (sims.shape[0], 1))
+        return self._vote(neighbours, np.take_along_axis(sims, neighbours, axis=1), top_n)
+
+    def _vote(self, neighbours: np.ndarray, sims: np.ndarray, top_n: int):
+        # Score per intent = summed neighbour similarity / k → stays in 0-1
+        scores = np.zeros((neighbours.shape[0], len(self.labels)), dtype=np.float32)
+        rows = np.repeat(np.arange(neighbours.shape[0]), neighbours.shape[1])
+        valid = neighbours.ravel() >= 0          # FAISS pads missing hits with -1
+        np.add.at(
+            scores,
+            (rows[valid], self.example_labels[neighbours.ravel()[valid]]),
+            np.clip(sims.ravel()[valid], 0, None),
+        )
+        return self._top_intents(scores / self.k, top_n)
+
+
+class FaissIntentIndex(KnnVoteIndex):
+    def __init__(self, intents: list[str], embeddings: np.ndarray, k: int = 5,
+                 hnsw_m: int = 32) -> None:
+        import faiss  # heavy import – only when this mode is selected
+
+        IntentIndex.__init__(self, intents, embeddings)
+        self.k = max(1, min(k, len(intents)))
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self._index = faiss.IndexHNSWFlat(vectors.shape[1], hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        self._index.add(vectors)
+
+    def search(self, queries, top_n=1):
+        sims, neighbours = self._index.search(
+            np.ascontiguousarray(queries, dtype=np.float32), self.k
+        )
+        return self._vote(neighbours, sims, top_n)
+
+
+INDEX_TYPES = {
+    "exhaustive": ExhaustiveIndex,
+    "centroid": CentroidIndex,
+    "knn": KnnVoteIndex,
+    "faiss": FaissIntentIndex,
+}
+
+
+def build_intent_index(kind: str, intents: list[str], embeddings: np.ndarray,
+                       k: int = 5) -> IntentIndex:
+    kind = kind.lower()
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown intent index '{kind}' – choose from {sorted(INDEX_TYPES)}")
+    if kind in ("knn", "faiss"):
+        index = INDEX_TYPES[kind](intents, embeddings, k=k)
+    else:
+        index = INDEX_TYPES[kind](intents, embeddings)
+    logger.info("Intent index ready (%s, %d examples)", kind, len(intents))
+    return index
@@ -0,0 +1,134 @@
+"""
+ONNX Runtime backend for the intent sentence encoder.
+• One-off export of the HF transformer to ONNX + dynamic int8 quantisation
+• Runtime needs only `onnxruntime` + `tokenizers` – torch is never imported
+• `encode()` mirrors the subset of SentenceTransformer.encode we use
+  (mean pooling, optional L2 normalisation)
+"""
+import inspect
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+MAX_SEQ_LENGTH = 128            # same truncation as paraphrase-MiniLM-L6-v2
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+class OnnxSentenceEncoder:
+    def __init__(self, model_dir: str | Path, quantized: bool = True,
+                 num_threads: int = 0) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = model_dir / (INT8_FILE if quantized else FP32_FILE)
+        self.session = ort.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        logger.info("ONNX intent encoder ready (%s)", model_file.name)
+
+    def encode(self, sentences: str | list[str], batch_size: int = 32,
+               normalize_embeddings: bool = False) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        chunks = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.vstack(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        (token_embeddings,) = self.session.run(["last_hidden_state"], feeds)
+        # Mean pooling over real (non-padding) tokens
+        mask = attention[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
+
+
+def export_onnx(model_name: str, model_dir: str | Path, quantize: bool = True) -> Path:
+    """
+    Export `model_name` to ONNX (dynamic batch / sequence axes) and,
+    optionally, write a dynamically int8-quantised copy next to it.
+    Needs torch + transformers + onnx, i.e. run it at build time.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(model_dir)     # writes tokenizer.json (fast tokenizer)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Wrapper(torch.nn.Module):
+        # Call the HF model by keyword so its positional signature can't drift
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    fp32_path = model_dir / FP32_FILE
+    # Newer torch defaults to the dynamo exporter; stick to the TorchScript one
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(model),
+            tuple(sample[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=14,
+            **legacy,
+        )
+    logger.info("Exported %s → %s", model_name, fp32_path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = model_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        logger.info("Quantised int8 model → %s", int8_path)
+        return int8_path
+    return fp32_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the intent model to ONNX")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-MiniLM-L6-v2")
+    parser.add_argument("--out", default="./src/data/onnx_model")
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    export_onnx(args.model, args.out, quantize=not args.no_quantize)
@@ -1,20 +1,116 @@
 """
 Retrieval-Augmented-Generation helper.
-• Performs similarity search via VectorStore
+• Performs similarity search via VectorStore (fully async)
+• Hybrid mode: BM25 + vector results fused with reciprocal rank fusion;
+  a clear lexical match ("IBAN", "SWIFT code") skips the embedding call
 • Returns LangChain SystemMessage objects for injection
 """
+import asyncio
 import logging
+import time
+from collections import deque
+import numpy as np
 from langchain.schema import SystemMessage
-from src.core.vector_store import get_retriever
+from src.core.config import settings
+from src.core.metrics import RAG_SECONDS
+from src.core.vector_store import (
+    asimilarity_search_many, documents_by_id, get_lexical_view,
+)
 
 logger = logging.getLogger(__name__)
+LATENCY_WINDOW = 2048       # recent samples kept per retrieval path
+
+
+class RetrievalStats:
+    def __init__(self) -> None:
+        self.queries = 0
+        self.lexical_only = 0
+        self._latency: dict[str, deque] = {}
+
+    def record(self, path: str, ms: float, count: int = 1) -> None:
+        self.queries += count
+        if path == "lexical":
+            self.lexical_only += count
+        samples = self._latency.setdefault(path, deque(maxlen=LATENCY_WINDOW))
+        samples.extend([ms] * count)
+        histogram = RAG_SECONDS.labels(path)
+        for _ in range(count):
+            histogram.observe(ms / 1000)
+
+    def snapshot(self) -> dict:
+        latency = {}
+        for path, samples in self._latency.items():
+            p50, p95, p99 = np.percentile(np.fromiter(samples, float), [50, 95, 99])
+            latency[path] = {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)}
+        return {
+            "mode": settings.rag_mode,
+            "queries": self.queries,
+            "lexical_only": self.lexical_only,
+            "lexical_only_share": self.lexical_only / self.queries if self.queries else 0.0,
+            "latency_ms": latency,
+        }
+
+
+_stats = RetrievalStats()
+
+
+def retrieval_stats() -> dict:
+    return _stats.snapshot()
 
 
 class RagAgent:
     async def retrieve(self, query: str) -> list[SystemMessage]:
-        retriever = get_retriever()
-        docs = retriever.get_relevant_documents(query)
-        logger.debug("RAG retrieved %d docs for '%s'", len(docs), query[:30])
+        (messages,) = await self.retrieve_many([query])
+        logger.debug("RAG retrieved %d docs for '%s'", len(messages), query[:30])
+        return messages
+
+    async def retrieve_many(self, queries: list[str]) -> list[list[SystemMessage]]:
+        """
+        Batched retrieval – one embedding request and one index search for
+        all queries. Returns one message list per query, in input order.
+        """
+        if not queries:
+            return []
+        store, lexical = get_lexical_view()
+        if settings.rag_mode.lower() == "hybrid" and lexical is not None:
+            results = await self._hybrid(queries, store, lexical)
+        else:
+            started = time.perf_counter()
+            results = await asimilarity_search_many(queries)
+            _stats.record("vector", (time.perf_counter() - started) * 1000, len(queries))
+        logger.debug("RAG retrieved docs for %d queries", len(queries))
+        return [self._to_messages(docs) for docs in results]
+
+    # ------------------------------------------------------------------ #
+    # Hybrid retrieval
+    # ------------------------------------------------------------------ #
+    async def _hybrid(self, queries: list[str], store, lexical) -> list[list]:
+        started = time.perf_counter()
+        k = settings.similarity_top_k
+        fetch_k = 2 * k
+        hits = await asyncio.to_thread(lambda: [lexical.search(q, fetch_k) for q in queries])
+        results: list[list | None] = [None] * len(queries)
+        need_vectors: list[int] = []
+        for i, (query, query_hits) in enumerate(zip(queries, hits)):
+            confidence = lexical.confidence(query, query_hits, settings.lexical_margin)
+            if confidence >= settings.lexical_skip_confidence:
+                results[i] = documents_by_id(store, [doc_id for doc_id, _ in query_hits[:k]])
+            else:
+                need_vectors.append(i)
+        lexical_ms = (time.perf_counter() - started) * 1000
+        if len(need_vectors) < len(queries):
+            _stats.record("lexical", lexical_ms, len(queries) - len(need_vectors))
+
+        if need_vectors:
+            vector_docs = await asimilarity_search_many([queries[i] for i in need_vectors], k=fetch_k)
+            for i, docs in zip(need_vectors, vector_docs):
+                lexical_docs = documents_by_id(store, [doc_id for doc_id, _ in hits[i]])
+                results[i] = reciprocal_rank_fusion([lexical_docs, docs], k=k, rrf_k=settings.rrf_k)
+            _stats.record("hybrid", (time.perf_counter() - started) * 1000, len(need_vectors))
+        return results
+
+    @staticmethod
+    def _to_messages(docs: list) -> list[SystemMessage]:
         return [
             SystemMessage(
                 content=f"Context:\n{doc.page_content.strip()}",
@@ -22,3 +118,21 @@ class RagAgent:
             )
             for doc in docs
         ]
+
+
+def reciprocal_rank_fusion(rankings: list[list], k: int, rrf_k: int = 60) -> list:
+    """Fuses ranked Document lists: score = Σ 1 / (rrf_k + rank)."""
+    scores: dict[str, float] = {}
+    docs: dict[str, object] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in best]
+
+
+def _doc_key(doc) -> str:
+    # Ingestion stores the content-hash chunk id in the metadata
+    return doc.metadata.get("chunk_id") or getattr(doc, "id", None) or doc.page_content
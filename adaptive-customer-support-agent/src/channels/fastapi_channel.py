@@ -1,11 +1,21 @@
 """
 FastAPI REST interface (JSON in/out).
 Ideal for integration with mobile / web clients.
+`/chat/stream` offers the same conversation as Server-Sent Events.
 """
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from src.routing.workflow_router import get_conversation_agent
-from src.core.memory import push_history
+from src.core.memory import push_turn
+from src.core.database import get_bulk_writer
+from src.core.llm_client import llm_stats
+from src.core.response_cache import get_response_cache
+from src.core.vector_store import index_stats
+from src.agents.rag_agent import retrieval_stats
+from src.agents.context_compressor import compression_stats
+from src.agents.history_manager import get_history_manager
 
 router = APIRouter(tags=["chat"])
 
@@ -24,8 +34,70 @@ async def chat_endpoint(req: ChatRequest):
     agent = get_conversation_agent()
     try:
         reply = await agent(session_id=req.session_id, user_text=req.message)
-        await push_history(req.session_id, {"role": "user", "content": req.message})
-        await push_history(req.session_id, {"role": "assistant", "content": reply})
+        await push_turn(req.session_id, _turn(req.message, reply))
+        get_history_manager().schedule_update(req.session_id)
         return {"reply": reply}
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """
+    SSE stream of `token` events, an optional `escalation` event and a
+    final `done` event carrying the complete reply.
+    """
+    agent = get_conversation_agent()
+
+    async def events():
+        reply = None
+        try:
+            async for event in agent.stream(session_id=req.session_id, user_text=req.message):
+                if event["event"] == "done":
+                    reply = event["data"]
+                yield _sse(event["event"], event["data"])
+        except Exception as exc:  # noqa: BLE001 – headers already sent, report in-band
+            yield _sse("error", str(exc))
+            return
+        await push_turn(req.session_id, _turn(req.message, reply))
+        get_history_manager().schedule_update(req.session_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _turn(user_text: str, reply: str) -> list[dict]:
+    return [{"role": "user", "content": user_text}, {"role": "assistant", "content": reply}]
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/chat/cache/stats")
+async def response_cache_stats():
+    cache = get_response_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+@router.get("/chat/index/stats")
+async def vector_index_stats():
+    return index_stats()
+
+
+@router.get("/chat/rag/stats")
+async def rag_stats():
+    return {**retrieval_stats(), "context_compression": compression_stats()}
+
+
+@router.get("/chat/db/stats")
+async def db_write_stats():
+    return get_bulk_writer().stats()
+
+
+@router.get("/chat/llm/stats")
+async def llm_client_stats():
+    return llm_stats()
@@ -14,23 +14,132 @@ class Settings(BaseSettings):
     # --------------------------------------------------------------------- #
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     openai_api_base: str | None = Field(None, env="OPENAI_API_BASE")
+    # Admission control (see llm_guard) – keep the rate a bit under the account limit
+    llm_max_concurrency: int = Field(32, env="LLM_MAX_CONCURRENCY")
+    llm_rate_limit_rpm: float = Field(450, env="LLM_RATE_LIMIT_RPM")
+    llm_min_rate_rpm: float = Field(30, env="LLM_MIN_RATE_RPM")      # floor after 429 back-off
+    llm_max_attempts: int = Field(3, env="LLM_MAX_ATTEMPTS")
+    llm_single_flight: bool = Field(True, env="LLM_SINGLE_FLIGHT")   # share identical in-flight prompts
+    llm_breaker_failures: int = Field(5, env="LLM_BREAKER_FAILURES")   # consecutive failed calls, then fail fast
+    llm_breaker_reset_s: float = Field(30.0, env="LLM_BREAKER_RESET_S")
 
     # --------------------------------------------------------------------- #
     # Databases
     # --------------------------------------------------------------------- #
     mongodb_uri: str = Field(..., env="MONGODB_URI")
     mongodb_database: str = Field("adaptive_support", env="MONGODB_DATABASE")
+    # Write-behind buffer for tickets / conversation logs (see database.BulkWriter)
+    mongo_write_batch_size: int = Field(500, env="MONGO_WRITE_BATCH_SIZE")
+    mongo_flush_interval_ms: int = Field(200, env="MONGO_FLUSH_INTERVAL_MS")
+    mongo_write_queue_max: int = Field(10_000, env="MONGO_WRITE_QUEUE_MAX")   # then writers wait
 
     redis_url: str | None = Field("redis://localhost:6379", env="REDIS_URL")
+    # Session memory – streams are capped and expire when idle
+    session_max_messages: int = Field(50, env="SESSION_MAX_MESSAGES")
+    session_ttl_s: int = Field(86_400, env="SESSION_TTL_S")
+    session_fallback_max_sessions: int = Field(10_000, env="SESSION_FALLBACK_MAX_SESSIONS")
 
     vector_store: str = Field("faiss", env="VECTOR_STORE")
     vector_directory: str = Field("./src/data/faiss_index", env="VECTOR_DIRECTORY")
+    # "local" reuses the intent classifier's sentence encoder (no API calls).
+    # Changing the backend changes the vector size → rebuild the index.
+    embedding_backend: str = Field("openai", env="EMBEDDING_BACKEND")  # openai | local
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_dir: str = Field("./src/data/embedding_cache", env="EMBEDDING_CACHE_DIR")
+    embedding_query_cache_size: int = Field(10_000, env="EMBEDDING_QUERY_CACHE_SIZE")  # per-process LRU
+    # Serving index; ingestion always keeps the flat index as source of truth
+    faiss_index_type: str = Field("flat", env="FAISS_INDEX_TYPE")  # flat | hnsw | ivfpq
+    faiss_mmap: bool = Field(True, env="FAISS_MMAP")    # share index pages across workers
+    faiss_hnsw_m: int = Field(32, env="FAISS_HNSW_M")
+    faiss_hnsw_ef_construction: int = Field(80, env="FAISS_HNSW_EF_CONSTRUCTION")
+    faiss_hnsw_ef_search: int = Field(64, env="FAISS_HNSW_EF_SEARCH")
+    faiss_ivf_nlist: int = Field(1024, env="FAISS_IVF_NLIST")
+    faiss_ivf_nprobe: int = Field(16, env="FAISS_IVF_NPROBE")
+    faiss_pq_m: int = Field(48, env="FAISS_PQ_M")      # sub-quantisers (bytes per vector)
+    faiss_ivfpq_refine: int = Field(8, env="FAISS_IVFPQ_REFINE")   # 0 = pure PQ (smallest)
+    # Workers poll <vector_directory>/CURRENT and hot-swap new generations
+    index_poll_interval_s: float = Field(5.0, env="INDEX_POLL_INTERVAL_S")
+    index_keep_generations: int = Field(3, env="INDEX_KEEP_GENERATIONS")
 
     # --------------------------------------------------------------------- #
     # Agent behaviour
     # --------------------------------------------------------------------- #
-    max_history_messages: int = 15
+    max_history_messages: int = 15          # messages loaded into the prompt (after the summary)
+    # Older turns are folded into a rolling per-session summary in the background
+    history_keep_messages: int = Field(6, env="HISTORY_KEEP_MESSAGES")    # always verbatim
+    summary_batch_messages: int = Field(4, env="SUMMARY_BATCH_MESSAGES")  # fold at least this many
+    summary_max_tokens: int = Field(200, env="SUMMARY_MAX_TOKENS")
     similarity_top_k: int = 4
+    # hybrid = BM25 + vector search fused with reciprocal rank fusion;
+    # clear lexical matches skip the embedding call entirely
+    rag_mode: str = Field("hybrid", env="RAG_MODE")  # vector | hybrid
+    lexical_skip_confidence: float = Field(0.85, env="LEXICAL_SKIP_CONFIDENCE")  # > 1 never skips
+    lexical_margin: float = Field(1.3, env="LEXICAL_MARGIN")   # best / runner-up BM25 score
+    rrf_k: int = Field(60, env="RRF_K")
+    # Retrieved context is deduplicated, MMR-ordered and cut to a token budget
+    context_compression: bool = Field(True, env="CONTEXT_COMPRESSION")
+    context_token_budget: int = Field(800, env="CONTEXT_TOKEN_BUDGET")
+    context_dedup_threshold: float = Field(0.8, env="CONTEXT_DEDUP_THRESHOLD")  # shingle Jaccard
+    context_mmr_lambda: float = Field(0.7, env="CONTEXT_MMR_LAMBDA")  # 1 = rank only, 0 = diversity only
+    # Escalation triggers – JSON rules, re-read when the file changes
+    escalation_rules_path: str = Field("./src/data/escalation_rules.json", env="ESCALATION_RULES_PATH")
+    escalation_rules_reload_s: float = Field(5.0, env="ESCALATION_RULES_RELOAD_S")
+    # Intents in data/canned_responses.json are answered without the LLM
+    canned_min_confidence: float = Field(0.75, env="CANNED_MIN_CONFIDENCE")
+
+    # --------------------------------------------------------------------- #
+    # Intent classifier
+    # --------------------------------------------------------------------- #
+    intent_batch_max_size: int = Field(32, env="INTENT_BATCH_MAX_SIZE")
+    intent_batch_window_ms: float = Field(5.0, env="INTENT_BATCH_WINDOW_MS")
+    classifier_executor: str = Field("thread", env="CLASSIFIER_EXECUTOR")  # thread | process
+    classifier_max_workers: int = Field(2, env="CLASSIFIER_MAX_WORKERS")
+    classifier_max_concurrency: int = Field(4, env="CLASSIFIER_MAX_CONCURRENCY")
+    intent_cache_dir: str = Field("./src/data/intent_cache", env="INTENT_CACHE_DIR")
+    intent_index: str = Field("exhaustive", env="INTENT_INDEX")  # exhaustive | centroid | knn | faiss
+    intent_knn_k: int = Field(5, env="INTENT_KNN_K")
+    intent_backend: str = Field("torch", env="INTENT_BACKEND")  # torch | onnx
+    onnx_model_dir: str = Field("./src/data/onnx_model", env="ONNX_MODEL_DIR")
+    onnx_num_threads: int = Field(0, env="ONNX_NUM_THREADS")  # intra-op threads, 0 = all cores
+    # Bulk scoring (POST /classify/batch, src.tools.batch_processor)
+    classify_batch_chunk_size: int = Field(256, env="CLASSIFY_BATCH_CHUNK_SIZE")   # texts per encode
+    classify_batch_max_items: int = Field(2000, env="CLASSIFY_BATCH_MAX_ITEMS")    # per HTTP request
+
+    # --------------------------------------------------------------------- #
+    # Semantic response cache
+    # --------------------------------------------------------------------- #
+    response_cache_enabled: bool = Field(True, env="RESPONSE_CACHE_ENABLED")
+    response_cache_backend: str = Field("memory", env="RESPONSE_CACHE_BACKEND")  # memory | redis
+    response_cache_threshold: float = Field(0.92, env="RESPONSE_CACHE_THRESHOLD")
+    response_cache_ttl_s: int = Field(3600, env="RESPONSE_CACHE_TTL_S")
+    response_cache_max_entries: int = Field(10_000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    # Answers depend on the customer's own data → never serve from cache
+    response_cache_bypass_intents: list[str] = Field(
+        ["account_balance", "recent_transactions", "loan_info", "fraud_report"],
+        env="RESPONSE_CACHE_BYPASS_INTENTS",
+    )
+
+    # --------------------------------------------------------------------- #
+    # Observability – /metrics is always on; the header exposes per-stage
+    # timings to clients, so it is opt-in
+    # --------------------------------------------------------------------- #
+    timing_header: bool = Field(False, env="TIMING_HEADER")    # Server-Timing on responses
+
+    # --------------------------------------------------------------------- #
+    # Workers / startup
+    # --------------------------------------------------------------------- #
+    # Load the encoder / LLM client and run a dummy retrieval before /readyz turns 200
+    warmup_enabled: bool = Field(True, env="WARMUP_ENABLED")
+    # gunicorn master loads the encoder + intent embeddings once, workers
+    # share them copy-on-write (docker/gunicorn.conf.py)
+    preload_artifacts: bool = Field(False, env="PRELOAD_ARTIFACTS")
+
+    # --------------------------------------------------------------------- #
+    # Knowledge-base ingestion
+    # --------------------------------------------------------------------- #
+    ingest_batch_size: int = Field(64, env="INGEST_BATCH_SIZE")     # chunks per embedding request
+    ingest_concurrency: int = Field(4, env="INGEST_CONCURRENCY")    # embedding requests in flight
+    ingest_workers: int = Field(4, env="INGEST_WORKERS")            # threads reading / splitting files
 
     class Config:
         env_file = ".env"
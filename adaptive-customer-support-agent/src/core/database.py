@@ -1,14 +1,28 @@
 """
 Asynchronous MongoDB helper using Motor.
 Provides a global `db` accessor lazily initialised on app startup.
+
+• `BulkWriter` – write-behind buffer for tickets and conversation logs:
+  callers return as soon as the document is buffered, a background task
+  writes each collection with one `insert_many` per batch
+• Flushes on batch size or interval, slows callers down when the buffer
+  is full, drains on shutdown
 """
+import asyncio
 import logging
+from functools import lru_cache
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError, PyMongoError
 from .config import settings
+from .metrics import STORE_SECONDS, span
 
 logger = logging.getLogger(__name__)
 mongo_client: AsyncIOMotorClient | None = None
 db = None  # to be assigned post-initialisation
+WRITE_ATTEMPTS = 3
+RETRY_BACKOFF_S = 0.5
+DUPLICATE_KEY = 11000
 
 
 async def init_mongo() -> None:
@@ -18,4 +32,146 @@ async def init_mongo() -> None:
     db = mongo_client[settings.mongodb_database]  # type: ignore[index]
     # Optionally create indexes for performance
     await db.conversations.create_index("session_id")
+    await db.tickets.create_index("ticket_id")
     logger.info("MongoDB ready!")
+
+
+class BulkWriter:
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        flush_interval_ms: int | None = None,
+        max_pending: int | None = None,
+    ) -> None:
+        self.batch_size = batch_size or settings.mongo_write_batch_size
+        self.flush_interval_s = (flush_interval_ms or settings.mongo_flush_interval_ms) / 1000
+        self.max_pending = max_pending or settings.mongo_write_queue_max
+        self._buffers: dict[str, list[dict]] = {}
+        self._pending = 0                   # buffered + being written
+        self._wake = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def put(self, collection: str, doc: dict) -> None:
+        """Buffers `doc`; only waits when `max_pending` documents are outstanding."""
+        if db is None:
+            self.dropped += 1       # Mongo not initialised (tests, scripts)
+            logger.debug("MongoDB not initialised – %s document not stored", collection)
+            return
+        doc.setdefault("_id", ObjectId())   # client-side id keeps retries idempotent
+        if self._pending >= self.max_pending:
+            self.backpressure_waits += 1
+            self._wake.set()
+            with span(STORE_SECONDS, "mongo", "backpressure_wait", name="mongo"):
+                async with self._space:
+                    await self._space.wait_for(lambda: self._pending < self.max_pending)
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append(doc)
+        self._pending += 1
+        if len(buffer) >= self.batch_size:
+            self._wake.set()
+        self._ensure_flusher()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            buffers, self._buffers = self._buffers, {}
+            for collection, docs in buffers.items():
+                for start in range(0, len(docs), self.batch_size):
+                    batch = docs[start:start + self.batch_size]
+                    try:
+                        await self._write(collection, batch)
+                    finally:
+                        # Written or given up – never leak buffer capacity
+                        self._pending -= len(batch)
+                        async with self._space:
+                            self._space.notify_all()
+
+    async def close(self) -> None:
+        """Stops the flusher and writes whatever is still buffered."""
+        self._closing = True
+        if self._task is not None:
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self._closing = False
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "written": self.written,
+            "batches": self.batches,
+            "docs_per_batch": self.written / self.batches if self.batches else 0.0,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    def _ensure_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001 – keep the flusher alive
+                logger.exception("Bulk flush failed")
+
+    async def _write(self, collection: str, docs: list[dict]) -> None:
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                with span(STORE_SECONDS, "mongo", f"insert_many:{collection}"):
+                    await db[collection].insert_many(docs, ordered=False)
+                self.written += len(docs)
+                self.batches += 1
+                return
+            except BulkWriteError as exc:
+                # ordered=False: everything but the reported documents landed.
+                # Duplicate keys were written by an earlier attempt.
+                retry = {
+                    e["index"] for e in exc.details.get("writeErrors", [])
+                    if e.get("code") != DUPLICATE_KEY
+                }
+                self.written += len(docs) - len(retry)
+                self.batches += 1
+                docs = [doc for i, doc in enumerate(docs) if i in retry]
+                if not docs:
+                    return
+                error: Exception = exc
+            except PyMongoError as exc:
+                error = exc
+            except Exception:  # noqa: BLE001 – e.g. InvalidDocument; retrying will not help
+                self.failed += len(docs)
+                logger.exception("Dropped %d unwritable %s documents", len(docs), collection)
+                return
+            logger.warning("insert_many into %s failed (attempt %d/%d): %s",
+                           collection, attempt, WRITE_ATTEMPTS, error)
+            if attempt < WRITE_ATTEMPTS:
+                await asyncio.sleep(RETRY_BACKOFF_S * attempt)
+        self.failed += len(docs)
+        logger.error("Gave up writing %d %s documents", len(docs), collection)
+
+
+@lru_cache
+def get_bulk_writer() -> BulkWriter:
+    return BulkWriter()
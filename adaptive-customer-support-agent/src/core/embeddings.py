@@ -0,0 +1,223 @@
+"""
+Embedding backends for the vector store.
+• "openai" – OpenAIEmbeddings (one HTTP round-trip per request)
+• "local"  – the intent classifier's sentence encoder; the model is
+  shared with the classifier and runs on the classifier executor
+• Either backend sits behind a persistent, content-addressed cache
+  (SQLite, key = sha256(model, text)) so a document chunk is never
+  embedded twice
+• Live queries only go to a bounded in-process LRU – customer messages
+  are never persisted and never grow the shared file
+"""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalEmbeddings(Embeddings):
+    """LangChain adapter over the intent classifier's encoder."""
+
+    def __init__(self) -> None:
+        # Local import – avoids a core → agents import cycle at module load
+        from src.agents.intent_classifier import encoder_key
+
+        self.model_key = encoder_key(settings.intent_backend.lower())
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        from src.agents.intent_classifier import embed_batch
+
+        return embed_batch(list(texts)).tolist() if texts else []
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        from src.agents.intent_classifier import embed_batch
+        from .executor import get_classifier_executor
+
+        if not texts:
+            return []
+        vectors = await get_classifier_executor().run(embed_batch, list(texts))
+        return vectors.tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class EmbeddingStore:
+    """
+    Content-addressed vector store on SQLite (WAL mode, so several worker
+    processes can share one file). Vectors are stored as float32 bytes.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def mget(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            # SQLite caps the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def mset(self, items: dict[str, list[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any Embeddings: looks every text up by content hash first and
+    only sends the misses (deduplicated) to the underlying model.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        store: EmbeddingStore,
+        model_key: str,
+        query_cache_size: int | None = None,
+    ) -> None:
+        self.inner = inner
+        self.store = store
+        self.model_key = model_key
+        self.query_cache_size = query_cache_size or settings.embedding_query_cache_size
+        self._queries: OrderedDict[str, list[float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_key}\x00{text}".encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------ #
+    # Embeddings interface
+    # ------------------------------------------------------------------ #
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.key(t) for t in texts]
+        cached = self.store.mget(keys)
+        missing = self._missing(texts, keys, cached)
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            self._remember(cached, missing, vectors)
+        return [cached[k] for k in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        cached = self._lookup_queries([text])
+        missing = self._missing([text], [text], cached)
+        if missing:
+            self._remember_queries(cached, missing, self.inner.embed_documents([text]))
+        return cached[text]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.key(t) for t in texts]
+        cached = await asyncio.to_thread(self.store.mget, keys)
+        missing = self._missing(texts, keys, cached)
+        if missing:
+            vectors = await self.inner.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._remember, cached, missing, vectors)
+        return [cached[k] for k in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_queries([text]))[0]
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Batched queries – one upstream request for all LRU misses."""
+        cached = self._lookup_queries(texts)
+        missing = self._missing(texts, texts, cached)
+        if missing:
+            vectors = await self.inner.aembed_documents(list(missing.values()))
+            self._remember_queries(cached, missing, vectors)
+        return [cached[t] for t in texts]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_key,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    def _missing(self, texts: list[str], keys: list[str], cached: dict) -> dict[str, str]:
+        missing = {k: t for k, t in zip(keys, texts) if k not in cached}
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return missing
+
+    def _lookup_queries(self, texts: list[str]) -> dict[str, list[float]]:
+        found = {}
+        for text in texts:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                found[text] = self._queries[text]
+        return found
+
+    def _remember_queries(self, cached: dict, missing: dict[str, str],
+                          vectors: list[list[float]]) -> None:
+        rows = np.asarray(vectors, dtype=np.float32)
+        for text, row in zip(missing, rows):
+            cached[text] = self._queries[text] = row.tolist()
+        while len(self._queries) > self.query_cache_size:
+            self._queries.popitem(last=False)
+
+    def _remember(self, cached: dict, missing: dict[str, str], vectors: list[list[float]]) -> None:
+        # Round to float32 now so fresh and cached vectors are identical
+        rows = np.asarray(vectors, dtype=np.float32)
+        fresh = {key: row.tolist() for key, row in zip(missing.keys(), rows)}
+        self.store.mset(fresh)
+        cached.update(fresh)
+
+
+def build_embeddings() -> Embeddings:
+    backend = settings.embedding_backend.lower()
+    if backend == "local":
+        inner = LocalEmbeddings()
+        model_key = inner.model_key
+    elif backend == "openai":
+        from langchain.embeddings import OpenAIEmbeddings
+
+        inner = OpenAIEmbeddings(openai_api_key=settings.openai_api_key)
+        model_key = f"openai:{getattr(inner, 'model', 'default')}"
+    else:
+        raise ValueError(f"Unknown embedding backend '{backend}' – choose openai or local")
+    if not settings.embedding_cache_enabled:
+        return inner
+    store = EmbeddingStore(Path(settings.embedding_cache_dir) / "embeddings.sqlite3")
+    logger.info("Embedding cache ready (%s, %d vectors)", model_key, len(store))
+    return CachedEmbeddings(inner, store, model_key)
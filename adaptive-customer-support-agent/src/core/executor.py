@@ -0,0 +1,97 @@
+"""
+Bounded executor for CPU-bound work that is called from async code.
+• Runs jobs in a thread or process pool so the event loop never blocks
+• Caps the number of concurrently submitted jobs with a semaphore
+• Tracks queue depth / in-flight jobs for monitoring
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    def __init__(self, kind: str, max_workers: int, max_concurrency: int) -> None:
+        self.kind = kind.lower()
+        self.max_workers = max(1, max_workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self._pool: Executor = self._make_pool()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.queue_depth = 0      # jobs waiting for a free slot
+        self.in_flight = 0        # jobs currently running in the pool
+        self.completed = 0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Execute `fn(*args)` in the pool. For the process pool `fn` and its
+        arguments must be picklable (i.e. module-level functions).
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        self.queue_depth += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queue_depth -= 1
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self._pool, partial(fn, *args))
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    # ------------------------------------------------------------------ #
+    def _make_pool(self) -> Executor:
+        if self.kind == "process":
+            # `spawn` – forking a process that already loaded torch is unsafe
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        if self.kind != "thread":
+            logger.warning("Unknown executor kind '%s' → using thread pool", self.kind)
+            self.kind = "thread"
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="cpu-bound"
+        )
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # Semaphores are bound to a loop – recreate if called from a new one
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+@lru_cache
+def get_classifier_executor() -> BoundedExecutor:
+    return BoundedExecutor(
+        kind=settings.classifier_executor,
+        max_workers=settings.classifier_max_workers,
+        max_concurrency=settings.classifier_max_concurrency,
+    )
@@ -0,0 +1,171 @@
+"""
+FAISS index variants for the knowledge-base store.
+• flat  – exact search (IndexFlat, the LangChain default)
+• hnsw  – graph index, high recall at a fraction of the flat latency
+• ivfpq – inverted lists + product quantisation, ~16-32× smaller; by
+  default the candidates are re-ranked on exact vectors (refine)
+• Ingestion keeps the flat index as the source of truth and builds the
+  ANN variant from it (`index.<type>.faiss` next to `index.faiss`)
+• Serving workers load the variant memory-mapped, read-only, so all
+  workers on a host share the same pages
+• Each ingestion writes a new generation directory and then flips the
+  CURRENT marker; workers poll the marker and hot-swap
+"""
+import logging
+import os
+import pickle
+import shutil
+from pathlib import Path
+import faiss
+import numpy as np
+from langchain.vectorstores.faiss import FAISS
+from .config import settings
+
+logger = logging.getLogger(__name__)
+INDEX_NAME = "index"            # LangChain's save_local / load_local default
+INDEX_KINDS = ("flat", "hnsw", "ivfpq")
+MIN_POINTS_PER_CENTROID = 39    # below this FAISS k-means warns / degrades
+# IO_FLAG_MMAP only maps IVF inverted lists – flat / refine codes are
+# still copied into every worker. IO_FLAG_MMAP_IFC (newer faiss) maps
+# both, so the vectors stay in the shared page cache.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+CURRENT_MARKER = "CURRENT"
+GENERATIONS_DIR = "generations"
+
+
+def index_path(index_dir: str | Path, kind: str) -> Path:
+    name = INDEX_NAME if kind == "flat" else f"{INDEX_NAME}.{kind}"
+    return Path(index_dir) / f"{name}.faiss"
+
+
+def build_index(kind: str, vectors: np.ndarray, metric: int = faiss.METRIC_L2) -> faiss.Index:
+    """Builds (and trains, if needed) an index of `kind` over `vectors`."""
+    n, dim = vectors.shape
+    if kind == "flat":
+        index = faiss.IndexFlat(dim, metric)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, settings.faiss_hnsw_m, metric)
+        index.hnsw.efConstruction = settings.faiss_hnsw_ef_construction
+    elif kind == "ivfpq":
+        # Small corpora cannot support the configured number of lists
+        nlist = max(1, min(settings.faiss_ivf_nlist, n // MIN_POINTS_PER_CENTROID))
+        pq_m = _pq_subquantizers(dim, settings.faiss_pq_m)
+        # 8-bit codes need 256 × 39 training points; use fewer bits for tiny sets
+        nbits = max(1, min(8, int(np.log2(max(2, n // MIN_POINTS_PER_CENTROID)))))
+        index = faiss.IndexIVFPQ(faiss.IndexFlat(dim, metric), dim, nlist, pq_m, nbits, metric)
+        if settings.faiss_ivfpq_refine > 0:
+            # Re-rank k × refine PQ candidates on exact vectors (mmap'd pages)
+            index = faiss.IndexRefineFlat(index)
+        index.train(vectors)
+    else:
+        raise ValueError(f"Unknown FAISS index type '{kind}' – choose one of {INDEX_KINDS}")
+    index.add(vectors)
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index) -> None:
+    if isinstance(index, faiss.IndexRefine):
+        index.k_factor = settings.faiss_ivfpq_refine
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = settings.faiss_hnsw_ef_search
+        return
+    try:
+        faiss.extract_index_ivf(index).nprobe = settings.faiss_ivf_nprobe
+    except RuntimeError:
+        pass                    # not an IVF index – nothing to tune
+
+
+def build_variant(index_dir: str | Path, kind: str) -> Path | None:
+    """
+    Rebuilds the `kind` variant from the persisted flat index. Positions
+    are preserved, so the flat index's docstore mapping stays valid.
+    """
+    if kind == "flat":
+        return None
+    flat = faiss.read_index(str(index_path(index_dir, "flat")))
+    vectors = flat.reconstruct_n(0, flat.ntotal) if flat.ntotal else np.zeros((0, flat.d), "float32")
+    if not len(vectors):
+        logger.warning("Flat index is empty – skipping %s build", kind)
+        return None
+    index = build_index(kind, np.ascontiguousarray(vectors, dtype=np.float32), flat.metric_type)
+    target = index_path(index_dir, kind)
+    tmp = target.with_suffix(".tmp")
+    faiss.write_index(index, str(tmp))
+    tmp.replace(target)             # atomic – readers never see a partial file
+    logger.info("Built %s index over %d vectors (%s)", kind, index.ntotal, target.name)
+    return target
+
+
+def load_store(index_dir: str | Path, embeddings, kind: str = "flat", mmap: bool = False) -> FAISS:
+    """
+    Loads a LangChain FAISS store, optionally swapping in an ANN variant
+    and/or memory-mapping the index file (read-only).
+    """
+    index_dir = Path(index_dir)
+    path = index_path(index_dir, kind)
+    if kind != "flat" and not path.exists():
+        logger.warning("No %s index in %s – falling back to flat (run ingestion)", kind, index_dir)
+        path = index_path(index_dir, "flat")
+    flags = MMAP_FLAGS | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(str(path), flags)
+    apply_search_params(index)
+    # We wrote this file ourselves during ingestion
+    with open(index_dir / f"{INDEX_NAME}.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+# --------------------------------------------------------------------------- #
+# Generations – <root>/generations/gen-000042/, published via <root>/CURRENT
+# --------------------------------------------------------------------------- #
+def current_generation(root: str | Path) -> tuple[str | None, Path | None]:
+    """Returns (generation name, directory) or (None, None) if nothing is built."""
+    root = Path(root)
+    marker = root / CURRENT_MARKER
+    if marker.exists():
+        name = marker.read_text(encoding="utf-8").strip()
+        return name, root / GENERATIONS_DIR / name
+    if index_path(root, "flat").exists():
+        return "legacy", root           # index saved before generations existed
+    return None, None
+
+
+def new_generation(root: str | Path) -> tuple[str, Path]:
+    parent = Path(root) / GENERATIONS_DIR
+    parent.mkdir(parents=True, exist_ok=True)
+    numbers = [_generation_number(p.name) for p in parent.iterdir()]
+    name = f"gen-{max(numbers, default=0) + 1:06d}"
+    path = parent / name
+    path.mkdir()                        # fails loudly if two ingestions race
+    return name, path
+
+
+def publish_generation(root: str | Path, name: str, keep: int) -> None:
+    """Atomically points CURRENT at `name`, then prunes old generations."""
+    root = Path(root)
+    tmp = root / f"{CURRENT_MARKER}.tmp"
+    tmp.write_text(name, encoding="utf-8")
+    os.replace(tmp, root / CURRENT_MARKER)
+    older = sorted(
+        (p for p in (root / GENERATIONS_DIR).iterdir() if p.name != name),
+        key=lambda p: _generation_number(p.name),
+    )
+    # Workers still serving an old generation keep their mmap'd pages
+    # after unlink, so pruning never breaks in-flight queries
+    for path in older[: max(0, len(older) - (keep - 1))]:
+        shutil.rmtree(path, ignore_errors=True)
+    logger.info("Published index generation %s", name)
+
+
+def _generation_number(name: str) -> int:
+    _, _, number = name.partition("-")
+    return int(number) if number.isdigit() else 0
+
+
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    # PQ needs dim % m == 0 – take the largest divisor not above `wanted`
+    for m in range(min(wanted, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
@@ -0,0 +1,120 @@
+"""
+Local BM25 inverted index over the knowledge-base chunks.
+• Built by ingestion next to the vector index (same generation)
+• Posting lists as numpy arrays – a query touches only its own terms
+• `confidence()` tells the retriever when the lexical hit is clear
+  enough to skip the embedding call entirely
+"""
+import logging
+import math
+import pickle
+import re
+from collections import Counter
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+LEXICAL_FILE = "lexical.pkl"
+K1 = 1.2
+B = 0.75
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "our please the this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, doc_ids: list[str], texts: list[str]) -> None:
+        self.doc_ids = list(doc_ids)
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(i)
+                tfs.append(tf)
+        n = max(1, len(texts))
+        avg_len = float(lengths.mean()) if len(texts) else 1.0
+        # Per-document BM25 length normalisation, precomputed once
+        self._norm = K1 * (1 - B + B * lengths / max(avg_len, 1e-9))
+        self._postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        self._idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, (docs, _) in self._postings.items()
+        }
+        self._max_idf = math.log(1 + (n + 0.5) / 0.5)   # idf of a term no chunk contains
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Top-k (doc id, BM25 score), best first."""
+        scores = self._scores(tokenize(query))
+        if scores is None:
+            return []
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def confidence(self, query: str, hits: list[tuple[str, float]], margin: float) -> float:
+        """
+        0-1: idf-weighted share of the query's terms that the best hit
+        contains. Zero when the runner-up scores within `margin`× of the
+        best hit – the lexical signal does not single out one chunk.
+        """
+        terms = set(tokenize(query))
+        if not hits or not terms:
+            return 0.0
+        if len(hits) > 1 and hits[0][1] < margin * hits[1][1]:
+            return 0.0
+        best = self._positions[hits[0][0]]
+        total = sum(self._idf.get(t, self._max_idf) for t in terms)
+        matched = sum(
+            self._idf[t] for t in terms
+            if t in self._postings and best in self._postings[t][0]
+        )
+        return matched / total if total else 0.0
+
+    def save(self, directory: str | Path) -> Path:
+        path = Path(directory) / LEXICAL_FILE
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @staticmethod
+    def load(directory: str | Path) -> "BM25Index | None":
+        path = Path(directory) / LEXICAL_FILE
+        if not path.exists():
+            return None
+        # Written by our own ingestion, same trust level as index.pkl
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    def _scores(self, terms: list[str]) -> np.ndarray | None:
+        if not self.doc_ids:
+            return None
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(terms):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs = posting
+            scores[docs] += self._idf[term] * tfs * (K1 + 1) / (tfs + self._norm[docs])
+        return scores
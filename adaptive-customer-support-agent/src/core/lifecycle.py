@@ -0,0 +1,175 @@
+"""
+Startup orchestration, warm-up and readiness.
+• Independent resources (Mongo, vector store, Redis) initialise
+  concurrently; every phase's wall time is logged and served by /readyz
+• Warm-up runs in the background once the app serves HTTP: loads the
+  intent encoder (in every worker of a process pool), builds the LLM
+  client and runs a dummy retrieval, so real requests never pay for it
+• /healthz (liveness) answers as soon as the process serves HTTP;
+  /readyz (readiness) returns 503 until warm-up finished – point the
+  load balancer at /readyz
+• `preload()` – multi-worker servers load the read-only artifacts once
+  in the parent, before workers fork (see docker/gunicorn.conf.py)
+"""
+import asyncio
+import gc
+import logging
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable
+from .config import settings
+
+logger = logging.getLogger(__name__)
+WARMUP_TEXT = "How do I reset my online banking password?"
+
+
+async def warm_classifier() -> None:
+    # Local imports – avoids a core → agents import cycle at module load
+    from src.agents.intent_classifier import classify_batch
+    from .executor import get_classifier_executor
+
+    executor = get_classifier_executor()
+    # Each process-pool worker loads its own model. The first job keeps a
+    # worker busy for seconds, so concurrent jobs land on different workers.
+    jobs = executor.max_workers if executor.kind == "process" else 1
+    await asyncio.gather(*(executor.run(classify_batch, [WARMUP_TEXT]) for _ in range(jobs)))
+
+
+async def warm_llm_client() -> None:
+    from .llm_client import get_llm
+
+    await asyncio.to_thread(get_llm)    # imports the provider SDK off the event loop
+
+
+async def warm_retrieval() -> None:
+    from .vector_store import asimilarity_search
+
+    # Embedding client + index pages (one upstream embedding per worker)
+    await asimilarity_search(WARMUP_TEXT, k=settings.similarity_top_k)
+
+
+WARMUP_STEPS: dict[str, Callable[[], Awaitable]] = {
+    "classifier": warm_classifier,
+    "llm_client": warm_llm_client,
+    "retrieval": warm_retrieval,     # after the classifier – may share its encoder
+}
+
+
+def preload() -> None:
+    """
+    Loads the intent encoder and the (mmap'd) example embeddings in the
+    current process so forked workers share them copy-on-write. The FAISS
+    knowledge-base index needs no preload – with FAISS_MMAP every worker
+    maps the same file pages.
+
+    Never runs inference: thread pools started before fork() are not
+    fork-safe, so a stale intent cache is left for the workers to build.
+    """
+    from src.agents.intent_classifier import get_intent_classifier, intent_cache_ready
+
+    started = time.perf_counter()
+    if settings.classifier_executor.lower() == "process":
+        logger.warning("Not preloading the classifier – CLASSIFIER_EXECUTOR=process workers "
+                       "are spawned and load their own copy")
+    elif not intent_cache_ready():
+        logger.warning("Not preloading the classifier – intent embedding cache is stale "
+                       "(start one worker without PRELOAD_ARTIFACTS to rebuild it)")
+    else:
+        threads = None
+        if settings.intent_index.lower() == "faiss":
+            import faiss
+
+            # HNSW construction would start an OpenMP thread team in the parent
+            threads = faiss.omp_get_max_threads()
+            faiss.omp_set_num_threads(1)
+        try:
+            get_intent_classifier()
+        finally:
+            if threads is not None:
+                faiss.omp_set_num_threads(threads)
+    # Keep the collector from touching (and so copying) the preloaded objects
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded shared artifacts in %.0f ms", _ms_since(started))
+
+
+class Lifecycle:
+    def __init__(self, warmups: dict[str, Callable[[], Awaitable]] | None = None) -> None:
+        self.warmups = dict(WARMUP_STEPS if warmups is None else warmups)
+        self.phases: dict[str, float] = {}      # phase → wall time (ms)
+        self.ready = False
+        self.warmup_errors: dict[str, str] = {}
+        self._warmup: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def start(self, resources: dict[str, Callable[[], Awaitable]]) -> None:
+        """
+        Initialises `resources` concurrently (any failure aborts startup),
+        then schedules warm-up. Returns without waiting for warm-up.
+        """
+        started = time.perf_counter()
+        await asyncio.gather(*(self._timed(name, init) for name, init in resources.items()))
+        self.phases["startup"] = _ms_since(started)
+        logger.info("Startup phases: %s", _format(self.phases))
+        if settings.warmup_enabled and self.warmups:
+            self._warmup = asyncio.create_task(self._run_warmup())
+        else:
+            self.ready = True
+
+    async def wait_ready(self) -> None:
+        if self._warmup is not None:
+            await asyncio.shield(self._warmup)
+
+    async def stop(self) -> None:
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+            try:
+                await self._warmup
+            except asyncio.CancelledError:
+                pass
+        self.ready = False
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phases_ms": dict(self.phases),
+            "warmup_errors": dict(self.warmup_errors),
+        }
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    async def _timed(self, name: str, step: Callable[[], Awaitable]) -> None:
+        started = time.perf_counter()
+        try:
+            await step()
+        finally:
+            self.phases[name] = _ms_since(started)
+
+    async def _run_warmup(self) -> None:
+        started = time.perf_counter()
+        for name, step in self.warmups.items():
+            try:
+                await self._timed(f"warmup_{name}", step)
+            except Exception as exc:  # noqa: BLE001 – a cold worker still answers correctly
+                self.warmup_errors[name] = repr(exc)
+                logger.warning("Warm-up step '%s' failed: %s", name, exc)
+        self.phases["warmup"] = _ms_since(started)
+        self.ready = True
+        logger.info("Ready – warm-up phases: %s",
+                    _format({k: v for k, v in self.phases.items() if k.startswith("warmup")}))
+
+
+def _ms_since(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _format(phases: dict[str, float]) -> str:
+    return ", ".join(f"{name} {ms:.0f} ms" for name, ms in phases.items())
+
+
+@lru_cache
+def get_lifecycle() -> Lifecycle:
+    return Lifecycle()
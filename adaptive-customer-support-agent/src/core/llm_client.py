@@ -2,32 +2,126 @@
 Tiny wrapper around OpenAI ChatCompletion with sensible defaults
 and retry logic. If needed, swap in Azure or Anthropic models here
 without touching agent code.
+
+Every call goes through `LLMGuard` (see llm_guard): concurrency limit,
+adaptive rate limit, single-flight for identical prompts, circuit breaker.
 """
+import hashlib
+import json
 import logging
-from tenacity import retry, stop_after_attempt, wait_random_exponential
-from langchain.chat_models import ChatOpenAI
+import time
+from typing import AsyncIterator
+from langchain_core.messages import convert_to_messages
 from .config import settings
+from .llm_guard import AdaptiveRateLimiter, CircuitBreaker, LLMGuard, LLMUnavailableError  # noqa: F401
+from .metrics import LLM_SECONDS, LLM_TOKENS, add_span
+from .tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
-# Single, shared instance for efficiency (connection pooling, etc.)
-_llm = ChatOpenAI(
-    model_name="gpt-4o-mini",      # switch to `gpt-4o` / enterprise tier if available
-    temperature=0.2,
-    openai_api_key=settings.openai_api_key,
-    openai_api_base=settings.openai_api_base,
-    streaming=True,
-    request_timeout=30,
+# Single, shared instance for efficiency (connection pooling, etc.) –
+# built on first use so importing this module stays cheap
+_llm = None
+_guard = LLMGuard(
+    max_concurrency=settings.llm_max_concurrency,
+    limiter=AdaptiveRateLimiter(settings.llm_rate_limit_rpm, settings.llm_min_rate_rpm),
+    breaker=CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_reset_s),
+    max_attempts=settings.llm_max_attempts,
+    single_flight=settings.llm_single_flight,
 )
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_random_exponential(multiplier=1, max=10))
 async def chat(messages: list[dict]) -> str:
     """
     Thin async wrapper to the underlying LangChain call.
     Accepts list of OpenAI-formatted messages.
-    Retries failures with exponential back-off.
+    Retries failures with back-off; raises `LLMUnavailableError` while
+    the provider is known to be down.
+    """
+    async def call() -> str:
+        logger.debug("Invoking LLM with %d messages", len(messages))
+        response = await get_llm().agenerate([convert_to_messages(messages)])   # returns ChatResult
+        generation = response.generations[0][0]
+        # Present when the client is configured to return response headers
+        metadata = getattr(getattr(generation, "message", None), "response_metadata", None) or {}
+        _guard.limiter.observe(metadata.get("headers"))
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        _count_usage(messages, generation.text, usage)
+        return generation.text.strip()
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        reply = await _guard.run(call, key=_prompt_key(messages))
+        outcome = "ok"
+        return reply
+    except LLMUnavailableError:
+        outcome = "unavailable"
+        raise
+    finally:
+        _observe("chat", outcome, started)
+
+
+async def chat_stream(messages: list[dict]) -> AsyncIterator[str]:
     """
-    logger.debug("Invoking LLM with %d messages", len(messages))
-    response = await _llm.agenerate([messages])   # returns ChatResult
-    return response.generations[0][0].text.strip()
+    Streaming variant of `chat` – yields content tokens as they arrive.
+    Not retried: once tokens reached the caller a replay would duplicate
+    them, so failures surface to the consumer instead.
+    """
+    logger.debug("Streaming LLM with %d messages", len(messages))
+    started = time.perf_counter()
+    outcome = "error"
+    completion = []
+    try:
+        async with _guard.slot():
+            async for chunk in get_llm().astream(convert_to_messages(messages)):
+                if chunk.content:
+                    completion.append(chunk.content)
+                    yield chunk.content
+        outcome = "ok"
+    except LLMUnavailableError:
+        outcome = "unavailable"
+        raise
+    finally:
+        _observe("stream", outcome, started)
+        if outcome == "ok":
+            _count_usage(messages, "".join(completion), {})
+
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        from langchain.chat_models import ChatOpenAI
+
+        _llm = ChatOpenAI(
+            model_name="gpt-4o-mini",      # switch to `gpt-4o` / enterprise tier if available
+            temperature=0.2,
+            openai_api_key=settings.openai_api_key,
+            openai_api_base=settings.openai_api_base,
+            streaming=True,
+            request_timeout=30,
+            max_retries=0,                 # retries are paced by the guard, not the SDK
+        )
+    return _llm
+
+
+def llm_stats() -> dict:
+    return _guard.stats()
+
+
+def _observe(mode: str, outcome: str, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    LLM_SECONDS.labels(mode, outcome).observe(elapsed)
+    add_span("llm", elapsed * 1000)
+
+
+def _count_usage(messages: list[dict], completion: str, usage: dict) -> None:
+    # Provider usage when reported, local tiktoken count otherwise
+    prompt = usage.get("prompt_tokens") or sum(count_tokens(m["content"]) for m in messages)
+    LLM_TOKENS.labels("prompt").inc(prompt)
+    LLM_TOKENS.labels("completion").inc(usage.get("completion_tokens") or count_tokens(completion))
+
+
+def _prompt_key(messages: list[dict]) -> str:
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,347 @@
+"""
+Admission control in front of the LLM provider.
+• Global concurrency limit – excess calls queue (wait time is tracked)
+• Adaptive token bucket: halves its rate on 429 and honours Retry-After,
+  follows the x-ratelimit-* headers when the client exposes them, and
+  creeps back up on success (AIMD)
+• Single-flight – identical in-flight prompts share one upstream call
+• Circuit breaker – after repeated failed calls (each one counted once,
+  after its retries) calls fail fast with `LLMUnavailableError` so the
+  graph can escalate instead of waiting
+"""
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Mapping, TypeVar
+import numpy as np
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+LATENCY_WINDOW = 2048
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate_per_min: float, min_rate_per_min: float) -> None:
+        self.max_rate = rate_per_min / 60
+        self.min_rate = min(min_rate_per_min, rate_per_min) / 60
+        self.rate = self.max_rate                       # requests / second
+        self.capacity = max(1.0, self.max_rate)         # one second of burst
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.rate_limited = 0
+
+    async def acquire(self) -> None:
+        # FIFO – the lock is held while waiting so callers leave in order
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        # Additive increase: back to full rate after ~20 clean calls
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_rate_limited(self, retry_after: float | None) -> None:
+        self.rate_limited += 1
+        self.rate = max(self.min_rate, self.rate / 2)  # multiplicative decrease
+        self._tokens = 0.0
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning("LLM rate limited – %.1f req/min, pausing %.2fs", self.rate * 60, pause)
+
+    def observe(self, headers: Mapping[str, str] | None) -> None:
+        """Spread the provider's remaining request budget over its reset window."""
+        if not headers:
+            return
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining is None or not reset:
+            return
+        remaining = int(remaining)
+        self._tokens = min(self._tokens, float(remaining))
+        budget = remaining / reset
+        if budget < self.rate:
+            self.rate = max(self.min_rate, budget)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout_s: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"                   # closed | open | half_open
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def check(self) -> None:
+        if self.state == "closed":
+            return
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            self.state = "half_open"            # let one probe through
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise LLMUnavailableError("LLM circuit breaker is open")
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info("LLM circuit breaker closed")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def abandon_probe(self) -> None:
+        # Probe cancelled by its caller – the next call may probe instead
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.error("LLM circuit breaker opened after %d failures", self.failures)
+            self.state = "open"
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LLMGuard:
+    def __init__(
+        self,
+        max_concurrency: int,
+        limiter: AdaptiveRateLimiter,
+        breaker: CircuitBreaker,
+        max_attempts: int = 3,
+        single_flight: bool = True,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.single_flight = single_flight
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flights: dict[str, asyncio.Future] = {}
+        self._wait_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    async def run(self, call: Callable[[], Awaitable[T]], key: str | None = None) -> T:
+        """
+        Runs `call` under all controls, retrying 429 / transient errors.
+        Concurrent calls with the same `key` share the first one's result;
+        if the caller that leads a flight is cancelled, a follower takes over.
+        """
+        if key is None or not self.single_flight:
+            return await self._with_retries(call)
+        while (flight := self._flights.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled() or asyncio.current_task().cancelling():
+                    raise               # this follower itself was cancelled
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await self._with_retries(call)
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                flight.cancel()         # followers retry, one becomes the leader
+            else:
+                flight.set_exception(exc)
+                flight.exception()      # mark retrieved – followers are optional
+            raise
+        finally:
+            self._flights.pop(key, None)
+        flight.set_result(result)
+        return result
+
+    @asynccontextmanager
+    async def slot(self):
+        """One admitted upstream call (no retries) – used for streaming."""
+        self.breaker.check()
+        recorded = False
+        try:
+            async with self._admitted():
+                try:
+                    yield
+                except Exception as exc:
+                    recorded = True
+                    self._record_error(exc)
+                    self._record_failure(exc)
+                    raise
+            self._record_success()
+            recorded = True
+        finally:
+            if not recorded:
+                # Cancelled, or the stream was closed early (GeneratorExit)
+                self.breaker.abandon_probe()
+
+    def stats(self) -> dict:
+        waits = np.fromiter(self._wait_ms, float) if self._wait_ms else np.zeros(1)
+        p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queue_wait_ms": {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2)},
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "failed": self.failed,
+            "rate_per_min": round(self.limiter.rate * 60, 1),
+            "rate_limited": self.limiter.rate_limited,
+            "breaker": {"state": self.breaker.state, "failures": self.breaker.failures,
+                        "rejected": self.breaker.rejected},
+        }
+
+    # ------------------------------------------------------------------ #
+    # Private helpers
+    # ------------------------------------------------------------------ #
+    async def _with_retries(self, call: Callable[[], Awaitable[T]]) -> T:
+        # One breaker check and at most one breaker failure per logical
+        # call – retries of an admitted call are not new calls
+        self.breaker.check()
+        attempt = 1
+        while True:
+            try:
+                async with self._admitted():
+                    result = await call()
+            except asyncio.CancelledError:
+                self.breaker.abandon_probe()
+                raise
+            except Exception as exc:
+                delay = self._record_error(exc, attempt)
+                if delay is None or attempt >= self.max_attempts:
+                    self._record_failure(exc)
+                    self.failed += 1
+                    raise
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._record_success()
+            return result
+
+    @asynccontextmanager
+    async def _admitted(self):
+        started = time.perf_counter()
+        self.queued += 1
+        semaphore = self._get_semaphore()
+        try:
+            await semaphore.acquire()
+            try:
+                await self.limiter.acquire()
+            except BaseException:
+                semaphore.release()
+                raise
+        finally:
+            self.queued -= 1
+        self._wait_ms.append((time.perf_counter() - started) * 1000)
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def _record_success(self) -> None:
+        self.breaker.record_success()
+        self.limiter.on_success()
+
+    def _record_error(self, exc: Exception, attempt: int = 1) -> float | None:
+        """Feeds the limiter; returns the retry delay or None if not retryable."""
+        status = _status_code(exc)
+        if status == 429:
+            retry_after = _retry_after(exc)
+            self.limiter.on_rate_limited(retry_after)
+            return retry_after if retry_after is not None else 0.0   # limiter paces the retry
+        if status is not None and 400 <= status < 500:
+            return None                 # our request is wrong – retrying will not help
+        return min(10.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def _record_failure(self, exc: Exception) -> None:
+        """Feeds the breaker once the call has given up."""
+        status = _status_code(exc)
+        if status is not None and 400 <= status < 500:
+            self.breaker.record_success()   # upstream answered – it is not down
+        else:
+            self.breaker.record_failure()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to a loop – recreate if called from a new one
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+def parse_duration(value: str | None) -> float | None:
+    """OpenAI reset headers: "1s", "6m0s", "20ms", "1h2m3.5s"."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _UNITS[unit] for n, unit in parts)
+
+
+def _status_code(exc: Exception) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    return parse_duration(headers.get("retry-after")) or parse_duration(
+        headers.get("x-ratelimit-reset-requests")
+    )
@@ -2,15 +2,99 @@
 Ephemeral memory cache using Redis Streams (optional).
 Allows agents to store / retrieve recent conversation steps quickly
 without Mongo round-trip. Falls back to in-process dict if Redis absent.
+
+• One pipelined round-trip per turn (XADD × n + EXPIRE)
+• Streams capped with MAXLEN ~ and expired after SESSION_TTL_S idle
+• Messages stored as one compact JSON field: ["u", "text"]
+• Fallback is an LRU of bounded deques with the same TTL
+• Per-session rolling summary (see agents.history_manager)
 """
 import json
 import logging
+import time
+from collections import OrderedDict, deque
 from redis.asyncio import from_url
 from .config import settings
+from .metrics import STORE_SECONDS, span
 
 logger = logging.getLogger(__name__)
 _redis = None
-_fallback: dict[str, list[dict]] = {}     # for local dev
+KEY_PREFIX = "session:"
+SUMMARY_PREFIX = "summary:"
+FIELD = "m"
+ROLE_CODES = {"user": "u", "assistant": "a", "system": "s"}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class _Session:
+    __slots__ = ("touched", "messages", "summary", "next_id")
+
+    def __init__(self, max_messages: int) -> None:
+        self.touched = time.monotonic()
+        self.messages: deque[tuple[str, dict]] = deque(maxlen=max_messages)
+        self.summary: dict | None = None
+        self.next_id = 1
+
+
+class SessionLRU:
+    """In-process fallback: bounded number of sessions, each a bounded deque."""
+
+    def __init__(self, max_sessions: int, max_messages: int, ttl_s: int) -> None:
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_s = ttl_s
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self.evictions = 0
+
+    def append(self, session_id: str, messages: list[dict]) -> None:
+        session = self._touch(session_id)
+        for message in messages:
+            # Same "<ms>-<seq>" shape as Redis stream ids
+            session.messages.append((f"0-{session.next_id}", message))
+            session.next_id += 1
+
+    def entries(self, session_id: str, limit: int) -> list[tuple[str, dict]]:
+        session = self._live(session_id)
+        if session is None or not limit:
+            return []
+        return list(session.messages)[-limit:]
+
+    def get(self, session_id: str, limit: int) -> list[dict]:
+        return [message for _, message in self.entries(session_id, limit)]
+
+    def get_summary(self, session_id: str) -> dict | None:
+        session = self._live(session_id)
+        return session.summary if session else None
+
+    def set_summary(self, session_id: str, summary: dict) -> None:
+        self._touch(session_id).summary = summary
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _touch(self, session_id: str) -> _Session:
+        session = self._live(session_id) or _Session(self.max_messages)
+        session.touched = time.monotonic()
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return session
+
+    def _live(self, session_id: str) -> _Session | None:
+        session = self._sessions.get(session_id)
+        if session is not None and time.monotonic() - session.touched > self.ttl_s:
+            del self._sessions[session_id]
+            return None
+        return session
+
+
+_fallback = SessionLRU(
+    max_sessions=settings.session_fallback_max_sessions,
+    max_messages=settings.session_max_messages,
+    ttl_s=settings.session_ttl_s,
+)     # for local dev
 
 
 async def init_memory_cache() -> None:
@@ -20,18 +104,81 @@ async def init_memory_cache() -> None:
         await _redis.ping()
         logger.info("Redis memory cache ready!")
     except Exception as exc:  # noqa: BLE001
+        _redis = None
         logger.warning("Redis unavailable → using in-process fallback (%s)", exc)
 
 
-async def push_history(session_id: str, message: dict) -> None:
+def get_redis():
+    """Shared Redis client, or None when running on the in-process fallback."""
+    return _redis
+
+
+def encode_message(message: dict) -> str:
+    role = ROLE_CODES.get(message["role"], message["role"])
+    return json.dumps([role, message["content"]], ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_message(payload: str) -> dict:
+    role, content = json.loads(payload)
+    return {"role": ROLE_NAMES.get(role, role), "content": content}
+
+
+async def push_turn(session_id: str, messages: list[dict]) -> None:
+    """Appends a whole turn (e.g. user + assistant) in one round-trip."""
+    if not messages:
+        return
     if _redis:
-        await _redis.xadd(session_id, message)
+        key = KEY_PREFIX + session_id
+        with span(STORE_SECONDS, "redis", "push_turn", name="redis"):
+            async with _redis.pipeline(transaction=False) as pipe:
+                for message in messages:
+                    pipe.xadd(key, {FIELD: encode_message(message)},
+                              maxlen=settings.session_max_messages, approximate=True)
+                pipe.expire(key, settings.session_ttl_s)
+                await pipe.execute()
     else:
-        _fallback.setdefault(session_id, []).append(message)
+        _fallback.append(session_id, messages)
+
+
+async def push_history(session_id: str, message: dict) -> None:
+    await push_turn(session_id, [message])
 
 
 async def get_history(session_id: str, limit: int = 15) -> list[dict]:
+    return [message for _, message in await get_history_entries(session_id, limit)]
+
+
+async def get_history_entries(session_id: str, limit: int = 15) -> list[tuple[str, dict]]:
+    """Oldest-first (entry id, message) pairs; ids sort with `entry_order`."""
     if _redis:
-        stream = await _redis.xrevrange(session_id, count=limit)
-        return [json.loads(m[1]["data"]) for m in reversed(stream)]
-    return _fallback.get(session_id, [])[-limit:]
+        with span(STORE_SECONDS, "redis", "get_history", name="redis"):
+            stream = await _redis.xrevrange(KEY_PREFIX + session_id, count=limit)
+        return [(entry_id, decode_message(fields[FIELD])) for entry_id, fields in reversed(stream)]
+    return _fallback.entries(session_id, limit)
+
+
+def entry_order(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+# --------------------------------------------------------------------------- #
+# Rolling summary – {"text": ..., "last_id": <newest entry folded in>}
+# --------------------------------------------------------------------------- #
+async def get_summary(session_id: str) -> dict | None:
+    if _redis:
+        with span(STORE_SECONDS, "redis", "get_summary", name="redis"):
+            payload = await _redis.get(SUMMARY_PREFIX + session_id)
+        return json.loads(payload) if payload else None
+    return _fallback.get_summary(session_id)
+
+
+async def set_summary(session_id: str, text: str, last_id: str) -> None:
+    summary = {"text": text, "last_id": last_id}
+    if _redis:
+        with span(STORE_SECONDS, "redis", "set_summary"):
+            await _redis.set(SUMMARY_PREFIX + session_id,
+                             json.dumps(summary, ensure_ascii=False, separators=(",", ":")),
+                             ex=settings.session_ttl_s)
+    else:
+        _fallback.set_summary(session_id, summary)
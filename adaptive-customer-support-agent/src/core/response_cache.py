@@ -0,0 +1,224 @@
+"""
+Semantic cache for drafted LLM answers.
+• Bucketed by (intent, retrieved document IDs) – the answer is only
+  reused when the same knowledge would have been fed to the LLM
+• Within a bucket, a hit needs cosine(query, cached query) ≥ threshold
+• TTL + LRU eviction; in-process or Redis backend
+• Account-specific intents bypass the cache entirely, and so do turns
+  with earlier history or a summary in the prompt – those answers
+  depend on the session and must never be served to another customer
+"""
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable
+import numpy as np
+from .config import settings
+from .memory import get_redis
+
+logger = logging.getLogger(__name__)
+MAX_ENTRIES_PER_BUCKET = 64     # bound on the per-lookup similarity scan
+
+
+def normalise_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def bucket_key(intent: str, doc_ids: list[str]) -> str:
+    docs = hashlib.sha1("|".join(sorted(doc_ids)).encode("utf-8")).hexdigest()[:16]
+    return f"{intent}:{docs}"
+
+
+class InProcessCacheBackend:
+    def __init__(self, max_entries: int, ttl_s: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, dict] = OrderedDict()   # LRU order
+        self._buckets: dict[str, set[str]] = {}
+
+    async def candidates(self, bucket: str) -> list[dict]:
+        now = time.time()
+        live = []
+        for entry_id in list(self._buckets.get(bucket, ())):
+            entry = self._entries[entry_id]
+            if entry["expires_at"] < now:
+                self._remove(entry_id)
+            else:
+                live.append(entry)
+        return live
+
+    async def touch(self, entry: dict) -> None:
+        self._entries.move_to_end(entry["id"])
+
+    async def put(self, bucket: str, entry: dict) -> None:
+        entry["expires_at"] = time.time() + self.ttl_s
+        ids = self._buckets.setdefault(bucket, set())
+        if len(ids) >= MAX_ENTRIES_PER_BUCKET:
+            # Evict the least recently used entry of this bucket
+            oldest = next(i for i in self._entries if i in ids)
+            self._remove(oldest)
+        self._entries[entry["id"]] = {**entry, "bucket": bucket}
+        ids.add(entry["id"])
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._buckets.get(entry["bucket"])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._buckets[entry["bucket"]]
+
+
+class RedisCacheBackend:
+    """
+    One Redis hash per bucket (field = entry id). Bucket keys expire after
+    the TTL; global LRU is delegated to Redis (`maxmemory-policy allkeys-lru`).
+    """
+
+    PREFIX = "respcache:"
+
+    def __init__(self, redis, ttl_s: int) -> None:
+        self.redis = redis
+        self.ttl_s = ttl_s
+
+    async def candidates(self, bucket: str) -> list[dict]:
+        raw = await self.redis.hgetall(self.PREFIX + bucket)
+        now = time.time()
+        live, expired = [], []
+        for entry_id, payload in raw.items():
+            entry = json.loads(payload)
+            if entry["expires_at"] < now:
+                expired.append(entry_id)
+                continue
+            entry["embedding"] = np.frombuffer(
+                base64.b64decode(entry["embedding"]), dtype=np.float32
+            )
+            live.append({**entry, "bucket": bucket})
+        if expired:
+            await self.redis.hdel(self.PREFIX + bucket, *expired)
+        return live
+
+    async def touch(self, entry: dict) -> None:
+        await self.redis.expire(self.PREFIX + entry["bucket"], self.ttl_s)
+
+    async def put(self, bucket: str, entry: dict) -> None:
+        key = self.PREFIX + bucket
+        payload = {
+            **entry,
+            "embedding": base64.b64encode(entry["embedding"].astype(np.float32).tobytes()).decode(),
+            "expires_at": time.time() + self.ttl_s,
+        }
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, entry["id"], json.dumps(payload))
+            pipe.expire(key, self.ttl_s)
+            pipe.hlen(key)
+            *_, size = await pipe.execute()
+        if size > MAX_ENTRIES_PER_BUCKET:
+            # Drop the entries closest to expiry
+            entries = sorted(await self.candidates(bucket), key=lambda e: e["expires_at"])
+            await self.redis.hdel(key, *[e["id"] for e in entries[: size - MAX_ENTRIES_PER_BUCKET]])
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        backend,
+        embed: Callable[[str], Awaitable[np.ndarray]],
+        threshold: float,
+        bypass_intents: list[str],
+    ) -> None:
+        self.backend = backend
+        self.embed = embed
+        self.threshold = threshold
+        self.bypass_intents = set(bypass_intents)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_ms = 0.0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def cacheable(self, intent: str | None, history: bool = False) -> bool:
+        if history or intent is None or intent in self.bypass_intents:
+            self.bypassed += 1
+            return False
+        return True
+
+    async def lookup(self, query: str, intent: str, doc_ids: list[str]) -> tuple[str | None, np.ndarray]:
+        """
+        Returns (cached answer or None, query embedding). The embedding is
+        handed back so a subsequent `store()` does not encode twice.
+        """
+        embedding = np.asarray(await self.embed(normalise_query(query)), dtype=np.float32)
+        entries = await self.backend.candidates(bucket_key(intent, doc_ids))
+        if entries:
+            sims = np.stack([e["embedding"] for e in entries]) @ embedding
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                entry = entries[best]
+                await self.backend.touch(entry)
+                self.hits += 1
+                self.saved_ms += entry["latency_ms"]
+                logger.debug("Response cache hit (sim=%.3f, intent=%s)", sims[best], intent)
+                return entry["answer"], embedding
+        self.misses += 1
+        return None, embedding
+
+    async def store(self, embedding: np.ndarray, intent: str, doc_ids: list[str],
+                    answer: str, latency_ms: float) -> None:
+        await self.backend.put(
+            bucket_key(intent, doc_ids),
+            {
+                "id": uuid.uuid4().hex,
+                "embedding": embedding,
+                "answer": answer,
+                "latency_ms": latency_ms,
+            },
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "latency_saved_ms": round(self.saved_ms, 1),
+        }
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache | None:
+    if not settings.response_cache_enabled:
+        return None
+    # Local import – the classifier pulls in the sentence encoder
+    from src.agents.intent_classifier import embed_batch
+    from .executor import get_classifier_executor
+
+    async def embed(text: str) -> np.ndarray:
+        (vector,) = await get_classifier_executor().run(embed_batch, [text])
+        return vector
+
+    redis = get_redis()
+    if settings.response_cache_backend.lower() == "redis" and redis is not None:
+        backend = RedisCacheBackend(redis, ttl_s=settings.response_cache_ttl_s)
+    else:
+        backend = InProcessCacheBackend(
+            max_entries=settings.response_cache_max_entries,
+            ttl_s=settings.response_cache_ttl_s,
+        )
+    logger.info("Response cache ready (%s)", type(backend).__name__)
+    return ResponseCache(
+        backend,
+        embed=embed,
+        threshold=settings.response_cache_threshold,
+        bypass_intents=settings.response_cache_bypass_intents,
+    )
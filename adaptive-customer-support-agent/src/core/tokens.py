@@ -0,0 +1,33 @@
+"""
+Token counting shared by prompt assembly and LLM accounting.
+• tiktoken with the gpt-4o encoding; falls back to a chars / 4 estimate
+  when the package or its encoding file is unavailable
+"""
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+ENCODING = "o200k_base"         # gpt-4o / gpt-4o-mini
+
+
+@lru_cache
+def _encoder():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(ENCODING)
+    except Exception:  # noqa: BLE001 – missing package or offline encoding download
+        logger.warning("tiktoken unavailable – estimating tokens as chars / 4")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoder = _encoder()
+    return len(encoder.encode(text)) if encoder else (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    encoder = _encoder()
+    if encoder is None:
+        return text[: max_tokens * 4]
+    return encoder.decode(encoder.encode(text)[:max_tokens])
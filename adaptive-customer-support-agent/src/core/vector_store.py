@@ -2,42 +2,229 @@
 Initialises a persistent FAISS or Chroma vector index and exposes a
 LangChain VectorStore retriever. Abstracted so agents can import
 `get_retriever()` without caring about implementation details.
+
+Async helpers (`asimilarity_search*`) embed queries with the embedding
+client's native async API and run the index search in a worker thread,
+so retrieval never blocks the event loop.
+
+FAISS index type (flat / hnsw / ivfpq) and memory-mapped loading are
+handled in `faiss_index`. Embeddings come from `build_embeddings()` –
+OpenAI or the local intent encoder, behind a persistent cache.
+
+A BM25 lexical index (`lexical_index`) is built with every generation
+and swapped together with the vector store.
+
+Hot-swap: ingestion publishes a new index generation on disk; a
+background watcher loads it off the event loop and swaps the globals in
+one step. Queries already running keep the store they started with.
 """
+import asyncio
 import logging
 import os
+import time
 from pathlib import Path
-from langchain.embeddings import OpenAIEmbeddings
+import numpy as np
 from langchain.vectorstores.faiss import FAISS
-from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
 from .config import settings
+from .embeddings import build_embeddings
+from .faiss_index import current_generation, load_store
+from .lexical_index import BM25Index
 
 logger = logging.getLogger(__name__)
-_retriever = None
+_retriever = None           # underlying VectorStore
+_embeddings = None
+_lc_retriever = None        # long-lived LangChain retriever wrapper
+_lexical: BM25Index | None = None
+_generation: str | None = None
+_watcher: asyncio.Task | None = None
+_swap_stats = {"swaps": 0, "last_load_ms": 0.0, "last_swap_at": None}
 
 
 async def init_vector_store() -> None:
-    global _retriever
-    embeddings = OpenAIEmbeddings(openai_api_key=settings.openai_api_key)
+    global _embeddings
+    _embeddings = build_embeddings()
     if settings.vector_store.lower() == "faiss":
-        index_dir = Path(settings.vector_directory)
-        index_dir.mkdir(parents=True, exist_ok=True)
-        if not any(index_dir.iterdir()):
-            # Index does not exist → create empty index
-            logger.warning("FAISS index empty – initialising fresh index")
-            _retriever = FAISS.from_texts(["Placeholder"], embedding=embeddings)
-            _retriever.save_local(str(index_dir))
+        generation, index_dir = current_generation(settings.vector_directory)
+        if index_dir is None:
+            # Nothing ingested yet → serve an in-memory placeholder index
+            logger.warning("FAISS index empty – run src.tools.knowledge_base to build one")
+            _install(FAISS.from_texts(["Placeholder"], embedding=_embeddings), None, None)
         else:
-            _retriever = FAISS.load_local(str(index_dir), embeddings)
+            _install(*await _load_generation(index_dir), generation)
     else:
-        _retriever = Chroma(
-            collection_name="adaptive_support",
-            embedding_function=embeddings,
-            persist_directory=settings.vector_directory,
-        )
-    logger.info("Vector store ready (%s)", settings.vector_store)
+        root = settings.vector_directory
+        _install(open_chroma(_embeddings), await asyncio.to_thread(BM25Index.load, root), None)
+    logger.info("Vector store ready (%s/%s, generation %s, %s embeddings)", settings.vector_store,
+                type(getattr(_retriever, "index", _retriever)).__name__, _generation,
+                settings.embedding_backend)
+
+
+def open_chroma(embeddings):
+    from langchain_community.vectorstores import Chroma     # only needed for VECTOR_STORE=chroma
+
+    return Chroma(
+        collection_name="adaptive_support",
+        embedding_function=embeddings,
+        persist_directory=settings.vector_directory,
+    )
+
+
+# --------------------------------------------------------------------------- #
+# Hot-swap
+# --------------------------------------------------------------------------- #
+async def reload_vector_store() -> bool:
+    """
+    Loads the published generation if it differs from the one being
+    served. Returns True when a swap happened.
+    """
+    if settings.vector_store.lower() != "faiss" or _embeddings is None:
+        return False        # Chroma is a live database – nothing to swap
+    generation, index_dir = current_generation(settings.vector_directory)
+    if index_dir is None or generation == _generation:
+        return False
+    started = time.perf_counter()
+    store, lexical = await _load_generation(index_dir)
+    previous = _generation
+    _install(store, lexical, generation)
+    _swap_stats["swaps"] += 1
+    _swap_stats["last_load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _swap_stats["last_swap_at"] = time.time()
+    logger.info("Swapped vector index %s → %s in %.1f ms",
+                previous, generation, _swap_stats["last_load_ms"])
+    return True
+
+
+def start_index_watcher() -> None:
+    global _watcher
+    if _watcher is None or _watcher.done():
+        _watcher = asyncio.create_task(_watch_generations())
+
+
+async def stop_index_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.cancel()
+        try:
+            await _watcher
+        except asyncio.CancelledError:
+            pass
+        _watcher = None
+
+
+def index_stats() -> dict:
+    return {
+        "backend": settings.vector_store,
+        "index_type": type(getattr(_retriever, "index", _retriever)).__name__,
+        "generation": _generation,
+        "vectors": getattr(getattr(_retriever, "index", None), "ntotal", None),
+        "lexical_docs": len(_lexical) if _lexical is not None else None,
+        **_swap_stats,
+    }
+
+
+async def _watch_generations() -> None:
+    while True:
+        await asyncio.sleep(settings.index_poll_interval_s)
+        try:
+            await reload_vector_store()
+        except Exception:  # noqa: BLE001 – keep serving the current index
+            logger.exception("Vector index reload failed")
+
+
+async def _load_generation(index_dir: Path) -> tuple[FAISS, BM25Index | None]:
+    store, lexical = await asyncio.gather(
+        asyncio.to_thread(
+            load_store, index_dir, _embeddings,
+            settings.faiss_index_type.lower(), settings.faiss_mmap,
+        ),
+        asyncio.to_thread(BM25Index.load, index_dir),
+    )
+    return store, lexical
+
+
+def _install(store, lexical: BM25Index | None, generation: str | None) -> None:
+    # No await in here → readers on the event loop never see a mix of old
+    # store and new retriever / lexical index
+    global _retriever, _lc_retriever, _lexical, _generation
+    _retriever = store
+    _lc_retriever = store.as_retriever(search_kwargs={"k": settings.similarity_top_k})
+    _lexical = lexical
+    _generation = generation
+
+
+def get_vector_store():
+    if _retriever is None:
+        raise RuntimeError("Vector store not initialised – call init_vector_store() first")
+    return _retriever
+
+
+def get_embeddings():
+    if _embeddings is None:
+        raise RuntimeError("Vector store not initialised – call init_vector_store() first")
+    return _embeddings
 
 
 def get_retriever():
+    if _lc_retriever is None:
+        raise RuntimeError("Vector store not initialised – call init_vector_store() first")
+    return _lc_retriever
+
+
+def get_lexical_view() -> tuple[object, BM25Index | None]:
+    """(store, lexical index) of the same generation, pinned together."""
     if _retriever is None:
         raise RuntimeError("Vector store not initialised – call init_vector_store() first")
-    return _retriever.as_retriever(search_kwargs={"k": settings.similarity_top_k})
+    return _retriever, _lexical
+
+
+def documents_by_id(store, doc_ids: list[str]) -> list[Document]:
+    """Resolves chunk ids (as used by ingestion) to Documents, in order."""
+    if isinstance(store, FAISS):
+        return [store.docstore.search(doc_id) for doc_id in doc_ids]
+    found = store.get(ids=list(doc_ids))
+    by_id = {
+        doc_id: Document(page_content=text, metadata=meta or {})
+        for doc_id, text, meta in zip(found["ids"], found["documents"], found["metadatas"])
+    }
+    return [by_id[doc_id] for doc_id in doc_ids if doc_id in by_id]
+
+
+async def asimilarity_search(query: str, k: int | None = None) -> list:
+    """Non-blocking top-k search for a single query."""
+    (docs,) = await asimilarity_search_many([query], k=k)
+    return docs
+
+
+async def asimilarity_search_many(queries: list[str], k: int | None = None) -> list[list]:
+    """
+    Embed all queries in one request, then search them as one batch.
+    Returns one list of Documents per query, in input order.
+    """
+    if _retriever is None or _embeddings is None:
+        raise RuntimeError("Vector store not initialised – call init_vector_store() first")
+    if not queries:
+        return []
+    k = k or settings.similarity_top_k
+    store = _retriever          # pin: keep using this store even if swapped meanwhile
+    # Query path of the embedding cache (in-memory only) when available
+    embed = getattr(_embeddings, "aembed_queries", _embeddings.aembed_documents)
+    vectors = await embed(list(queries))
+    if isinstance(store, FAISS):
+        return await asyncio.to_thread(_faiss_search_batch, store, vectors, k)
+    return await asyncio.gather(*(
+        asyncio.to_thread(store.similarity_search_by_vector, vector, k)
+        for vector in vectors
+    ))
+
+
+def _faiss_search_batch(store: FAISS, vectors: list[list[float]], k: int) -> list[list]:
+    # One index.search call for the whole batch (FAISS releases the GIL)
+    query = np.asarray(vectors, dtype=np.float32)
+    if getattr(store, "_normalize_L2", False):
+        query /= np.linalg.norm(query, axis=1, keepdims=True)
+    _, ids = store.index.search(query, k)
+    return [
+        [store.docstore.search(store.index_to_docstore_id[i]) for i in row if i != -1]
+        for row in ids.tolist()
+    ]
@@ -1,19 +1,68 @@
 """
 Separate router exposing `/intent` endpoint if you want to query the
 classifier directly (useful for testing or analytics dashboards).
+`/classify/batch` scores many texts (intent + escalation rules) per
+request – archives go through `python -m src.tools.batch_processor`.
 """
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from src.agents.intent_classifier import get_intent_classifier
+from src.agents.intent_batcher import get_intent_batcher
+from src.core.config import settings
+from src.core.executor import get_classifier_executor
+from src.tools.batch_processor import score_records
 
 router = APIRouter(tags=["intent"])
 
 
 class Query(BaseModel):
     text: str
+    top_n: int | None = None      # also return the N best candidates
+
+
+class BatchItem(BaseModel):
+    text: str
+    id: str | int | None = None
+    reply: str | None = None      # agent reply, for reply-based escalation rules
+
+
+class BatchQuery(BaseModel):
+    items: list[BatchItem]
+    top_n: int | None = None
 
 
 @router.post("/classify")
 async def classify_intent(payload: Query):
-    intent, confidence = get_intent_classifier().classify(payload.text)
-    return {"intent": intent, "confidence": confidence}
+    if not payload.top_n:
+        intent, confidence = await get_intent_batcher().classify(payload.text)
+        return {"intent": intent, "confidence": confidence}
+    candidates = await get_intent_batcher().classify(payload.text, top_n=payload.top_n)
+    intent, confidence = candidates[0]
+    return {
+        "intent": intent,
+        "confidence": confidence,
+        "candidates": [{"intent": i, "confidence": c} for i, c in candidates],
+    }
+
+
+@router.post("/classify/batch")
+async def classify_intent_batch(payload: BatchQuery):
+    if len(payload.items) > settings.classify_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.classify_batch_max_items} items per request",
+        )
+    records = [item.dict() for item in payload.items]
+    size = settings.classify_batch_chunk_size
+    # Large chunks skip the micro-batcher and go straight to the pool
+    chunks = await asyncio.gather(*(
+        get_classifier_executor().run(score_records, records[start:start + size], payload.top_n)
+        for start in range(0, len(records), size)
+    ))
+    return {"results": [result for chunk in chunks for result in chunk]}
+
+
+@router.get("/classify/stats")
+async def classifier_stats():
+    # Queue depth > 0 for long periods → raise CLASSIFIER_MAX_CONCURRENCY / workers
+    return get_classifier_executor().stats()
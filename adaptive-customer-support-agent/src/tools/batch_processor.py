@@ -0,0 +1,219 @@
+"""
+Offline bulk re-classification and escalation re-scoring of archived
+messages. Streams JSONL from a file or stdin through the intent
+classifier in large encode batches and through the escalation rules,
+spread over a process pool:
+
+    • input records use the `conversations` document keys – user_message
+      (or text), optional reply and id
+    • one output line per input line, in input order:
+      {line, id, intent, confidence, escalation_rules, escalate}
+      (or {line, error} for unreadable input)
+    • chunks are written as soon as they are done and at most
+      2 × workers chunks are in flight → bounded memory for any input size
+    • --resume continues an interrupted run: complete output lines are
+      counted, a torn last line is dropped and as many input lines skipped
+
+    python -m src.tools.batch_processor archive.jsonl -o scored.jsonl --workers 8
+    zcat archive.jsonl.gz | python -m src.tools.batch_processor - -o scored.jsonl --resume
+
+`score_records` also backs POST /classify/batch.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Iterator
+from src.agents.escalation_rules import get_escalation_rules
+from src.agents.intent_classifier import classify_batch
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+PROGRESS_EVERY_S = 10.0
+
+
+def score_records(records: list[dict], top_n: int | None = None) -> list[dict]:
+    """
+    Intent + escalation rules for a batch of records – one encoder
+    forward pass. Module-level so it can run in a process pool.
+    """
+    texts = [record.get("user_message") or record.get("text") or "" for record in records]
+    ranked = classify_batch(texts, top_n=max(1, top_n or 1))
+    matched = get_escalation_rules().evaluate_many(
+        {
+            "reply": record.get("reply"),
+            "user_message": text,
+            "intent": candidates[0][0],
+            "confidence": candidates[0][1],
+        }
+        for record, text, candidates in zip(records, texts, ranked)
+    )
+    results = []
+    for record, candidates, rules in zip(records, ranked, matched):
+        intent, confidence = candidates[0]
+        result = {"id": record.get("id"), "intent": intent, "confidence": float(confidence)}
+        if top_n:
+            result["candidates"] = [{"intent": i, "confidence": float(c)} for i, c in candidates]
+        result["escalation_rules"] = rules
+        result["escalate"] = bool(rules)
+        results.append(result)
+    return results
+
+
+def process_chunk(chunk: list[tuple[int, str]], top_n: int | None = None) -> tuple[str, int, int]:
+    """Scores `(line number, raw line)` pairs → (output text, errors, escalations)."""
+    output: dict[int, dict] = {}
+    records, numbers = [], []
+    for number, line in chunk:
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+        except ValueError as exc:
+            output[number] = {"line": number, "error": f"invalid JSON: {exc}"}
+            continue
+        records.append(record)
+        numbers.append(number)
+    for number, result in zip(numbers, score_records(records, top_n) if records else []):
+        output[number] = {"line": number, **result}
+    text = "".join(json.dumps(output[number], ensure_ascii=False) + "\n" for number, _ in chunk)
+    errors = len(chunk) - len(records)
+    escalations = sum(1 for result in output.values() if result.get("escalate"))
+    return text, errors, escalations
+
+
+def completed_lines(output: Path) -> int:
+    """Complete lines in `output`; a torn last line is truncated away."""
+    count = end = position = 0
+    with open(output, "rb+") as f:
+        while block := f.read(1 << 20):
+            count += block.count(b"\n")
+            last = block.rfind(b"\n")
+            if last >= 0:
+                end = position + last + 1
+            position += len(block)
+        f.truncate(end)
+    return count
+
+
+def read_chunks(stream: IO[str], chunk_size: int, skip: int = 0) -> Iterator[list[tuple[int, str]]]:
+    chunk: list[tuple[int, str]] = []
+    for number, line in enumerate(stream, start=1):
+        if number <= skip:
+            continue
+        chunk.append((number, line.rstrip("\n")))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(
+    source: str,
+    output: Path,
+    workers: int = 0,
+    chunk_size: int | None = None,
+    top_n: int | None = None,
+    resume: bool = False,
+) -> dict:
+    """
+    Scores `source` (path or "-" for stdin) into `output`. `workers=0`
+    scores in-process; otherwise a spawned process pool does.
+    """
+    chunk_size = chunk_size or settings.classify_batch_chunk_size
+    skip = completed_lines(output) if resume and output.exists() else 0
+    if skip:
+        logger.info("Resuming after %d already scored lines", skip)
+    stats = {"skipped": skip, "lines": 0, "errors": 0, "escalations": 0}
+    started = last_report = time.perf_counter()
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        with open(output, "a" if skip else "w", encoding="utf-8") as out:
+
+            def write(result: tuple[str, int, int], lines: int) -> None:
+                nonlocal last_report
+                text, errors, escalations = result
+                out.write(text)
+                out.flush()         # whole chunks only – --resume relies on it
+                stats["lines"] += lines
+                stats["errors"] += errors
+                stats["escalations"] += escalations
+                if time.perf_counter() - last_report >= PROGRESS_EVERY_S:
+                    last_report = time.perf_counter()
+                    logger.info("%d lines scored (%.0f lines/s)", stats["lines"],
+                                stats["lines"] / (last_report - started))
+
+            chunks = read_chunks(stream, chunk_size, skip)
+            if workers <= 0:
+                for chunk in chunks:
+                    write(process_chunk(chunk, top_n), len(chunk))
+            else:
+                threads = max(1, (os.cpu_count() or 1) // workers)
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    # `spawn` – forking a process that already loaded torch is unsafe
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(threads,),
+                ) as pool:
+                    pending: deque = deque()
+                    for chunk in chunks:
+                        pending.append((pool.submit(process_chunk, chunk, top_n), len(chunk)))
+                        if len(pending) >= 2 * workers:
+                            future, lines = pending.popleft()
+                            write(future.result(), lines)
+                    while pending:
+                        future, lines = pending.popleft()
+                        write(future.result(), lines)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["lines_per_s"] = round(stats["lines"] / elapsed, 1) if elapsed else 0.0
+    logger.info("Batch complete: %s", stats)
+    return stats
+
+
+def _init_worker(threads: int) -> None:
+    # N workers × all-core intra-op thread pools would oversubscribe the CPU.
+    # Set explicitly: OMP_NUM_THREADS is only read when a runtime loads and
+    # an inherited value would win.
+    backend = settings.intent_backend.lower()
+    if backend == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    elif backend == "onnx":
+        # Read by load_encoder when this worker builds its classifier
+        settings.onnx_num_threads = threads
+    if settings.intent_index.lower() == "faiss":
+        import faiss
+
+        faiss.omp_set_num_threads(threads)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-classify intents and re-score escalation")
+    parser.add_argument("input", help="JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes (0 = score in this process)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="records per encode batch (default CLASSIFY_BATCH_CHUNK_SIZE)")
+    parser.add_argument("--top-n", type=int, default=None, help="also output the N best intents")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.workers, args.chunk_size, args.top_n, args.resume)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
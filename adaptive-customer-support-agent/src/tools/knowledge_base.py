@@ -1,40 +1,229 @@
 """
 Utility for loading and chunking knowledge base docs into the vector
-store. Run once as a script – idempotent (skips already-indexed docs).
+store. Run as a script – incremental and idempotent:
+
+    • files are read + split in parallel threads
+    • chunks are keyed by a content hash; a manifest next to the index
+      records what is already embedded, so re-runs only embed new or
+      changed chunks (identical chunks across files are embedded once)
+    • embedding requests are batched, with a bound on concurrent calls
+    • chunks of removed / edited files are deleted from the index
+    • the index is persisted once, at the end, as a new generation
+      directory; for FAISS_INDEX_TYPE=hnsw or ivfpq the (trained) serving
+      index is built from it, then CURRENT is flipped so running workers
+      hot-swap without a restart
+    • a BM25 lexical index over the same chunks is saved alongside
+
+    python -m src.tools.knowledge_base
 """
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from src.core.vector_store import get_retriever
+from langchain.vectorstores.faiss import FAISS
+from src.core import vector_store
+from src.core.embeddings import build_embeddings
+from src.core.lexical_index import LEXICAL_FILE, BM25Index
+from src.core.faiss_index import (
+    build_variant, current_generation, index_path, load_store, new_generation, publish_generation,
+)
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 DOCS_DIR = Path(__file__).parent.parent / "data" / "knowledge_docs"
 CHUNK_SIZE = 500
 OVERLAP = 50
+MANIFEST_NAME = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def chunk_id(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _split_file(path: Path, splitter, known: dict | None) -> tuple[str, str, list[str] | None]:
+    """
+    Returns (source, file hash, chunks). Chunks are None when the file is
+    unchanged since the last run – the manifest already knows its chunks.
+    """
+    digest = _file_hash(path)
+    if known is not None and known.get("sha256") == digest:
+        return path.name, digest, None
+    text = path.read_text(encoding="utf-8")
+    return path.name, digest, splitter.split_text(text)
+
+
+class _Manifest:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        data = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION:
+            data = {"version": MANIFEST_VERSION, "files": {}}
+        self.files: dict[str, dict] = data["files"]   # source → {sha256, chunks}
+        self.embedding_model: str | None = data.get("embedding_model")
+
+    def chunk_ids(self) -> set[str]:
+        return {cid for entry in self.files.values() for cid in entry["chunks"]}
+
+    def save(self, path: Path | None = None) -> None:
+        self.path = path or self.path
+        tmp = self.path.with_suffix(".tmp")
+        payload = {"version": MANIFEST_VERSION, "embedding_model": self.embedding_model,
+                   "files": self.files}
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+async def ingest(docs_dir: Path = DOCS_DIR) -> dict:
+    """
+    Builds the next index generation from the previous one, off to the
+    side – the serving store is never touched. Workers pick the new
+    generation up through the CURRENT marker (see vector_store).
+    """
+    started = time.perf_counter()
+    embeddings = vector_store._embeddings or build_embeddings()
+    root = Path(settings.vector_directory)
+    use_faiss = settings.vector_store.lower() == "faiss"
+    if use_faiss:
+        _, previous_dir = current_generation(root)
+        work = {"store": await asyncio.to_thread(load_store, previous_dir, embeddings)
+                if previous_dir else None}
+    else:
+        previous_dir = root
+        work = {"store": vector_store.open_chroma(embeddings)}
+    manifest = _Manifest((previous_dir or root) / MANIFEST_NAME)
+    model_key = getattr(embeddings, "model_key", None)
+    if manifest.embedding_model and model_key and manifest.embedding_model != model_key:
+        # Vectors from different models are not comparable (or even the same size)
+        raise RuntimeError(
+            f"Index in {settings.vector_directory} was built with {manifest.embedding_model}, "
+            f"current embeddings are {model_key} – delete the directory and re-ingest"
+        )
+    previous_ids = manifest.chunk_ids()
+    # Anything physically in the index that no current file produces
+    # gets deleted as well
+    indexed_ids = set(getattr(work["store"], "index_to_docstore_id", {}).values()) | previous_ids
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP)
+    files = sorted(docs_dir.glob("*.md"))
+    current_files: dict[str, dict] = {}
+    seen: set[str] = set()
+    pending: list[tuple[str, str, str]] = []          # (id, text, source)
+    tasks: list[asyncio.Task] = []
+    semaphore = asyncio.Semaphore(settings.ingest_concurrency)
+    stats = {"files": len(files), "chunks": 0, "embedded": 0, "deleted": 0}
+
+    async def embed_and_add(batch: list[tuple[str, str, str]]) -> None:
+        texts = [text for _, text, _ in batch]
+        async with semaphore:
+            vectors = await embeddings.aembed_documents(texts)
+        work["store"] = _add(work["store"], embeddings, batch, vectors)
+        stats["embedded"] += len(batch)
+        logger.debug("Embedded batch of %d chunks", len(batch))
+
+    def flush(force: bool = False) -> None:
+        while pending and (force or len(pending) >= settings.ingest_batch_size):
+            batch = pending[: settings.ingest_batch_size]
+            del pending[: settings.ingest_batch_size]
+            tasks.append(asyncio.create_task(embed_and_add(batch)))
+
+    # Stage 1 – read + split in threads; stream chunks to embedding as files finish
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=settings.ingest_workers) as pool:
+        futures = [
+            loop.run_in_executor(pool, _split_file, f, splitter, manifest.files.get(f.name))
+            for f in files
+        ]
+        for next_done in asyncio.as_completed(futures):
+            source, digest, chunks = await next_done
+            if chunks is None:
+                ids = manifest.files[source]["chunks"]
+            else:
+                ids = []
+                for text in chunks:
+                    cid = chunk_id(text)
+                    ids.append(cid)
+                    # Stage 2 – only chunks not already in the index get embedded
+                    if cid not in indexed_ids and cid not in seen:
+                        pending.append((cid, text, source))
+                    seen.add(cid)
+            seen.update(ids)
+            current_files[source] = {"sha256": digest, "chunks": ids}
+            stats["chunks"] += len(ids)
+            flush()
+    flush(force=True)
+    await asyncio.gather(*tasks)
+
+    # Stage 3 – drop chunks no current file produces
+    stale = sorted(indexed_ids - seen)
+    if stale:
+        work["store"].delete(stale)
+        stats["deleted"] = len(stale)
+
+    # Stage 4 – single persist into a new generation, then publish it
+    manifest.files = current_files
+    manifest.embedding_model = model_key or manifest.embedding_model
+    kind = settings.faiss_index_type.lower()
+    changed = stats["embedded"] or stats["deleted"]
+    if not use_faiss:
+        await asyncio.to_thread(_build_lexical, work["store"], root)
+        manifest.save()
+    elif work["store"] is None:
+        logger.warning("No documents in %s – nothing to index", docs_dir)
+    elif (not changed and previous_dir is not None and index_path(previous_dir, kind).exists()
+          and (previous_dir / LEXICAL_FILE).exists()):
+        manifest.save(previous_dir / MANIFEST_NAME)      # index unchanged – no new generation
+    else:
+        generation, gen_dir = new_generation(root)
+        await asyncio.to_thread(work["store"].save_local, str(gen_dir))
+        await asyncio.gather(
+            asyncio.to_thread(build_variant, gen_dir, kind),
+            asyncio.to_thread(_build_lexical, work["store"], gen_dir),
+        )
+        manifest.save(gen_dir / MANIFEST_NAME)
+        publish_generation(root, generation, keep=settings.index_keep_generations)
+        stats["generation"] = generation
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info("Ingestion complete: %s", stats)
+    return stats
+
 
+def _build_lexical(store, directory: Path) -> None:
+    if isinstance(store, FAISS):
+        ids = list(store.index_to_docstore_id.values())
+        texts = [store.docstore.search(i).page_content for i in ids]
+    else:
+        found = store.get(include=["documents"])
+        ids, texts = found["ids"], found["documents"]
+    BM25Index(ids, texts).save(directory)
+    logger.info("Built BM25 index over %d chunks", len(ids))
 
-def ingest() -> None:
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE, chunk_overlap=OVERLAP
-    )
-    retriever = get_retriever()
 
-    for file in DOCS_DIR.glob("*.md"):
-        with open(file, encoding="utf-8") as f:
-            text = f.read()
-        chunks = splitter.split_text(text)
-        # Dedup by simple hash
-        for chunk in chunks:
-            retriever.add_documents(
-                [{"page_content": chunk, "metadata": {"source": file.name}}]
-            )
-    # Persist if FAISS
-    if settings.vector_store == "faiss":
-        retriever._vectorstore.save_local(settings.vector_directory)  # type: ignore[attr-defined]
-    logger.info("Ingestion complete.")
+def _add(store, embeddings, batch: list[tuple[str, str, str]], vectors: list[list[float]]):
+    ids = [cid for cid, _, _ in batch]
+    metadatas = [{"source": source, "chunk_id": cid} for cid, _, source in batch]
+    texts = [text for _, text, _ in batch]
+    if store is None:                                # first FAISS generation
+        return FAISS.from_embeddings(list(zip(texts, vectors)), embeddings,
+                                     metadatas=metadatas, ids=ids)
+    if hasattr(store, "add_embeddings"):             # FAISS
+        store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+    else:                                            # Chroma
+        store._collection.upsert(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+    return store
 
 
 if __name__ == "__main__":
-    ingest()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(ingest())
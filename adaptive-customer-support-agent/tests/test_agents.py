@@ -2,8 +2,29 @@
 Unit tests for core agents (fast async style).
 """
 import pytest
+import asyncio
+import json
+import os
+import time
+import numpy as np
 from src.agents.intent_classifier import get_intent_classifier
+from src.agents.intent_batcher import IntentBatcher
+from src.agents.intent_cache import IntentEmbeddingCache
+from src.agents.intent_index import INDEX_TYPES, build_intent_index
+from src.core.executor import BoundedExecutor
+from src.core.llm_guard import AdaptiveRateLimiter, CircuitBreaker, LLMGuard, LLMUnavailableError
+from src.core import database, memory
+from src.core.config import settings
+from src.agents.history_manager import HistoryManager
+from src.core.response_cache import InProcessCacheBackend, ResponseCache
+from src.core.embeddings import CachedEmbeddings, EmbeddingStore
+from src.core.faiss_index import INDEX_KINDS, build_variant, load_store
 from src.agents.escalation_agent import EscalationAgent
+from src.agents.escalation_rules import EscalationRules
+from src.agents.rag_agent import RagAgent, retrieval_stats
+from src.core.lexical_index import BM25Index
+from src.agents.context_compressor import ContextCompressor, count_tokens
+from src.core import vector_store
 
 @pytest.mark.asyncio
 async def test_intent_classifier_basic():
@@ -12,8 +33,524 @@ async def test_intent_classifier_basic():
     assert intent == "card_block"
     assert prob > 0.5
 
+@pytest.mark.asyncio
+async def test_intent_classifier_many_matches_single():
+    clf = get_intent_classifier()
+    texts = ["Please block my card", "What is my current balance?"]
+    batched = clf.classify_many(texts)
+    assert [intent for intent, _ in batched] == [clf.classify(t)[0] for t in texts]
+
+@pytest.mark.asyncio
+async def test_intent_batcher_coalesces_concurrent_calls(mocker):
+    clf = get_intent_classifier()
+    spy = mocker.spy(clf, "classify_many")
+    batcher = IntentBatcher(max_batch_size=8, window_ms=20)
+    results = await asyncio.gather(
+        batcher.classify("Please block my card"),
+        batcher.classify("What is my current balance?"),
+        batcher.classify("I think I'm a victim of fraud"),
+    )
+    assert [intent for intent, _ in results] == [
+        "card_block", "account_balance", "fraud_report"
+    ]
+    assert spy.call_count == 1
+
+@pytest.mark.asyncio
+async def test_bounded_executor_limits_concurrency():
+    executor = BoundedExecutor(kind="thread", max_workers=4, max_concurrency=1)
+    peak = 0
+
+    async def probe():
+        nonlocal peak
+        while executor.completed < 3:
+            peak = max(peak, executor.in_flight)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(probe(), *(executor.run(time.sleep, 0.02) for _ in range(3)))
+    executor.shutdown()
+    assert peak == 1
+    assert executor.queue_depth == 0
+
+def test_intent_cache_only_encodes_new_examples(tmp_path):
+    encoded: list[list[str]] = []
+
+    def encode(texts):
+        encoded.append(list(texts))
+        return np.random.rand(len(texts), 8).astype(np.float32)
+
+    source = tmp_path / "intents.json"
+    cache = IntentEmbeddingCache(tmp_path / "cache", model_key="test-model")
+    source.write_text(json.dumps({"greet": ["hi", "hello"]}))
+    first = cache.load_or_build(source, ["hi", "hello"], encode)
+    again = cache.load_or_build(source, ["hi", "hello"], encode)
+    assert isinstance(again, np.memmap)
+    assert np.allclose(first, again)
+
+    source.write_text(json.dumps({"greet": ["hi", "hello", "hey"]}))
+    grown = cache.load_or_build(source, ["hi", "hello", "hey"], encode)
+    assert encoded == [["hi", "hello"], ["hey"]]
+    assert np.allclose(grown[:2], first)
+
+@pytest.mark.parametrize("kind", sorted(INDEX_TYPES))
+def test_intent_index_modes_rank_nearest_intent(kind):
+    embeddings = np.array(
+        [[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0], [0, 0.9, 0.1], [0, 0, 1]], dtype=np.float32
+    )
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    intents = ["card_block", "card_block", "account_balance", "account_balance", "loan_info"]
+    index = build_intent_index(kind, intents, embeddings, k=2)
+    (candidates,) = index.search(np.array([[0.95, 0.05, 0]], dtype=np.float32), top_n=2)
+    assert candidates[0][0] == "card_block"
+    assert len(candidates) == 2
+    assert candidates[0][1] >= candidates[1][1]
+
+
+def test_exhaustive_index_reads_grouped_mmap_without_copying(tmp_path):
+    rng = np.random.default_rng(0)
+    intents = ["loan_info"] * 3 + ["card_block"] * 4 + ["account_balance"] * 2
+    np.save(tmp_path / "emb.npy", rng.standard_normal((len(intents), 8)).astype(np.float32))
+    mapped = np.load(tmp_path / "emb.npy", mmap_mode="r")
+    grouped = build_intent_index("exhaustive", intents, mapped)
+    assert np.shares_memory(grouped._embeddings, mapped)     # workers share the page cache
+
+    order = rng.permutation(len(intents))                   # interleaved → sorted copy
+    shuffled = build_intent_index("exhaustive", [intents[i] for i in order], np.asarray(mapped)[order])
+    queries = rng.standard_normal((5, 8)).astype(np.float32)
+    for a, b in zip(grouped.search(queries, top_n=3), shuffled.search(queries, top_n=3)):
+        assert [label for label, _ in a] == [label for label, _ in b]
+        assert np.allclose([score for _, score in a], [score for _, score in b])
+
+def test_onnx_encoder_matches_torch(tmp_path):
+    pytest.importorskip("onnxruntime")
+    from src.agents.intent_classifier import MODEL_NAME, load_encoder
+    from src.agents.onnx_encoder import OnnxSentenceEncoder, export_onnx
+
+    export_onnx(MODEL_NAME, tmp_path, quantize=True)
+    texts = ["Please block my card", "What is my current balance?"]
+    torch_embs = load_encoder("torch").encode(texts, normalize_embeddings=True)
+    onnx_embs = OnnxSentenceEncoder(tmp_path).encode(texts, normalize_embeddings=True)
+    assert np.all(np.sum(torch_embs * onnx_embs, axis=1) > 0.98)
+
+def test_onnx_backend_without_exported_model_fails_with_hint(tmp_path, monkeypatch):
+    from src.agents.intent_classifier import load_encoder
+
+    monkeypatch.setattr(settings, "onnx_model_dir", str(tmp_path))
+    with pytest.raises(FileNotFoundError, match="src.agents.onnx_encoder"):
+        load_encoder("onnx")
+    assert not any(tmp_path.iterdir())          # nothing exported at serve time
+
+@pytest.mark.asyncio
+async def test_response_cache_hits_similar_query_in_same_bucket():
+    vectors = {
+        "how do i block my card": np.array([1.0, 0.0], dtype=np.float32),
+        "how do i block my card?": np.array([0.99, 0.14], dtype=np.float32),
+        "what are your opening hours": np.array([0.0, 1.0], dtype=np.float32),
+    }
+
+    async def embed(text):
+        return vectors[text]
+
+    cache = ResponseCache(
+        InProcessCacheBackend(max_entries=10, ttl_s=60),
+        embed=embed,
+        threshold=0.9,
+        bypass_intents=["account_balance"],
+    )
+    answer, emb = await cache.lookup("How do I block my card", "card_block", ["d1"])
+    assert answer is None
+    await cache.store(emb, "card_block", ["d1"], "Use the app.", latency_ms=800)
+
+    assert (await cache.lookup("how do I block my card?", "card_block", ["d1"]))[0] == "Use the app."
+    assert (await cache.lookup("how do I block my card?", "card_block", ["d2"]))[0] is None
+    assert (await cache.lookup("What are your opening hours", "card_block", ["d1"]))[0] is None
+    assert not cache.cacheable("account_balance")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["latency_saved_ms"] == 800
+
+@pytest.mark.asyncio
+async def test_rag_retrieve_many_matches_single_queries(monkeypatch):
+    from langchain.vectorstores.faiss import FAISS
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=16)
+    texts = ["Cards can be frozen in the app.", "Overdraft fee is $25.", "IBAN is on your statement."]
+    store = FAISS.from_texts(texts, embeddings)
+    monkeypatch.setattr(vector_store, "_retriever", store)
+    monkeypatch.setattr(vector_store, "_embeddings", embeddings)
+
+    rag = RagAgent()
+    batched = await rag.retrieve_many(["Overdraft fee is $25.", "IBAN is on your statement."])
+    singles = [await rag.retrieve(q) for q in ["Overdraft fee is $25.", "IBAN is on your statement."]]
+    assert [[m.content for m in msgs] for msgs in batched] == [[m.content for m in msgs] for msgs in singles]
+    assert batched[0][0].content == "Context:\nOverdraft fee is $25."
+
+@pytest.mark.asyncio
+async def test_cached_embeddings_embed_each_text_once(tmp_path):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    class Counting(DeterministicFakeEmbedding):
+        calls: list = []
+
+        async def aembed_documents(self, texts):
+            self.calls.append(list(texts))
+            return self.embed_documents(texts)
+
+    inner = Counting(size=8)
+    cached = CachedEmbeddings(inner, EmbeddingStore(tmp_path / "e.sqlite3"), model_key="fake")
+    first = await cached.aembed_documents(["card fees", "iban", "card fees"])
+    assert inner.calls == [["card fees", "iban"]]
+    assert first[0] == first[2]
+
+    # A fresh process (new store handle) reads the persisted vectors
+    reopened = CachedEmbeddings(inner, EmbeddingStore(tmp_path / "e.sqlite3"), model_key="fake")
+    assert await reopened.aembed_documents(["iban", "card fees"]) == [first[1], first[0]]
+    assert len(inner.calls) == 1
+    assert reopened.stats()["hit_rate"] == 1.0
+
+@pytest.mark.asyncio
+async def test_cached_embeddings_keep_queries_in_bounded_memory(tmp_path):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    store = EmbeddingStore(tmp_path / "e.sqlite3")
+    cached = CachedEmbeddings(DeterministicFakeEmbedding(size=8), store,
+                              model_key="fake", query_cache_size=2)
+    first = await cached.aembed_queries(["my card is blocked", "iban"])
+    assert await cached.aembed_query("my card is blocked") == first[0]
+    await cached.aembed_query("lost pin")
+    # Nothing reached SQLite; "iban" was least recently used and evicted
+    assert store.mget([cached.key(t) for t in ("my card is blocked", "iban", "lost pin")]) == {}
+    assert list(cached._queries) == ["my card is blocked", "lost pin"]
+
+@pytest.mark.asyncio
+async def test_hybrid_retrieval_skips_embedding_on_clear_lexical_match(monkeypatch):
+    from langchain.vectorstores.faiss import FAISS
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src.core.config import settings
+
+    class Counting(DeterministicFakeEmbedding):
+        calls: int = 0
+
+        async def aembed_documents(self, texts):
+            self.calls += 1
+            return self.embed_documents(texts)
+
+    embeddings = Counting(size=16)
+    texts = ["The bank SWIFT code is ADSBUS33.", "Overdraft fee is $25 per month.",
+             "Cards can be frozen in the app.", "Wire transfers settle in one day."]
+    ids = [f"c{i}" for i in range(len(texts))]
+    store = FAISS.from_texts(texts, embeddings, metadatas=[{"chunk_id": i} for i in ids], ids=ids)
+    monkeypatch.setattr(vector_store, "_retriever", store)
+    monkeypatch.setattr(vector_store, "_embeddings", embeddings)
+    monkeypatch.setattr(vector_store, "_lexical", BM25Index(ids, texts))
+    monkeypatch.setattr(settings, "rag_mode", "hybrid")
+
+    rag = RagAgent()
+    before = retrieval_stats()["lexical_only"]
+    swift, vague = await rag.retrieve_many(["What is the SWIFT code?", "help me please"])
+    assert swift[0].content == "Context:\nThe bank SWIFT code is ADSBUS33."
+    assert embeddings.calls == 1                     # only the vague query was embedded
+    assert len(vague) == settings.similarity_top_k
+    assert retrieval_stats()["lexical_only"] == before + 1
+
+def test_context_compressor_dedups_strips_overlap_and_fits_budget():
+    from langchain.schema import SystemMessage
+
+    fees = "Overdraft fee is $25 per month and is charged on the first business day of the month."
+    tail = "charged on the first business day of the month. Waivers apply to student accounts."
+    cards = "Cards can be frozen instantly in the mobile app under Settings > Cards. " * 20
+    docs = [SystemMessage(content=f"Context:\n{t}") for t in (fees, fees + " ", tail, cards)]
+
+    out, report = ContextCompressor(token_budget=120, dedup_threshold=0.8, mmr_lambda=0.7).compress(docs)
+    bodies = [m.content.removeprefix("Context:\n") for m in out]
+    assert bodies[0] == fees
+    assert "Waivers apply to student accounts." in bodies                 # overlap stripped
+    assert sum(count_tokens(m.content) for m in out) <= 120
+    assert report["chunks_in"] == 4 and report["tokens_saved"] > 0
+
+def test_context_compressor_strips_overlap_only_from_lower_ranked_emitted_chunk():
+    from langchain.schema import SystemMessage
+
+    head = "Overdraft fee is $25 per month and is charged on the first business day of the month."
+    tail = "charged on the first business day of the month. Waivers apply to student accounts."
+    filler = "Cards can be frozen instantly in the mobile app under Settings > Cards. " * 20
+    docs = [SystemMessage(content=f"Context:\n{t}") for t in (tail, head, filler)]
+
+    # Both emitted: the better-ranked `tail` keeps the shared text, `head` loses it
+    out, _ = ContextCompressor(token_budget=400, dedup_threshold=0.8, mmr_lambda=1.0).compress(docs)
+    bodies = [m.content.removeprefix("Context:\n") for m in out]
+    assert bodies[:2] == [tail, "Overdraft fee is $25 per month and is"]
+
+    # `head` is cut by the budget, so nothing may be stripped from `tail`
+    docs = [SystemMessage(content=f"Context:\n{t}") for t in (tail, filler, head)]
+    out, _ = ContextCompressor(token_budget=200, dedup_threshold=0.8, mmr_lambda=1.0).compress(docs)
+    bodies = [m.content.removeprefix("Context:\n") for m in out]
+    assert bodies[0] == tail and len(out) == 2
+
+@pytest.mark.parametrize("kind", INDEX_KINDS)
+def test_faiss_variants_load_mmapped_and_find_exact_match(kind, tmp_path):
+    from langchain.vectorstores.faiss import FAISS
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=32)
+    texts = [f"Knowledge base chunk {i}" for i in range(400)]
+    FAISS.from_texts(texts, embeddings).save_local(str(tmp_path))
+    build_variant(tmp_path, kind)
+
+    store = load_store(tmp_path, embeddings, kind=kind, mmap=True)
+    assert store.index.ntotal == len(texts)
+    hits = [doc.page_content for doc in store.similarity_search(texts[123], k=4)]
+    assert texts[123] in hits
+
+def test_session_fallback_is_lru_and_length_bounded(monkeypatch):
+    lru = memory.SessionLRU(max_sessions=2, max_messages=3, ttl_s=60)
+    for i in range(5):
+        lru.append("a", [{"role": "user", "content": str(i)}])
+    lru.append("b", [{"role": "user", "content": "b"}])
+    lru.get("a", 15)                                   # reads do not refresh recency
+    lru.append("c", [{"role": "user", "content": "c"}])
+    assert [m["content"] for m in lru.get("b", 15) + lru.get("c", 15)] == ["b", "c"]
+    assert lru.get("a", 15) == [] and lru.evictions == 1
+
+    now = memory.time.monotonic()
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now + 61)
+    assert lru.get("b", 15) == []                      # idle past the TTL
+
+@pytest.mark.asyncio
+async def test_push_turn_is_one_pipelined_round_trip(monkeypatch):
+    class FakePipeline:
+        def __init__(self, calls):
+            self.calls = calls
+        async def __aenter__(self):
+            return self
+        async def __aexit__(self, *exc):
+            return False
+        def xadd(self, key, fields, maxlen, approximate):
+            self.calls.append(("xadd", key, fields, maxlen))
+        def expire(self, key, ttl):
+            self.calls.append(("expire", key, ttl))
+        async def execute(self):
+            self.calls.append(("execute",))
+
+    class FakeRedis:
+        def __init__(self):
+            self.calls = []
+        def pipeline(self, transaction):
+            return FakePipeline(self.calls)
+        async def xrevrange(self, key, count):
+            payloads = [c[2] for c in self.calls if c[0] == "xadd"]
+            return [(str(i), p) for i, p in reversed(list(enumerate(payloads)))][:count]
+
+    fake = FakeRedis()
+    monkeypatch.setattr(memory, "_redis", fake)
+    turn = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello!"}]
+    await memory.push_turn("s1", turn)
+    assert [c[0] for c in fake.calls] == ["xadd", "xadd", "expire", "execute"]
+    assert fake.calls[0][2] == {"m": '["u","hi"]'}
+    assert await memory.get_history("s1") == turn
+
+@pytest.mark.asyncio
+async def test_history_manager_folds_old_turns_in_background(mocker):
+    summarise = mocker.patch("src.agents.history_manager.chat", return_value="Asked about fees 0-3.")
+    manager = HistoryManager()
+    session = "hist-1"
+    for i in range(5):
+        await memory.push_turn(session, [{"role": "user", "content": f"q{i}"},
+                                         {"role": "assistant", "content": f"a{i}"}])
+        manager.schedule_update(session)
+        await manager.drain()
+
+    # 10 messages, 6 kept verbatim → the first 4 were folded in one LLM call
+    assert summarise.await_count == 1
+    loaded = await manager.load(session)
+    assert loaded[0].content.endswith("Asked about fees 0-3.")
+    assert [m.content for m in loaded[1:]] == ["q2", "a2", "q3", "a3", "q4", "a4"]
+
 @pytest.mark.asyncio
 async def test_escalation_logic():
     esc = EscalationAgent()
     assert await esc.requires_escalation("I am not sure how to help.") is True
     assert await esc.requires_escalation("All good!") is False
+
+def test_escalation_rules_conditions_batch_and_hot_reload(tmp_path):
+    path = tmp_path / "rules.json"
+    rules = [
+        {"id": "fraud", "keywords": ["fraud", "card fraud"]},
+        {"id": "human", "on": "user", "keywords": ["real person"]},
+        {"id": "fraud_intent", "intents": ["fraud_report"], "min_confidence": 0.6},
+    ]
+    path.write_text(json.dumps({"version": 1, "rules": rules}))
+    engine = EscalationRules(path, reload_s=0)
+
+    assert engine.evaluate("Card FRAUD is handled by our team.") == ["fraud"]
+    assert engine.evaluate("Defrauded?") == []               # whole words only
+    assert engine.evaluate("Sure.", "I want a real person", "fraud_report", 0.9) == ["human", "fraud_intent"]
+    records = [{"reply": "ok", "intent": "fraud_report", "confidence": 0.3},
+               {"reply": "Possible fraud.", "user_message": "hi"}]
+    assert engine.evaluate_many(records) == [[], ["fraud"]]
+
+    rules.append({"id": "scam", "regex": r"\bscam(mer)?s?\b"})
+    path.write_text(json.dumps({"version": 2, "rules": rules}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert engine.evaluate("Looks like scammers.") == ["scam"]
+    assert engine.ruleset.version == 2
+
+    path.write_text("{broken")                               # bad edit keeps serving v2
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+    assert engine.ruleset.version == 2
+
+def test_escalation_rules_credit_overlapping_keywords(tmp_path):
+    path = tmp_path / "rules.json"
+    rules = [
+        {"id": "fraud", "keywords": ["fraud"]},
+        {"id": "fraud_alert", "keywords": ["fraud alert"]},
+        {"id": "person", "keywords": ["person"]},
+        {"id": "human", "keywords": ["real person"]},
+        {"id": "urgent", "keywords": ["alert now"]},
+    ]
+    path.write_text(json.dumps({"version": 1, "rules": rules}))
+    engine = EscalationRules(path, reload_s=0)
+
+    assert engine.evaluate("We sent a fraud alert now.") == ["fraud", "fraud_alert", "urgent"]
+    assert engine.evaluate("A real person will call.") == ["person", "human"]
+    assert engine.evaluate("Fraudulent alerts") == []
+    assert engine.evaluate_many([{"reply": "fraud alert"}]) == [["fraud", "fraud_alert"]]
+
+@pytest.mark.asyncio
+async def test_bulk_writer_batches_tickets_and_applies_backpressure(monkeypatch):
+    class FakeCollection:
+        def __init__(self):
+            self.batches = []
+        async def insert_many(self, docs, ordered):
+            await asyncio.sleep(0.01)
+            self.batches.append(list(docs))
+
+    tickets = FakeCollection()
+    monkeypatch.setattr(database, "db", {"tickets": tickets})
+    writer = database.BulkWriter(batch_size=3, flush_interval_ms=1000, max_pending=4)
+    monkeypatch.setattr("src.agents.escalation_agent.get_bulk_writer", lambda: writer)
+
+    esc = EscalationAgent()
+    ids = await asyncio.gather(*(esc.create_ticket(f"s{i}", "fraud!") for i in range(7)))
+    assert len(set(ids)) == 7 and all(i.startswith("TCK-") for i in ids)
+    assert writer.backpressure_waits > 0           # 7 tickets > 4 pending slots
+    await writer.close()                           # shutdown flushes the remainder
+    assert all(len(b) <= 3 for b in tickets.batches)
+    assert sorted(d["ticket_id"] for b in tickets.batches for d in b) == sorted(ids)
+    assert writer.stats()["written"] == 7 and writer.stats()["pending"] == 0
+
+@pytest.mark.asyncio
+async def test_bulk_writer_unexpected_error_does_not_leak_capacity(monkeypatch):
+    class Broken:
+        async def insert_many(self, docs, ordered):
+            raise TypeError("unencodable field")
+
+    class Fine:
+        def __init__(self):
+            self.docs = []
+        async def insert_many(self, docs, ordered):
+            self.docs.extend(docs)
+
+    conversations = Fine()
+    monkeypatch.setattr(database, "db", {"tickets": Broken(), "conversations": conversations})
+    writer = database.BulkWriter(batch_size=2, flush_interval_ms=1000, max_pending=3)
+    for i in range(3):
+        await writer.put("tickets", {"n": i})
+    # Buffer full – only returns once the failed tickets release their slots
+    await asyncio.wait_for(writer.put("conversations", {"n": 0}), timeout=2)
+    await writer.close()
+    assert len(conversations.docs) == 1
+    stats = writer.stats()
+    assert stats["failed"] == 3 and stats["pending"] == 0 and stats["backpressure_waits"] == 1
+
+@pytest.mark.asyncio
+async def test_llm_guard_coalesces_backs_off_on_429_and_trips_breaker():
+    guard = LLMGuard(max_concurrency=2, limiter=AdaptiveRateLimiter(6000, 60),
+                     breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60))
+    upstream = []
+
+    async def answer():
+        upstream.append(1)
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    results = await asyncio.gather(*(guard.run(answer, key="same prompt") for _ in range(5)))
+    assert results == ["ok"] * 5 and len(upstream) == 1
+    assert guard.stats()["coalesced"] == 4
+
+    class RateLimited(Exception):
+        status_code = 429
+        response = type("R", (), {"headers": {"retry-after-ms": "10"}})()
+
+    attempts = []
+    async def limited_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimited()
+        return "ok"
+
+    assert await guard.run(limited_once) == "ok"
+    assert guard.limiter.rate_limited == 1 and guard.limiter.rate < guard.limiter.max_rate
+
+    async def down():
+        raise ConnectionError("upstream down")
+
+    guard.max_attempts = 1
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await guard.run(down)
+    with pytest.raises(LLMUnavailableError):          # fails fast, upstream not called
+        await guard.run(answer)
+    assert guard.stats()["breaker"] == {"state": "open", "failures": 2, "rejected": 1}
+
+@pytest.mark.asyncio
+async def test_llm_guard_counts_one_breaker_failure_per_exhausted_call(monkeypatch):
+    guard = LLMGuard(max_concurrency=2, limiter=AdaptiveRateLimiter(6000, 60),
+                     breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60), max_attempts=3)
+    monkeypatch.setattr("src.core.llm_guard.random.uniform", lambda a, b: 0.0)   # no backoff
+    attempts = []
+
+    async def blip():
+        attempts.append(1)
+        raise ConnectionError("502 from upstream")
+
+    with pytest.raises(ConnectionError):
+        await guard.run(blip)
+    assert len(attempts) == 3 and guard.stats()["retries"] == 2
+    assert guard.stats()["breaker"] == {"state": "closed", "failures": 1, "rejected": 0}
+
+@pytest.mark.asyncio
+async def test_llm_guard_follower_takes_over_cancelled_flight():
+    guard = LLMGuard(max_concurrency=2, limiter=AdaptiveRateLimiter(6000, 60),
+                     breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60))
+    upstream = []
+
+    async def answer():
+        upstream.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    leader = asyncio.create_task(guard.run(answer, key="same prompt"))
+    await asyncio.sleep(0.01)
+    followers = [asyncio.create_task(guard.run(answer, key="same prompt")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await asyncio.gather(*followers) == ["ok"] * 3
+    assert leader.cancelled() and len(upstream) == 2    # one follower re-led the flight
+
+@pytest.mark.asyncio
+async def test_llm_guard_closed_stream_releases_half_open_probe():
+    guard = LLMGuard(max_concurrency=2, limiter=AdaptiveRateLimiter(6000, 60),
+                     breaker=CircuitBreaker(failure_threshold=1, reset_timeout_s=0))
+    guard.breaker.record_failure()                      # open; half-open on next check
+
+    async def stream():
+        async with guard.slot():
+            yield "token"
+            yield "token"
+
+    tokens = stream()
+    assert await tokens.__anext__() == "token"
+    await tokens.aclose()                               # client went away mid-stream
+    async with guard.slot():                            # the next call may probe again
+        pass
+    assert guard.breaker.state == "closed"
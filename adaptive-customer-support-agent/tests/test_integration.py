@@ -0,0 +1,87 @@
+"""
+End-to-end graph tests with the classifier, retriever and LLM faked.
+"""
+import asyncio
+import pytest
+from langchain.schema import SystemMessage
+from src.agents import conversation_agent as conv
+
+
+class FakeBatcher:
+    async def classify(self, text: str):
+        await asyncio.sleep(0.01)
+        if "hello" in text.lower():
+            return "greeting", 0.95
+        return "card_block", 0.9
+
+
+@pytest.fixture()
+def agent(mocker):
+    mocker.patch.object(conv, "get_intent_batcher", return_value=FakeBatcher())
+    mocker.patch.object(conv, "get_response_cache", return_value=None)
+    llm = mocker.patch.object(conv, "chat", return_value="You can freeze it in the app.")
+    agent = conv.ConversationAgent()
+
+    async def retrieve(query):
+        await asyncio.sleep(0.01)
+        return [SystemMessage(content="Context:\nCards can be frozen in the app.")]
+
+    mocker.patch.object(agent.rag, "retrieve", side_effect=retrieve)
+    agent.llm = llm
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_graph_runs_intent_and_retrieval_before_draft(agent):
+    result = await agent.run("s1", "Please block my card")
+    assert result["messages"][-1].content == "You can freeze it in the app."
+    assert result["intent"] == "card_block"
+    assert len(result["context"]) == 1
+    assert {"intent", "retrieve", "draft", "check"} <= set(result["timings"])
+    agent.llm.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_canned_intent_skips_llm_and_retrieval(agent):
+    result = await agent.run("s1", "Hello there!")
+    assert result["messages"][-1].content == conv.CANNED_RESPONSES["greeting"]
+    assert "draft" not in result["timings"]
+    agent.llm.assert_not_awaited()
+    agent.rag.retrieve.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_escalates_instead_of_failing(agent, mocker):
+    agent.llm.side_effect = conv.LLMUnavailableError("circuit open")
+    ticket = mocker.patch.object(agent.escalator, "create_ticket", return_value="TCK-1")
+    result = await agent.run("s1", "Why was I charged twice?")
+    assert result["requires_escalation"] is True
+    assert "TCK-1" in result["messages"][-1].content
+    ticket.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_semantic_cache_is_not_shared_across_sessions_with_history(agent, mocker):
+    import numpy as np
+    from langchain.schema import AIMessage, HumanMessage
+    from src.core.response_cache import InProcessCacheBackend, ResponseCache
+
+    async def embed(text):
+        return np.array([1.0, 0.0], dtype=np.float32)
+
+    cache = ResponseCache(InProcessCacheBackend(max_entries=10, ttl_s=60), embed=embed,
+                          threshold=0.9, bypass_intents=[])
+    mocker.patch.object(conv, "get_response_cache", return_value=cache)
+    histories = {"b": [HumanMessage(content="My card ending 4242 was stolen"),
+                       AIMessage(content="I have blocked card 4242.")]}
+
+    class FakeHistory:
+        async def load(self, session_id):
+            return histories.get(session_id, [])
+
+    mocker.patch.object(conv, "get_history_manager", return_value=FakeHistory())
+    await agent.run("a", "Please block my card")
+    await agent.run("b", "Please block my card")       # follow-up: neither read nor stored
+    await agent.run("c", "Please block my card")       # first turn: served from cache
+    assert agent.llm.await_count == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["bypassed"] == 1
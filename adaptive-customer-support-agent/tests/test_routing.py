@@ -0,0 +1,112 @@
+"""
+HTTP-level tests for the FastAPI routers (agents are faked).
+"""
+import asyncio
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from src.core.lifecycle import Lifecycle
+from src.core.metrics import TimingMiddleware, add_span, render
+from src.tools import batch_processor
+from main import app as main_app
+
+
+class FakeStreamingAgent:
+    async def stream(self, session_id: str, user_text: str):
+        for token in ("Hello", " there"):
+            yield {"event": "token", "data": token}
+        yield {"event": "done", "data": "Hello there"}
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_emits_sse_events(client, mocker):
+    mocker.patch(
+        "src.channels.fastapi_channel.get_conversation_agent",
+        return_value=FakeStreamingAgent(),
+    )
+    history = mocker.patch("src.channels.fastapi_channel.push_turn")
+    resp = await client.post(
+        "/api/v1/chat/stream", json={"session_id": "s1", "message": "hi"}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "),
+         json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in resp.text.strip().split("\n\n")
+    ]
+    assert events == [("token", "Hello"), ("token", " there"), ("done", "Hello there")]
+    history.assert_awaited_once_with("s1", [
+        {"role": "user", "content": "hi"}, {"role": "assistant", "content": "Hello there"},
+    ])
+
+
+@pytest.mark.asyncio
+async def test_timing_middleware_sets_server_timing_and_records_route():
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware, header=True)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        add_span("llm", 12.5)
+        add_span("llm", 0.5)
+        return {"id": item_id}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/items/7")
+    assert resp.status_code == 200
+    assert resp.headers["server-timing"].startswith("llm;dur=13.0, total;dur=")
+    payload, _ = render()
+    assert b'support_http_request_seconds_count{method="GET",route="/items/{item_id}",status="200"}' in payload
+
+
+@pytest.mark.asyncio
+async def test_startup_runs_resources_concurrently_and_readyz_waits_for_warmup(mocker):
+    warmup_gate = asyncio.Event()
+
+    async def resource():
+        await asyncio.sleep(0.05)
+
+    async def slow_warmup():
+        await warmup_gate.wait()
+
+    async def broken_warmup():
+        raise RuntimeError("no model")
+
+    lifecycle = Lifecycle(warmups={"encoder": slow_warmup, "search": broken_warmup})
+    mocker.patch("main.get_lifecycle", return_value=lifecycle)
+    started = time.perf_counter()
+    await lifecycle.start({"mongo": resource, "vector_store": resource, "redis": resource})
+    assert time.perf_counter() - started < 0.12          # not 3 × 50 ms in sequence
+    assert set(lifecycle.phases) == {"mongo", "vector_store", "redis", "startup"}
+
+    async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as ac:
+        assert (await ac.get("/healthz")).status_code == 200
+        assert (await ac.get("/readyz")).status_code == 503
+        warmup_gate.set()
+        await lifecycle.wait_ready()
+        resp = await ac.get("/readyz")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert {"warmup_encoder", "warmup_search", "warmup"} <= set(body["phases_ms"])
+    assert "no model" in body["warmup_errors"]["search"]     # logged, still ready
+    await lifecycle.stop()
+
+
+@pytest.mark.asyncio
+async def test_classify_batch_scores_items_in_order_and_caps_size(mocker):
+    mocker.patch.object(batch_processor, "classify_batch", side_effect=lambda texts, top_n=None: [
+        [("fraud_report", 0.95)] if "fraud" in t else [("greeting", 0.7)] for t in texts
+    ])
+    items = [{"id": i, "text": "hi"} for i in range(4)]
+    items[3]["text"] = "fraud on my card"
+    async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/classify/batch", json={"items": items})
+        too_many = await ac.post("/api/v1/classify/batch", json={"items": items * 2})
+    results = resp.json()["results"]
+    assert [r["id"] for r in results] == [0, 1, 2, 3]              # two chunks, order kept
+    assert results[3]["intent"] == "fraud_report"
+    assert "fraud_intent" in results[3]["escalation_rules"] and not results[0]["escalate"]
+    assert too_many.status_code == 413
@@ -0,0 +1,148 @@
+"""
+Unit tests for tools (knowledge-base ingestion, bulk scoring).
+"""
+import json
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.core import vector_store
+from src.core.config import settings
+from src.core.faiss_index import current_generation, load_store
+from src.tools import batch_processor, knowledge_base
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    embedded: int = 0
+
+    async def aembed_documents(self, texts):
+        self.embedded += len(texts)
+        return self.embed_documents(texts)
+
+
+def _contents(store) -> list[str]:
+    return sorted(store.docstore.search(i).page_content for i in store.index_to_docstore_id.values())
+
+
+@pytest.fixture()
+def kb(monkeypatch, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    embeddings = CountingEmbeddings(size=16)
+    monkeypatch.setattr(vector_store, "_embeddings", embeddings)
+    for name, value in [("_retriever", None), ("_lc_retriever", None), ("_generation", None),
+                        ("_swap_stats", dict(vector_store._swap_stats))]:
+        monkeypatch.setattr(vector_store, name, value)
+    monkeypatch.setattr(settings, "vector_directory", str(tmp_path / "index"))
+    return docs, embeddings
+
+
+@pytest.mark.asyncio
+async def test_ingest_is_incremental_and_deduplicated(kb):
+    docs, embeddings = kb
+    (docs / "cards.md").write_text("Cards can be frozen in the app.")
+    (docs / "fees.md").write_text("Overdraft fee is $25.")
+    (docs / "copy.md").write_text("Overdraft fee is $25.")      # duplicate content
+
+    stats = await knowledge_base.ingest(docs)
+    assert embeddings.embedded == 2
+    _, gen_dir = current_generation(settings.vector_directory)
+    assert _contents(load_store(gen_dir, embeddings)) == ["Cards can be frozen in the app.", "Overdraft fee is $25."]
+
+    # Unchanged tree → nothing is embedded, no new generation
+    again = await knowledge_base.ingest(docs)
+    assert embeddings.embedded == 2
+    assert "generation" not in again
+
+    # Removing a file drops its chunks; the shared duplicate stays
+    (docs / "cards.md").unlink()
+    (docs / "copy.md").unlink()
+    latest = await knowledge_base.ingest(docs)
+    assert embeddings.embedded == 2
+    assert latest["deleted"] == 1
+    assert latest["generation"] != stats["generation"]
+    _, gen_dir = current_generation(settings.vector_directory)
+    assert _contents(load_store(gen_dir, embeddings)) == ["Overdraft fee is $25."]
+
+
+@pytest.mark.asyncio
+async def test_new_generation_is_hot_swapped_without_breaking_pinned_store(kb):
+    docs, embeddings = kb
+    (docs / "fees.md").write_text("Overdraft fee is $25.")
+    await knowledge_base.ingest(docs)
+    assert await vector_store.reload_vector_store() is True
+    old_store = vector_store.get_vector_store()
+
+    (docs / "iban.md").write_text("Your IBAN is on the statement.")
+    await knowledge_base.ingest(docs)
+    assert await vector_store.reload_vector_store() is True
+    assert await vector_store.reload_vector_store() is False     # already current
+
+    stats = vector_store.index_stats()
+    assert stats["generation"] == current_generation(settings.vector_directory)[0]
+    assert stats["vectors"] == 2
+    # A query that pinned the old store before the swap still works
+    assert [d.page_content for d in old_store.similarity_search("fee", k=4)] == ["Overdraft fee is $25."]
+    docs_found = await vector_store.asimilarity_search("Your IBAN is on the statement.", k=1)
+    assert docs_found[0].page_content == "Your IBAN is on the statement."
+
+
+def fake_classify_batch(texts, top_n=None):
+    return [[("fraud_report", 0.9)] if "fraud" in t else [("greeting", 0.8)] for t in texts]
+
+
+def test_batch_processor_keeps_order_and_resumes_after_torn_write(tmp_path, mocker):
+    classify = mocker.patch.object(batch_processor, "classify_batch", side_effect=fake_classify_batch)
+    lines = [json.dumps({"id": i, "user_message": f"hello {i}"}) for i in range(7)]
+    lines[2] = json.dumps({"id": 2, "user_message": "I think this is fraud"})
+    lines[4] = "{not json"
+    source = tmp_path / "archive.jsonl"
+    source.write_text("\n".join(lines) + "\n")
+    output = tmp_path / "scored.jsonl"
+
+    stats = batch_processor.run(str(source), output, workers=0, chunk_size=3)
+    full = output.read_text()
+    rows = [json.loads(line) for line in full.splitlines()]
+    assert [row["line"] for row in rows] == list(range(1, 8))
+    assert rows[2]["intent"] == "fraud_report" and rows[2]["escalate"]
+    assert "error" in rows[4] and rows[0]["intent"] == "greeting"
+    assert stats["errors"] == 1 and stats["lines"] == 7
+
+    # Crash mid-write of line 5 → resume re-scores lines 5-7 only
+    output.write_text("".join(full.splitlines(keepends=True)[:4]) + full.splitlines()[4][:5])
+    classify.reset_mock()
+    stats = batch_processor.run(str(source), output, workers=0, chunk_size=3, resume=True)
+    assert stats["skipped"] == 4 and stats["lines"] == 3
+    assert [t for call in classify.call_args_list for t in call.args[0]] == ["hello 5", "hello 6"]
+    assert output.read_text() == full
+
+
+def test_batch_worker_limits_torch_and_faiss_threads(monkeypatch):
+    import faiss
+    import torch
+
+    monkeypatch.setenv("OMP_NUM_THREADS", "64")        # inherited value must not win
+    monkeypatch.setattr(settings, "intent_backend", "torch")
+    monkeypatch.setattr(settings, "intent_index", "faiss")
+    before = torch.get_num_threads(), faiss.omp_get_max_threads()
+    try:
+        batch_processor._init_worker(1)
+        assert (torch.get_num_threads(), faiss.omp_get_max_threads()) == (1, 1)
+    finally:
+        torch.set_num_threads(before[0])
+        faiss.omp_set_num_threads(before[1])
+
+
+def test_batch_worker_sizes_onnx_session(tmp_path, monkeypatch):
+    from src.agents import onnx_encoder
+    from src.agents.intent_classifier import load_encoder
+
+    (tmp_path / onnx_encoder.INT8_FILE).touch()
+    sessions = []
+    monkeypatch.setattr(onnx_encoder, "OnnxSentenceEncoder",
+                        lambda model_dir, quantized, num_threads: sessions.append(num_threads))
+    monkeypatch.setattr(settings, "intent_backend", "onnx")
+    monkeypatch.setattr(settings, "onnx_model_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "onnx_num_threads", 0)
+
+    batch_processor._init_worker(2)
+    load_encoder("onnx")
+    assert sessions == [2]